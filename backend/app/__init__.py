@@ -1,25 +1,38 @@
-from flask import Flask
-from flask_cors import CORS
-from app.config import config
-from app.database import init_db
+import os
+
+
+def create_app(config_name=None):
+    """Aplicación de BOBIS con la configuración indicada (development|production, por defecto APP_CONFIG).
+    Los blueprints y sus servicios se importan aquí y no al importar el paquete app, y la BD
+    recién se conecta en la primera consulta."""
+    from flask import Flask
+    from flask_cors import CORS
+
+    from app.comandos import COMANDOS
+    from app.config import config
+    from app.database import db
+    from app.rutas import registrar_blueprints
+    from app.servicios import metricas
 
-def create_app(config_name='default'):
     app = Flask(__name__)
-    app.config.from_object(config[config_name])
-    
+    # URI, pool y opciones del motor según el entorno
+    app.config.from_object(config[config_name or os.getenv('APP_CONFIG', 'default')])
+    db.init_app(app)
+    # Latencia por ruta y SQL por petición, expuestas en /api/metrics
+    metricas.init_app(app)
+
     # Habilitar CORS para Angular
-    CORS(app, origins=["http://localhost:4200"])
-    
-    # Inicializar base de datos
-    init_db(app)
-    
-    # Ruta de prueba
-    @app.route('/')
-    def hello():
-        return {
-            'message': 'API BOBIS - Sistema de Gestión de Bobinas',
-            'version': '1.0.0',
-            'status': 'Funcionando correctamente'
-        }
-    
-    return app
\ No newline at end of file
+    CORS(app, origins=['http://localhost:4200'])
+
+    @app.after_request
+    def after_request(response):
+        response.headers.add('Access-Control-Allow-Origin', 'http://localhost:4200')
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
+        response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,PATCH,POST,DELETE,OPTIONS')
+        response.headers.add('Access-Control-Allow-Credentials', 'true')
+        return response
+
+    registrar_blueprints(app)
+    for comando in COMANDOS:
+        app.cli.add_command(comando)
+    return app
@@ -0,0 +1,226 @@
+import os
+from datetime import date, datetime
+
+from sqlalchemy import text
+
+from app.concurrencia import ConsultasParalelas
+from app.database import db
+from app.kpis import ESTADO_DISPONIBLE
+from app.pronostico import MemoPronosticos, indice_de_texto, indice_mes, matriz_series, pronosticar, texto_mes
+from app.servicios import cache_catalogos, indice_antiguedad, rollup_pedidos, servicio_kpis, versiones_tablas
+from app.snapshots import Snapshot
+
+
+def calcular_analitica_predictiva():
+    """Calcula el payload completo de la analítica predictiva"""
+    # Las consultas son independientes: se lanzan juntas, cada una en su propia conexión,
+    # y la analítica tarda lo que la más lenta. Si una falla o vence, solo su sección queda vacía.
+    consultas = ConsultasParalelas(db.engine, timeout=int(os.getenv('DASHBOARD_TIMEOUT_CONSULTA', 10)))
+
+    # 1. BOBINAS MÁS PEDIDAS (datos reales) - CORREGIDO: TOP en lugar de LIMIT
+    query_bobinas_populares = """
+    SELECT TOP 10
+        B.DESC_BOBI,
+        COUNT(PD.ID_PEDIDO_DET) as total_pedidos,
+        AVG(R.PESO) as peso_promedio
+    FROM PEDIDO_DET PD
+    JOIN REGISTROS R ON PD.ID_REGISTRO = R.ID_REGISTRO
+    JOIN BOBINA B ON R.BOBINA_ID_BOBI = B.ID_BOBI
+    WHERE PD.ESTADO_DESPACHO = 1
+    GROUP BY B.DESC_BOBI
+    ORDER BY total_pedidos DESC
+    """
+    consultas.agregar('bobinasPopulares', lambda conn: [
+        {
+            'bobina': row[0],
+            'total_pedidos': row[1],
+            'peso_promedio': float(row[2]) if row[2] else 0
+        }
+        for row in conn.execute(text(query_bobinas_populares))
+    ])
+
+    # 5. TENDENCIA MENSUAL (para gráfico de líneas)
+    consultas.agregar('tendenciaMensual', leer_tendencia_mensual)
+
+    # 2 y 7. ESTADO ACTUAL DE BOBINAS Y ESTADÍSTICAS GENERALES: del recorrido compartido de
+    # indicadores, en este hilo mientras las demás consultas corren
+    errores = {}
+    try:
+        kpis = servicio_kpis.obtener()
+    except Exception as e:
+        kpis = None
+        errores['estadisticas'] = str(e)
+
+    # 4. BOBINAS MÁS ANTIGUAS (para rotación): del índice de antigüedad, sin ordenar REGISTROS
+    try:
+        bobinas_antiguas = bobinas_antiguas_a_dicts(indice_antiguedad.mas_antiguas(db.session, 10))
+    except Exception as e:
+        bobinas_antiguas = []
+        errores['bobinasAntiguas'] = str(e)
+
+    resultados, errores_consultas = consultas.resultados()
+    errores.update(errores_consultas)
+    for seccion, error in errores.items():
+        print(f'Analítica predictiva: sección {seccion} sin datos:', error)
+
+    tendencia_mensual = resultados.get('tendenciaMensual', [])
+
+    # 6. PREDICCIÓN CON REGRESIÓN LINEAL (ML)
+    prediccion_proximos_meses = predecir_demanda(tendencia_mensual)
+
+    payload = {
+        'bobinasPopulares': resultados.get('bobinasPopulares', []),
+        'estadoBobinas': kpis['por_estado'] if kpis else [],
+        'bobinasAntiguas': bobinas_antiguas,
+        'tendenciaMensual': tendencia_mensual,
+        'prediccionDemanda': prediccion_proximos_meses,
+        'estadisticas': {
+            'totalBobinas': kpis['total_registros'] if kpis else None,
+            'bobinasDisponibles': kpis['disponibles'] if kpis else None,
+            'bobinasDespachadas': kpis['despachadas'] if kpis else None
+        }
+    }
+    if errores:
+        # Secciones que quedaron vacías en este cálculo
+        payload['errores'] = errores
+    return payload
+
+
+def leer_tendencia_mensual(conexion):
+    """Los últimos 12 meses y el mes en curso, del rollup mensual"""
+    mes_actual = indice_mes(datetime.now().year, datetime.now().month)
+    return [
+        {
+            'mes': texto_mes(mes),
+            'total_pedidos': bobinas,
+            'peso_total': float(peso) if peso else 0
+        }
+        for mes, bobinas, peso in rollup_pedidos.tendencia_mensual(conexion, mes_actual - 12, mes_actual + 1)
+    ]
+
+
+# El dashboard se sirve desde un snapshot que se recalcula cada cierto tiempo o tras escrituras
+snapshot_analitica = Snapshot(
+    calcular_analitica_predictiva,
+    intervalo=int(os.getenv('DASHBOARD_SNAPSHOT_INTERVALO', 300)),
+    espera=int(os.getenv('DASHBOARD_SNAPSHOT_ESPERA', 5)),
+    nombre='snapshot-analitica'
+)
+
+
+def predecir_demanda(tendencia_mensual, meses=6):
+    """Pronóstico de la demanda total de los próximos meses de calendario a partir de la tendencia mensual"""
+    # Mismos datos y mismo mes dan el mismo resultado: se calcula una vez y se reutiliza
+    mes_actual = indice_mes(datetime.now().year, datetime.now().month)
+    clave = ('demanda', mes_actual, meses, tuple((item['mes'], item['total_pedidos']) for item in tendencia_mensual))
+    return memo_pronosticos.obtener(clave, lambda: calcular_prediccion_demanda(tendencia_mensual, mes_actual, meses))
+
+
+def calcular_prediccion_demanda(tendencia_mensual, mes_actual, meses):
+    try:
+        # El mes en curso está incompleto: se ajusta hasta el último mes cerrado
+        historico = [
+            (None, indice_de_texto(item['mes']), item['total_pedidos'])
+            for item in tendencia_mensual
+            if indice_de_texto(item['mes']) < mes_actual
+        ]
+
+        if len(historico) < 2:
+            print("No hay suficientes datos históricos para predicción")
+            # Generar predicción básica si no hay suficientes datos
+            return generar_prediccion_basica(tendencia_mensual, mes_actual, meses)
+
+        # Serie continua: los meses sin pedidos cuentan como 0
+        desde = min(mes for _, mes, _ in historico)
+        _, Y = matriz_series(historico, desde, mes_actual)
+
+        # Se pronostica también el mes en curso para que las etiquetas empiecen en el siguiente
+        modelo, media, inferior, superior = pronosticar(Y, meses + 1)
+        media, inferior, superior = media[0, 1:], inferior[0, 1:], superior[0, 1:]
+
+        # Pendiente mensual del pronóstico
+        pendiente = (media[-1] - media[0]) / max(meses - 1, 1)
+        if pendiente > 0.5:
+            tendencia = 'creciente'
+        elif pendiente < -0.5:
+            tendencia = 'decreciente'
+        else:
+            tendencia = 'estable'
+
+        return [
+            {
+                'mes': texto_mes(mes_actual + i + 1),
+                'demanda_predicha': int(round(media[i])),
+                'inferior': int(round(inferior[i])),
+                'superior': int(round(superior[i])),
+                'tendencia': tendencia,
+                'modelo': modelo
+            }
+            for i in range(meses)
+        ]
+
+    except Exception as e:
+        print(f"Error en predicción ML: {str(e)}")
+        return generar_prediccion_basica(tendencia_mensual, mes_actual, meses)
+
+
+# Pronósticos ya calculados, reutilizados mientras no lleguen pedidos nuevos
+memo_pronosticos = MemoPronosticos()
+
+
+def marca_pedidos():
+    """Marca de agua de los pedidos: la fecha del último pedido, la cantidad de líneas de detalle y
+    la versión de REGISTROS, que cambia también al editar el tipo o el proveedor de una bobina pedida"""
+    # En la misma consulta; sin VERSIONES_TABLA la marca queda solo con los pedidos
+    version = ("(SELECT VERSION FROM VERSIONES_TABLA WHERE TABLA = 'REGISTROS')"
+               if versiones_tablas.disponible(db.session) else 'NULL')
+    ultimo, lineas, version = db.session.execute(text(
+        f"SELECT (SELECT MAX(FECHA_PEDIDO) FROM PEDIDO_CAB), (SELECT COUNT(*) FROM PEDIDO_DET), {version}"
+    )).fetchone()
+    return (ultimo.isoformat() if hasattr(ultimo, 'isoformat') else ultimo, lineas, version)
+
+
+# Pedidos por mes que se asumen cuando todavía no hay ningún pedido registrado
+DEMANDA_BASE = 50
+
+
+def generar_prediccion_basica(tendencia_mensual=(), mes_actual=None, meses=6):
+    """Predicción plana y determinista cuando no hay suficientes meses para ajustar un modelo"""
+    if mes_actual is None:
+        mes_actual = indice_mes(datetime.now().year, datetime.now().month)
+
+    # Promedio de los meses que existan; sin datos, la demanda base
+    totales = [item['total_pedidos'] for item in tendencia_mensual]
+    demanda_base = int(round(sum(totales) / len(totales))) if totales else DEMANDA_BASE
+
+    return [
+        {
+            'mes': texto_mes(mes_actual + i + 1),
+            'demanda_predicha': demanda_base,
+            'inferior': demanda_base,
+            'superior': demanda_base,
+            'tendencia': 'estable',
+            'modelo': 'base'
+        }
+        for i in range(meses)
+    ]
+
+
+def bobinas_antiguas_a_dicts(filas):
+    """Filas de indice_antiguedad.mas_antiguas con los nombres de catálogo y los días en inventario"""
+    bobinas = {f['ID_BOBI']: f['DESC_BOBI'] for f in cache_catalogos.filas('BOBINA')}
+    ubicaciones = {f['ID_UBI']: f['DESC_UBI'] for f in cache_catalogos.filas('UBICACION')}
+    estados = {f['ID_ESTADO']: f['DESC_ESTADO'] for f in cache_catalogos.filas('ESTADO')}
+    hoy = date.today()
+    return [
+        {
+            'id_registro': id_registro,
+            'bobina': bobinas.get(bobina),
+            'ubicacion': ubicaciones.get(ubicacion),
+            'fecha_ingreso': fecha.isoformat(),
+            'peso': peso or 0,
+            'estado': estados.get(ESTADO_DISPONIBLE),
+            'dias_inventario': (hoy - fecha.date()).days
+        }
+        for id_registro, fecha, bobina, ubicacion, peso in filas
+    ]
@@ -0,0 +1,156 @@
+import bisect
+import heapq
+import threading
+import time
+from datetime import date, datetime, timedelta
+from itertools import islice
+
+from sqlalchemy import bindparam, text
+
+from app.kpis import ESTADO_DISPONIBLE
+from app.lotes import en_lotes
+
+# Límite superior (en días, incluido) de cada tramo del histograma; el último tramo queda abierto
+TRAMOS_DIAS = (30, 60, 90, 180, 365)
+
+# Columnas cuya modificación cambia la posición de una bobina en el índice
+CAMPOS_ANTIGUEDAD = {'ESTADO_ID_ESTADO', 'FECHA_INGRESO_PLANTA', 'BOBINA_ID_BOBI', 'UBICACION_ID_UBI', 'PESO'}
+
+COLUMNAS = "ID_REGISTRO, ESTADO_ID_ESTADO, FECHA_INGRESO_PLANTA, BOBINA_ID_BOBI, UBICACION_ID_UBI, PESO"
+
+# Sin ORDER BY: cada grupo se ordena en memoria, que es más barato que ordenar todo en la BD
+CONSULTA_DISPONIBLES = text(f"SELECT {COLUMNAS} FROM REGISTROS WHERE ESTADO_ID_ESTADO = :estado")
+
+CONSULTA_REGISTROS = text(f"SELECT {COLUMNAS} FROM REGISTROS WHERE ID_REGISTRO IN :ids").bindparams(
+    bindparam('ids', expanding=True)
+)
+
+
+def _fecha(valor):
+    """FECHA_INGRESO_PLANTA como datetime (SQLite la devuelve como texto)"""
+    if isinstance(valor, str):
+        return datetime.fromisoformat(valor)
+    if isinstance(valor, date) and not isinstance(valor, datetime):
+        return datetime(valor.year, valor.month, valor.day)
+    return valor
+
+
+def _inicio_dia(dia):
+    return datetime(dia.year, dia.month, dia.day)
+
+
+def rangos_tramos():
+    """(etiqueta, desde_dias, hasta_dias) de cada tramo; hasta_dias es None en el último"""
+    desde = [0] + [limite + 1 for limite in TRAMOS_DIAS]
+    hasta = list(TRAMOS_DIAS) + [None]
+    return [
+        (f'{d}-{h}' if h is not None else f'>{d - 1}', d, h)
+        for d, h in zip(desde, hasta)
+    ]
+
+
+class IndiceAntiguedad:
+    """Bobinas disponibles ordenadas por fecha de ingreso, en una lista por (tipo de bobina, ubicación).
+    Las más antiguas salen de mezclar las cabezas de las listas y el histograma de búsquedas
+    binarias, sin ordenar REGISTROS en cada consulta. Las escrituras de este proceso se aplican
+    al momento; la recarga completa cada 'ttl' segundos recoge las de otros procesos."""
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._grupos = {}  # (bobina, ubicación) -> lista ordenada de (fecha, id)
+        self._por_id = {}  # id -> (grupo, fecha, peso)
+        self._cargado_en = None
+        self._lock = threading.Lock()
+
+    def mas_antiguas(self, session, limite, bobina=None, ubicacion=None):
+        """Hasta 'limite' bobinas [(id, fecha, bobina, ubicación, peso)], de la más antigua a la más nueva"""
+        with self._lock:
+            self._cargar(session)
+            listas = [lista for grupo, lista in self._grupos.items() if self._coincide(grupo, bobina, ubicacion)]
+            resultado = []
+            for fecha, id_registro in islice(heapq.merge(*listas), limite):
+                grupo, _, peso = self._por_id[id_registro]
+                resultado.append((id_registro, fecha, grupo[0], grupo[1], peso))
+            return resultado
+
+    def histograma(self, session, bobina=None, ubicacion=None, hoy=None):
+        """Cantidad de bobinas disponibles en cada tramo de rangos_tramos()"""
+        hoy = hoy or date.today()
+        # fecha < corte  <=>  más de 'limite' días en inventario (como DATEDIFF(DAY, fecha, hoy))
+        cortes = [(_inicio_dia(hoy - timedelta(days=limite)),) for limite in TRAMOS_DIAS]
+        total = 0
+        mayores = [0] * len(cortes)
+        with self._lock:
+            self._cargar(session)
+            for grupo, lista in self._grupos.items():
+                if self._coincide(grupo, bobina, ubicacion):
+                    total += len(lista)
+                    for i, corte in enumerate(cortes):
+                        mayores[i] += bisect.bisect_left(lista, corte)
+        limites = [total] + mayores + [0]
+        return [limites[i] - limites[i + 1] for i in range(len(limites) - 1)]
+
+    def actualizar(self, session, ids):
+        """Vuelve a leer los registros indicados tras un commit (alta, cambio de estado, de fecha o de ubicación)"""
+        if self._cargado_en is None or not ids:
+            return
+        ids = list(dict.fromkeys(ids))
+        filas = [fila for lote in en_lotes(ids) for fila in session.execute(CONSULTA_REGISTROS, {'ids': lote})]
+        with self._lock:
+            for id_registro in ids:
+                self._quitar(id_registro)
+            for fila in filas:
+                if fila[1] == ESTADO_DISPONIBLE:
+                    self._agregar(fila, mantener_orden=True)
+
+    def quitar(self, ids):
+        """Saca bobinas que dejaron de estar disponibles (despachadas en un pedido)"""
+        with self._lock:
+            for id_registro in ids:
+                self._quitar(id_registro)
+
+    def reconstruir(self, session):
+        with self._lock:
+            self._cargado_en = None
+            self._cargar(session)
+            return len(self._por_id)
+
+    def _cargar(self, session):
+        if self._cargado_en is not None and time.monotonic() - self._cargado_en <= self.ttl:
+            return
+        self._grupos = {}
+        self._por_id = {}
+        for fila in session.execute(CONSULTA_DISPONIBLES, {'estado': ESTADO_DISPONIBLE}):
+            self._agregar(fila, mantener_orden=False)
+        for lista in self._grupos.values():
+            lista.sort()
+        self._cargado_en = time.monotonic()
+
+    def _agregar(self, fila, mantener_orden):
+        id_registro, _, fecha, bobina, ubicacion, peso = fila
+        if fecha is None:
+            return
+        fecha = _fecha(fecha)
+        grupo = (bobina, ubicacion)
+        lista = self._grupos.setdefault(grupo, [])
+        if mantener_orden:
+            bisect.insort(lista, (fecha, id_registro))
+        else:
+            lista.append((fecha, id_registro))
+        self._por_id[id_registro] = (grupo, fecha, float(peso) if peso is not None else None)
+
+    def _quitar(self, id_registro):
+        actual = self._por_id.pop(id_registro, None)
+        if actual is None:
+            return
+        grupo, fecha, _ = actual
+        lista = self._grupos[grupo]
+        i = bisect.bisect_left(lista, (fecha, id_registro))
+        if i < len(lista) and lista[i] == (fecha, id_registro):
+            del lista[i]
+        if not lista:
+            del self._grupos[grupo]
+
+    @staticmethod
+    def _coincide(grupo, bobina, ubicacion):
+        return (bobina is None or grupo[0] == bobina) and (ubicacion is None or grupo[1] == ubicacion)
@@ -0,0 +1,283 @@
+import threading
+from collections import defaultdict
+
+from sqlalchemy import bindparam, text
+
+from app.lotes import MAX_PARAMETROS, en_lotes
+
+# Columnas propias de REGISTROS que se indexan por trigramas.
+# NOMBRE_PROV y DESC_BOBI se resuelven contra la cache de catálogos.
+CAMPOS_INDEXADOS = ['PEDIDO_COMPRA', 'COLADA', 'OBSERVACIONES', 'COD_BOBIN2']
+TAMANO_GRAMA = 3
+FILAS_POR_LOTE = 5000
+# Trigramas de un término que se buscan en el índice: cada uno es un parámetro de la consulta
+MAX_GRAMAS_CONSULTA = 8
+
+
+def gramas_texto(texto):
+    """Trigramas de un valor; el relleno final hace que todo carácter inicie un trigrama"""
+    if texto is None:
+        return set()
+    texto = str(texto).lower() + ' ' * (TAMANO_GRAMA - 1)
+    return {texto[i:i + TAMANO_GRAMA] for i in range(len(texto) - TAMANO_GRAMA + 1)}
+
+
+def gramas_termino(termino):
+    """Trigramas de un término de búsqueda (sin relleno, ya que puede aparecer en medio del texto)"""
+    return {termino[i:i + TAMANO_GRAMA] for i in range(len(termino) - TAMANO_GRAMA + 1)}
+
+
+def gramas_consulta(termino):
+    """Subconjunto acotado de los trigramas del término para consultar el índice.
+    Se toman sin solapar desde el principio más el último, así cubren todo el término con pocos parámetros"""
+    posiciones = list(range(0, len(termino) - TAMANO_GRAMA + 1, TAMANO_GRAMA))
+    posiciones.append(len(termino) - TAMANO_GRAMA)
+    gramas = list(dict.fromkeys(termino[i:i + TAMANO_GRAMA] for i in posiciones))
+    return gramas[:MAX_GRAMAS_CONSULTA - 1] + gramas[-1:] if len(gramas) > MAX_GRAMAS_CONSULTA else gramas
+
+
+def gramas_fila(fila):
+    gramas = set()
+    for campo in CAMPOS_INDEXADOS:
+        gramas |= gramas_texto(fila[campo])
+    gramas.discard(' ' * TAMANO_GRAMA)
+    return gramas
+
+
+def escapar_like(texto):
+    return texto.replace('[', '[[]').replace('%', '[%]').replace('_', '[_]')
+
+
+def marcadores(nombre, valores, params):
+    """'(:nombre0, :nombre1, ...)' para componer la condición dentro de una consulta en texto"""
+    claves = []
+    for i, valor in enumerate(valores):
+        params[f'{nombre}{i}'] = valor
+        claves.append(f':{nombre}{i}')
+    return '(' + ', '.join(claves) + ')'
+
+
+def consulta_campos(ids):
+    query = text(
+        f"SELECT ID_REGISTRO, {', '.join(CAMPOS_INDEXADOS)} FROM REGISTROS WHERE ID_REGISTRO IN :ids"
+    ).bindparams(bindparam('ids', expanding=True))
+    return query, {'ids': ids}
+
+
+class IndiceBusqueda:
+    """Base común: coincidencias en catálogos y condición SQL para los listados"""
+
+    def __init__(self, catalogos):
+        self.catalogos = catalogos
+
+    def condicion(self, session, termino, alias='r'):
+        """Condición que reduce REGISTROS a los candidatos del término, o None para usar solo LIKE.
+        Devuelve un superconjunto: el LIKE original se mantiene y descarta los falsos positivos."""
+        termino = (termino or '').strip().lower()
+        if not termino:
+            return None
+
+        params = {}
+        indice = self.condicion_indice(session, termino, alias, params)
+        if indice is None:
+            return None
+        partes = [indice]
+
+        # Proveedores y tipos de bobina cuyo nombre contiene el término (catálogos en memoria)
+        for columna, tabla, id_col, texto_col, nombre in (
+            ('PROVEEDOR_ID_PROV', 'PROVEEDOR', 'ID_PROV', 'NOMBRE_PROV', 'busqueda_proveedores'),
+            ('BOBINA_ID_BOBI', 'BOBINA', 'ID_BOBI', 'DESC_BOBI', 'busqueda_bobinas')
+        ):
+            ids = [
+                fila[id_col] for fila in self.catalogos.filas(tabla)
+                if termino in (fila[texto_col] or '').lower()
+            ]
+            if ids:
+                partes.append(f'{alias}.{columna} IN ' + marcadores(nombre, ids, params))
+
+        if len(params) > MAX_PARAMETROS:
+            # Demasiados proveedores o tipos de bobina coinciden: se deja solo el LIKE
+            return None
+        return '(' + ' OR '.join(partes) + ')', params
+
+    def condicion_indice(self, session, termino, alias, params):
+        raise NotImplementedError
+
+    def indexar(self, session, ids):
+        raise NotImplementedError
+
+    def reconstruir(self, session):
+        raise NotImplementedError
+
+
+class IndiceBusquedaSQL(IndiceBusqueda):
+    """Índice de trigramas en la tabla REGISTROS_BUSQUEDA (ver sql/02_registros_busqueda.sql)"""
+
+    def __init__(self, catalogos):
+        super().__init__(catalogos)
+        self._disponible = None
+
+    def disponible(self, session):
+        # Si la tabla todavía no se creó, se sigue buscando con LIKE
+        if self._disponible is None:
+            existe = session.execute(text("SELECT OBJECT_ID('REGISTROS_BUSQUEDA')")).scalar()
+            self._disponible = existe is not None
+            if not self._disponible:
+                print('⚠️  REGISTROS_BUSQUEDA no existe, la búsqueda usa LIKE')
+        return self._disponible
+
+    def condicion_indice(self, session, termino, alias, params):
+        if not self.disponible(session):
+            return None
+
+        if len(termino) >= TAMANO_GRAMA:
+            # Un registro candidato contiene todos los trigramas consultados; el LIKE confirma el resto
+            gramas = gramas_consulta(termino)
+            params['busqueda_n'] = len(gramas)
+            return (f"{alias}.ID_REGISTRO IN (SELECT g.ID_REGISTRO FROM REGISTROS_BUSQUEDA g "
+                    f"WHERE g.GRAMA IN {marcadores('busqueda_g', gramas, params)} "
+                    f"GROUP BY g.ID_REGISTRO HAVING COUNT(DISTINCT g.GRAMA) = :busqueda_n)")
+
+        # Términos cortos: cualquier trigrama que empiece por el término
+        params['busqueda_prefijo'] = escapar_like(termino) + '%'
+        return (f"{alias}.ID_REGISTRO IN (SELECT g.ID_REGISTRO FROM REGISTROS_BUSQUEDA g "
+                f"WHERE g.GRAMA LIKE :busqueda_prefijo)")
+
+    def indexar(self, session, ids):
+        """Regenera las entradas de los registros indicados dentro de la transacción en curso"""
+        if not ids or not self.disponible(session):
+            return
+        for lote in en_lotes(list(ids)):
+            query, params = consulta_campos(lote)
+            filas = session.execute(query, params).mappings().all()
+            session.execute(
+                text("DELETE FROM REGISTROS_BUSQUEDA WHERE ID_REGISTRO IN :ids").bindparams(bindparam('ids', expanding=True)),
+                {'ids': lote}
+            )
+            entradas = [
+                {'grama': grama, 'id_registro': fila['ID_REGISTRO']}
+                for fila in filas
+                for grama in gramas_fila(fila)
+            ]
+            if entradas:
+                session.execute(
+                    text("INSERT INTO REGISTROS_BUSQUEDA (GRAMA, ID_REGISTRO) VALUES (:grama, :id_registro)"),
+                    entradas
+                )
+
+    def reconstruir(self, session):
+        """Vacía y vuelve a poblar el índice recorriendo REGISTROS por lotes de ID"""
+        self._disponible = None
+        if not self.disponible(session):
+            return 0
+        session.execute(text("DELETE FROM REGISTROS_BUSQUEDA"))
+        total = 0
+        ultimo_id = 0
+        while True:
+            ids = session.execute(
+                text("SELECT ID_REGISTRO FROM REGISTROS WHERE ID_REGISTRO > :ultimo ORDER BY ID_REGISTRO OFFSET 0 ROWS FETCH NEXT :n ROWS ONLY"),
+                {'ultimo': ultimo_id, 'n': FILAS_POR_LOTE}
+            ).scalars().all()
+            if not ids:
+                return total
+            self.indexar(session, ids)
+            total += len(ids)
+            ultimo_id = ids[-1]
+
+
+class IndiceBusquedaMemoria(IndiceBusqueda):
+    """Sustituto local del índice (pruebas, SQLite): trigramas en diccionarios del proceso"""
+
+    def __init__(self, catalogos):
+        super().__init__(catalogos)
+        self._por_grama = defaultdict(set)
+        self._por_id = {}
+        self._cargado = False
+        self._lock = threading.Lock()
+
+    def buscar_ids(self, session, termino):
+        self._cargar(session)
+        termino = termino.lower()
+        with self._lock:
+            if len(termino) >= TAMANO_GRAMA:
+                # Se intersecta empezando por el trigrama menos frecuente
+                conjuntos = sorted((self._por_grama.get(g, set()) for g in gramas_termino(termino)), key=len)
+                return set.intersection(*conjuntos) if conjuntos else set()
+            return {
+                id_registro
+                for grama, ids in self._por_grama.items() if grama.startswith(termino)
+                for id_registro in ids
+            }
+
+    def condicion_indice(self, session, termino, alias, params):
+        ids = sorted(self.buscar_ids(session, termino))
+        if not ids:
+            return '1=0'
+        if len(ids) > MAX_PARAMETROS // 2:
+            # Demasiados candidatos para pasarlos como parámetros: se deja solo el LIKE
+            return None
+        return f'{alias}.ID_REGISTRO IN ' + marcadores('busqueda_id', ids, params)
+
+    def indexar(self, session, ids):
+        if not self._cargado or not ids:
+            return
+        for lote in en_lotes(list(ids)):
+            query, params = consulta_campos(lote)
+            filas = session.execute(query, params).mappings().all()
+            with self._lock:
+                for fila in filas:
+                    self._quitar(fila['ID_REGISTRO'])
+                    self._agregar(fila['ID_REGISTRO'], gramas_fila(fila))
+
+    def reconstruir(self, session):
+        with self._lock:
+            self._por_grama.clear()
+            self._por_id.clear()
+            filas = session.execute(
+                text(f"SELECT ID_REGISTRO, {', '.join(CAMPOS_INDEXADOS)} FROM REGISTROS")
+            ).mappings()
+            for fila in filas:
+                self._agregar(fila['ID_REGISTRO'], gramas_fila(fila))
+            self._cargado = True
+            return len(self._por_id)
+
+    def _cargar(self, session):
+        if not self._cargado:
+            self.reconstruir(session)
+
+    def _agregar(self, id_registro, gramas):
+        self._por_id[id_registro] = gramas
+        for grama in gramas:
+            self._por_grama[grama].add(id_registro)
+
+    def _quitar(self, id_registro):
+        for grama in self._por_id.pop(id_registro, ()):
+            ids = self._por_grama.get(grama)
+            if ids is not None:
+                ids.discard(id_registro)
+                if not ids:
+                    del self._por_grama[grama]
+
+
+class IndiceBusquedaLike(IndiceBusqueda):
+    """Sin índice: se conserva el comportamiento original con LIKE '%termino%'"""
+
+    def condicion(self, session, termino, alias='r'):
+        return None
+
+    def indexar(self, session, ids):
+        pass
+
+    def reconstruir(self, session):
+        return 0
+
+
+def crear_indice_busqueda(tipo, catalogos):
+    indices = {
+        'sql': IndiceBusquedaSQL,
+        'memoria': IndiceBusquedaMemoria,
+        'like': IndiceBusquedaLike
+    }
+    if tipo not in indices:
+        raise ValueError(f"BUSQUEDA_INDICE debe ser uno de: {', '.join(indices)}")
+    return indices[tipo](catalogos)
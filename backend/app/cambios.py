@@ -0,0 +1,40 @@
+from sqlalchemy import text
+
+from app.paginacion import CursorInvalido, codificar_cursor, decodificar_cursor
+
+# Cambios devueltos como máximo por petición en /api/registros/changes
+MAX_CAMBIOS = 5000
+
+
+def codificar_token(version):
+    return codificar_cursor(version)
+
+
+def decodificar_token(token):
+    """Versión de fila hasta la que el cliente ya tiene los cambios"""
+    version, = decodificar_cursor(token, 1)
+    if not isinstance(version, int) or isinstance(version, bool) or version < 0:
+        raise CursorInvalido('Token inválido')
+    return version
+
+
+class CambiosRegistros:
+    """Registros insertados o modificados después de una versión de fila (REGISTROS.VERSION_FILA,
+    ver sql/05_version_fila_registros.sql)"""
+
+    def __init__(self):
+        self._disponible = None
+
+    def disponible(self, conexion):
+        if self._disponible is None:
+            existe = conexion.execute(text("SELECT COL_LENGTH('REGISTROS', 'VERSION_FILA')")).scalar()
+            self._disponible = existe is not None
+            if not self._disponible:
+                print('⚠️  REGISTROS no tiene VERSION_FILA, /api/registros/changes no está disponible')
+        return self._disponible
+
+    def hasta(self, conexion):
+        """Primera versión que todavía puede pertenecer a una transacción abierta. Las menores ya
+        están confirmadas: leer solo hasta aquí evita saltarse una escritura que se confirme tarde
+        con una versión más baja que otra ya entregada."""
+        return conexion.execute(text("SELECT CONVERT(BIGINT, MIN_ACTIVE_ROWVERSION())")).scalar()
@@ -0,0 +1,96 @@
+import hashlib
+import threading
+import time
+
+from sqlalchemy import text
+
+# Tablas de referencia que se cargan completas en memoria
+CONSULTAS_CATALOGO = {
+    'BOBINA': "SELECT ID_BOBI, DESC_BOBI, LAM_BOBI, ESPESOR_BOBI, ANCHO_BOBI FROM BOBINA ORDER BY ID_BOBI",
+    'PROVEEDOR': "SELECT ID_PROV, NOMBRE_PROV FROM PROVEEDOR ORDER BY ID_PROV",
+    'BARCO': "SELECT ID_BARCO, NOMBRE_BARCO FROM BARCO ORDER BY ID_BARCO",
+    'UBICACION': "SELECT ID_UBI, DESC_UBI FROM UBICACION ORDER BY ID_UBI",
+    'ESTADO': "SELECT ID_ESTADO, DESC_ESTADO FROM ESTADO ORDER BY ID_ESTADO",
+    'MOLINO': "SELECT ID_MOLINO, NOMBRE_MOLINO, PROCEDENCIA_ID_PROCED FROM MOLINO ORDER BY ID_MOLINO",
+    'PROCEDENCIA': "SELECT ID_PROCED, DESC_PROCED FROM PROCEDENCIA ORDER BY ID_PROCED"
+}
+
+
+class CacheCatalogos:
+    """Copia en memoria de las tablas de catálogo. Cada 'intervalo' segundos se comparan las
+    versiones de VERSIONES_TABLA (ver app/versiones.py) y se recargan las tablas que cambiaron,
+    también las que modificó otro worker; el ETag se arma con esas versiones, así todos los
+    procesos responden el mismo. Sin VERSIONES_TABLA las tablas se recargan cada 'intervalo' y el
+    ETag resume su contenido."""
+
+    def __init__(self, db, versiones=None, intervalo=5):
+        self.db = db
+        self.versiones = versiones  # VersionesTablas
+        self.intervalo = intervalo
+        self._filas = {}
+        self._resumenes = {}
+        # {tabla: versión} de las filas en memoria; None si no hay VERSIONES_TABLA
+        self._versiones = {}
+        self._comprobado_en = None
+        self._lock = threading.Lock()
+
+    def filas(self, tabla):
+        """Filas de la tabla como tupla de dicts con las columnas en mayúsculas"""
+        self._comprobar()
+        filas = self._filas.get(tabla)
+        if filas is not None:
+            return filas
+
+        with self._lock:
+            filas = self._filas.get(tabla)
+            if filas is None:
+                result = self.db.session.execute(text(CONSULTAS_CATALOGO[tabla]))
+                columnas = list(result.keys())
+                filas = tuple(dict(zip(columnas, row)) for row in result)
+                self._resumenes[tabla] = hashlib.sha1(repr(filas).encode('utf-8')).hexdigest()[:12]
+                self._filas[tabla] = filas
+            return filas
+
+    def etag(self, *tablas):
+        """ETag que cambia cuando cambia cualquiera de las tablas indicadas"""
+        # Se toma antes de leer los datos: una recarga posterior trae datos iguales o más nuevos
+        self._comprobar()
+        versiones = self._versiones
+        if versiones is not None:
+            return 'cat-v-' + '.'.join(str(versiones.get(tabla, 0)) for tabla in tablas)
+        for tabla in tablas:
+            self.filas(tabla)
+        return 'cat-' + '.'.join(self._resumenes[tabla] for tabla in tablas)
+
+    def invalidar(self, tabla):
+        """Descarta la tabla tras una escritura de este proceso y fuerza a releer las versiones"""
+        with self._lock:
+            self._filas.pop(tabla, None)
+            self._comprobado_en = None
+
+    def _comprobar(self):
+        comprobado_en = self._comprobado_en
+        if comprobado_en is not None and time.monotonic() - comprobado_en <= self.intervalo:
+            return
+        with self._lock:
+            if self._comprobado_en is not None and time.monotonic() - self._comprobado_en <= self.intervalo:
+                return
+            try:
+                versiones = self.versiones.de(CONSULTAS_CATALOGO) if self.versiones is not None else None
+            except Exception as e:
+                # Se sigue con las filas en memoria y se reintenta en el próximo intervalo. Sin rollback:
+                # la lectura puede ir dentro de la transacción de una importación o edición
+                print('Error leyendo versiones de catálogos:', str(e))
+                self._comprobado_en = time.monotonic()
+                return
+
+            if versiones is None:
+                self._filas.clear()
+                self._versiones = None
+            else:
+                anteriores = self._versiones or {}
+                self._versiones = {tabla: versiones.get(tabla, 0) for tabla in CONSULTAS_CATALOGO}
+                for tabla, version in self._versiones.items():
+                    if anteriores.get(tabla) != version:
+                        self._filas.pop(tabla, None)
+            self._comprobado_en = time.monotonic()
@@ -0,0 +1,26 @@
+import click
+from flask.cli import with_appcontext
+
+from app.database import db
+from app.servicios import indice_busqueda, rollup_pedidos
+
+
+@click.command('reconstruir-busqueda')
+@with_appcontext
+def reconstruir_busqueda():
+    """Vuelve a poblar el índice de búsqueda a partir de REGISTROS"""
+    total = indice_busqueda.reconstruir(db.session)
+    db.session.commit()
+    print(f'✅ Índice de búsqueda reconstruido: {total} registros')
+
+
+@click.command('reconstruir-rollups')
+@with_appcontext
+def reconstruir_rollups():
+    """Recalcula ROLLUP_PEDIDOS_MES a partir de los pedidos"""
+    total = rollup_pedidos.reconstruir(db.session)
+    db.session.commit()
+    print(f'✅ Rollup de pedidos reconstruido: {total} filas mensuales')
+
+
+COMANDOS = (reconstruir_busqueda, reconstruir_rollups)
@@ -0,0 +1,83 @@
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as TiempoAgotado
+
+_executor = None
+_lock = threading.Lock()
+
+
+def executor():
+    """Hilos compartidos por todas las consultas en paralelo del proceso (se crean en el primer uso)"""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv('CONSULTAS_PARALELAS_HILOS', 8)),
+                    thread_name_prefix='consultas'
+                )
+    return _executor
+
+
+def _descartar_executor():
+    # Los hilos no sobreviven a un fork: el proceso hijo crea los suyos en el primer uso
+    global _executor, _lock
+    _executor = None
+    _lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_descartar_executor)
+
+
+def _limitar_tiempo(conexion, segundos):
+    # pyodbc cancela la sentencia en el servidor al vencer Connection.timeout;
+    # otros drivers no lo exponen y solo queda el límite de espera del lado de Python
+    driver = conexion.connection.driver_connection
+    if hasattr(driver, 'timeout'):
+        anterior = driver.timeout
+        driver.timeout = int(segundos)
+        return lambda: setattr(driver, 'timeout', anterior)
+    return lambda: None
+
+
+def _ejecutar(engine, tarea, timeout):
+    with engine.connect() as conexion:
+        restaurar = _limitar_tiempo(conexion, timeout)
+        try:
+            return tarea(conexion)
+        finally:
+            restaurar()
+
+
+class ConsultasParalelas:
+    """Ejecuta consultas de solo lectura independientes al mismo tiempo, cada una con su
+    propia conexión del pool. Una consulta lenta o con error solo afecta a su resultado."""
+
+    def __init__(self, engine, timeout=10):
+        self.engine = engine
+        self.timeout = timeout
+        self._futuros = {}
+        self._inicio = time.monotonic()
+
+    def agregar(self, nombre, tarea):
+        """tarea(conexion) -> resultado; se lanza de inmediato"""
+        # En una copia del contexto, para que las métricas asignen la consulta a la petición que la lanzó
+        self._futuros[nombre] = executor().submit(contextvars.copy_context().run, _ejecutar, self.engine, tarea, self.timeout)
+
+    def resultados(self):
+        """Espera hasta el timeout contado desde la creación; devuelve (resultados, errores)"""
+        limite = self._inicio + self.timeout
+        resultados = {}
+        errores = {}
+        for nombre, futuro in self._futuros.items():
+            try:
+                resultados[nombre] = futuro.result(timeout=max(limite - time.monotonic(), 0))
+            except TiempoAgotado:
+                futuro.cancel()
+                errores[nombre] = f'Tiempo de espera agotado ({self.timeout} s)'
+            except Exception as e:
+                errores[nombre] = str(e)
+        return resultados, errores
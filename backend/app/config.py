@@ -1,25 +1,67 @@
 import os
 from dotenv import load_dotenv
 
+from app.pool import PoolMedido
+
 load_dotenv()
 
+
+def entero_env(nombre, defecto):
+    return int(os.getenv(nombre, defecto))
+
+
+def booleano_env(nombre, defecto):
+    return os.getenv(nombre, str(defecto)).lower() in ('1', 'true', 'si')
+
+
+def opciones_motor(uri, pool_size, max_overflow, pool_timeout, pool_recycle):
+    """SQLALCHEMY_ENGINE_OPTIONS: los valores del entorno (DB_POOL_*) pisan los de cada configuración.
+    El pool es por proceso: con N workers la BD puede ver N * (pool_size + max_overflow) conexiones."""
+    opciones = {
+        'poolclass': PoolMedido,
+        'pool_size': entero_env('DB_POOL_SIZE', pool_size),
+        'max_overflow': entero_env('DB_MAX_OVERFLOW', max_overflow),
+        'pool_timeout': entero_env('DB_POOL_TIMEOUT', pool_timeout),
+        # Se reciclan antes de que el servidor o un firewall corten las conexiones ociosas
+        'pool_recycle': entero_env('DB_POOL_RECYCLE', pool_recycle),
+        'pool_pre_ping': booleano_env('DB_POOL_PRE_PING', True)
+    }
+    if uri.startswith('mssql+pyodbc'):
+        # Envía los executemany (importaciones, índice de búsqueda) en un solo viaje
+        opciones['fast_executemany'] = booleano_env('DB_FAST_EXECUTEMANY', True)
+    return opciones
+
+
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key')
-    
+
     # SQL Server Configuration para bd_bobinas
     DB_SERVER = os.getenv('DB_SERVER', 'localhost')
     DB_DATABASE = os.getenv('DB_DATABASE', 'bd_bobxnas')
     DB_USERNAME = os.getenv('DB_USERNAME', '')
     DB_PASSWORD = os.getenv('DB_PASSWORD', '')
     DB_DRIVER = os.getenv('DB_DRIVER', 'ODBC Driver 17 for SQL Server')
-    
-    SQLALCHEMY_DATABASE_URI = f"mssql+pyodbc://{DB_USERNAME}:{DB_PASSWORD}@{DB_SERVER}/{DB_DATABASE}?driver={DB_DRIVER}"
+
+    # DATABASE_URL permite apuntar a otra BD (pruebas, benchmarks) sin tocar las variables DB_*
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL') or f"mssql+pyodbc://{DB_USERNAME}:{DB_PASSWORD}@{DB_SERVER}/{DB_DATABASE}?driver={DB_DRIVER}"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = opciones_motor(SQLALCHEMY_DATABASE_URI, pool_size=5, max_overflow=10,
+                                               pool_timeout=30, pool_recycle=1800)
 
 class DevelopmentConfig(Config):
     DEBUG = True
+    # Servidor de desarrollo: pocas conexiones bastan
+    SQLALCHEMY_ENGINE_OPTIONS = opciones_motor(Config.SQLALCHEMY_DATABASE_URI, pool_size=2, max_overflow=5,
+                                               pool_timeout=30, pool_recycle=1800)
+
+class ProductionConfig(Config):
+    DEBUG = False
+    # Falla rápido si el pool se agota en vez de encolar peticiones durante 30 s
+    SQLALCHEMY_ENGINE_OPTIONS = opciones_motor(Config.SQLALCHEMY_DATABASE_URI, pool_size=10, max_overflow=20,
+                                               pool_timeout=10, pool_recycle=1800)
 
 config = {
     'development': DevelopmentConfig,
+    'production': ProductionConfig,
     'default': DevelopmentConfig
-}
\ No newline at end of file
+}
@@ -0,0 +1,65 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+MODOS_CONTEO = ('exact', 'approx', 'none')
+
+
+class CacheConteos:
+    """Totales aproximados de los listados paginados, refrescados en segundo plano"""
+
+    def __init__(self, ttl=60, max_claves=256):
+        self.ttl = ttl
+        self.max_claves = max_claves
+        self._totales = OrderedDict()  # clave -> (total, momento del cálculo)
+        self._refrescando = set()
+        # Cambia con cada invalidar(): un refresco iniciado antes no guarda un total ya viejo
+        self._generacion = 0
+        self._lock = threading.Lock()
+
+    def obtener(self, clave, calcular):
+        """Devuelve el total cacheado; si está vencido lo sirve igual y lo recalcula aparte"""
+        with self._lock:
+            entrada = self._totales.get(clave)
+            if entrada is not None:
+                self._totales.move_to_end(clave)
+                total, calculado = entrada
+                if time.monotonic() - calculado > self.ttl and clave not in self._refrescando:
+                    self._refrescando.add(clave)
+                    app = current_app._get_current_object()
+                    threading.Thread(target=self._refrescar, args=(app, clave, calcular), daemon=True).start()
+                return total
+
+        # Primera vez que se pide esta combinación de filtros: se calcula en línea
+        generacion = self._generacion
+        total = calcular()
+        self._guardar(clave, total, generacion)
+        return total
+
+    def invalidar(self):
+        """Descarta los totales; se llama después de confirmar escrituras en REGISTROS o PEDIDO_DET"""
+        with self._lock:
+            self._totales.clear()
+            self._generacion += 1
+
+    def _refrescar(self, app, clave, calcular):
+        generacion = self._generacion
+        try:
+            with app.app_context():
+                self._guardar(clave, calcular(), generacion)
+        except Exception as e:
+            print(f'Error refrescando conteo {clave}:', str(e))
+        finally:
+            with self._lock:
+                self._refrescando.discard(clave)
+
+    def _guardar(self, clave, total, generacion):
+        with self._lock:
+            if generacion != self._generacion:
+                return
+            self._totales[clave] = (total, time.monotonic())
+            self._totales.move_to_end(clave)
+            while len(self._totales) > self.max_claves:
+                self._totales.popitem(last=False)
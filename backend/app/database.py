@@ -1,15 +1,4 @@
 from flask_sqlalchemy import SQLAlchemy
 
+# create_app() la asocia con db.init_app(app); el motor no abre conexiones hasta la primera consulta
 db = SQLAlchemy()
-
-def init_db(app):
-    db.init_app(app)
-    
-    # Opcional: Crear tablas si no existen (para desarrollo)
-    with app.app_context():
-        try:
-            # Esto intentará crear las tablas basadas en los modelos
-            # Por ahora no hacemos nada, solo inicializamos la conexión
-            print("✅ Base de datos inicializada correctamente")
-        except Exception as e:
-            print(f"⚠️  Nota: {e}")
\ No newline at end of file
@@ -0,0 +1,87 @@
+from sqlalchemy import bindparam, text
+
+from app.lotes import en_lotes
+from app.registros import CAMPOS_DB, CAMPOS_EDITABLES, convertir_campos, validar_catalogos
+
+# Ediciones aceptadas por petición en PATCH /api/registros
+MAX_EDICIONES = 5000
+
+CONSULTA_EXISTENTES = text("SELECT ID_REGISTRO FROM REGISTROS WHERE ID_REGISTRO IN :ids").bindparams(
+    bindparam('ids', expanding=True)
+)
+
+
+class EditorRegistros:
+    """Valida ediciones {id, campos} de REGISTROS y las aplica dentro de la transacción de la sesión:
+    un UPDATE con executemany por cada conjunto distinto de campos"""
+
+    def __init__(self, session, catalogos):
+        self.session = session
+        self.catalogos = catalogos
+        # Un resultado por edición, en el orden recibido
+        self.resultados = []
+        self.actualizados = []
+        self.campos_modificados = set()
+        # Ediciones válidas agrupadas por el conjunto de campos que modifican
+        self._pendientes = {}
+        self._ids = set()
+        self._ids_catalogo = {}
+
+    @property
+    def errores(self):
+        return [resultado for resultado in self.resultados if not resultado['success']]
+
+    def agregar(self, edicion):
+        resultado = {'id': edicion.get('id') if isinstance(edicion, dict) else None, 'success': False}
+        self.resultados.append(resultado)
+
+        try:
+            if not isinstance(edicion, dict):
+                raise ValueError('La edición no es un objeto válido')
+            id_registro = edicion.get('id')
+            if not isinstance(id_registro, int) or isinstance(id_registro, bool):
+                raise ValueError('id debe ser un entero')
+            if id_registro in self._ids:
+                raise ValueError('id repetido en la petición')
+            campos = edicion.get('campos')
+            if not isinstance(campos, dict):
+                raise ValueError('campos debe ser un objeto')
+            no_editables = sorted(campo for campo in campos if campo not in CAMPOS_EDITABLES)
+            if no_editables:
+                raise ValueError(f"campos no editables: {', '.join(no_editables)}")
+            datos = convertir_campos({campo: valor for campo, valor in campos.items() if valor is not None})
+            if not datos:
+                raise ValueError('No se proporcionaron campos para actualizar')
+            validar_catalogos(datos, self.catalogos, self._ids_catalogo)
+        except ValueError as e:
+            resultado['error'] = str(e)
+            return
+
+        self._ids.add(id_registro)
+        clave = tuple(campo for campo in CAMPOS_EDITABLES if campo in datos)
+        self._pendientes.setdefault(clave, []).append((resultado, id_registro, datos))
+
+    def finalizar(self):
+        ids = [id_registro for ediciones in self._pendientes.values() for _, id_registro, _ in ediciones]
+        existentes = set()
+        for lote in en_lotes(ids):
+            existentes.update(self.session.execute(CONSULTA_EXISTENTES, {'ids': lote}).scalars())
+
+        for clave, ediciones in self._pendientes.items():
+            params = []
+            for resultado, id_registro, datos in ediciones:
+                if id_registro not in existentes:
+                    resultado['error'] = 'Registro no encontrado'
+                    continue
+                params.append({'id_registro': id_registro, **datos})
+                resultado['success'] = True
+                self.actualizados.append(id_registro)
+            if not params:
+                continue
+
+            asignaciones = ', '.join(f'{CAMPOS_DB[campo]} = :{campo}' for campo in clave)
+            query = f"UPDATE REGISTROS SET {asignaciones} WHERE ID_REGISTRO = :id_registro"
+            # Una lista de parámetros se ejecuta como executemany (fast_executemany en SQL Server)
+            self.session.execute(text(query), params)
+            self.campos_modificados.update(CAMPOS_DB[campo] for campo in clave)
+        self._pendientes.clear()
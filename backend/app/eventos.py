@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+from collections import deque
+
+from flask import current_app
+
+from app.serializacion import codificar_json
+
+# IDs de registros que viajan en un evento; más que eso se avisa solo la cantidad
+MAX_IDS_EVENTO = 1000
+
+
+def ids_evento(ids):
+    ids = list(ids)
+    return {'ids': ids if len(ids) <= MAX_IDS_EVENTO else None, 'cantidad': len(ids)}
+
+
+def formato_sse(id_evento, tipo, datos):
+    return f'id: {id_evento}\nevent: {tipo}\ndata: {datos}\n\n'
+
+
+class BusEventos:
+    """Eventos de escrituras confirmadas para /api/eventos, en memoria del proceso. Las rutas
+    publican después del commit; las escrituras de otros procesos (otros workers, cargas fuera de
+    la API) se detectan leyendo las versiones de tabla cada 'intervalo' segundos mientras haya
+    clientes conectados, y llegan como un evento 'tablas' (que también lista las tablas que cambió
+    este proceso, porque las versiones no distinguen quién escribió)."""
+
+    def __init__(self, leer_versiones=None, intervalo=5, historial=256, max_clientes=2):
+        self.leer_versiones = leer_versiones  # () -> {tabla: versión} o None
+        self.intervalo = intervalo
+        self.historial = historial
+        self.max_clientes = max_clientes
+        self._condicion = threading.Condition()
+        self._pid = None
+
+    def publicar(self, tipo, datos):
+        datos = codificar_json(datos).decode('utf-8')
+        with self._condicion:
+            self._reiniciar_si_fork()
+            self._eventos.append((self._siguiente, tipo, datos))
+            self._siguiente += 1
+            self._condicion.notify_all()
+
+    def entrar(self):
+        """Registra un cliente; False si el proceso ya tiene max_clientes conectados"""
+        with self._condicion:
+            self._reiniciar_si_fork()
+            if self._clientes >= self.max_clientes:
+                return False
+            self._clientes += 1
+            if self._hilo is None and self.leer_versiones is not None and self.intervalo > 0:
+                # El hilo lee con la aplicación de la petición que lo arrancó y termina sin clientes
+                app = current_app._get_current_object()
+                self._hilo = threading.Thread(target=self._vigilar, args=(app,), name='bus-eventos', daemon=True)
+                self._hilo.start()
+            return True
+
+    def salir(self):
+        with self._condicion:
+            self._clientes -= 1
+
+    def ultimo(self):
+        """ID con el que un cliente nuevo empieza a recibir solo los eventos siguientes"""
+        with self._condicion:
+            self._reiniciar_si_fork()
+            return f'{self._origen}-{self._siguiente - 1}'
+
+    def esperar(self, ultimo_id, espera):
+        """(eventos posteriores a ultimo_id, completo). Espera hasta 'espera' segundos si no hay
+        ninguno; completo es False si ultimo_id es de otro proceso o ya salió del historial, y
+        entonces el cliente debe recargar sus datos."""
+        with self._condicion:
+            self._reiniciar_si_fork()
+            origen, _, numero = (ultimo_id or '').rpartition('-')
+            if origen != self._origen or not numero.isdigit() or int(numero) >= self._siguiente:
+                return [], False
+            numero = int(numero)
+            self._condicion.wait_for(lambda: self._siguiente - 1 > numero, timeout=espera)
+            if self._eventos and numero < self._eventos[0][0] - 1:
+                return [], False
+            eventos = [
+                (f'{self._origen}-{n}', tipo, datos) for n, tipo, datos in self._eventos if n > numero
+            ]
+            return eventos, True
+
+    def _reiniciar_si_fork(self):
+        # Con gunicorn --preload el bus se crea en el maestro: cada worker empieza su propio historial
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._origen = f'{self._pid:x}{time.time_ns():x}'
+        self._eventos = deque(maxlen=self.historial)
+        self._siguiente = 1
+        self._clientes = 0
+        self._hilo = None
+
+    def _vigilar(self, app):
+        anteriores = None
+        while True:
+            with self._condicion:
+                if self._clientes <= 0:
+                    self._hilo = None
+                    return
+            try:
+                with app.app_context():
+                    versiones = self.leer_versiones()
+            except Exception as e:
+                # Se reintenta en el próximo intervalo; mientras tanto llegan los eventos de este proceso
+                print('Error leyendo versiones para eventos:', str(e))
+                time.sleep(self.intervalo)
+                continue
+            if versiones is None:
+                # Sin VERSIONES_TABLA solo se emiten los eventos de este proceso
+                with self._condicion:
+                    self._hilo = None
+                return
+            if anteriores is not None:
+                cambiadas = sorted(tabla for tabla, version in versiones.items() if anteriores.get(tabla) != version)
+                if cambiadas:
+                    self.publicar('tablas', {'tablas': cambiadas})
+            anteriores = versiones
+            time.sleep(self.intervalo)
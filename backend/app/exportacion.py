@@ -0,0 +1,51 @@
+import csv
+import io
+import json
+from decimal import Decimal
+
+# Filas que se leen de la BD y se escriben por cada trozo de la respuesta
+FILAS_POR_TROZO = 1000
+
+FORMATOS_EXPORTACION = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson'
+}
+
+
+def valor_exportable(valor):
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    return valor
+
+
+def exportar_resultado(engine, query, params, formato):
+    """Genera la exportación por trozos con una conexión propia y lectura en streaming"""
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=FILAS_POR_TROZO).execute(query, params)
+        columnas = [columna.lower() for columna in result.keys()]
+
+        if formato == 'csv':
+            buffer = io.StringIO()
+            escritor = csv.writer(buffer)
+            # BOM para que Excel reconozca el UTF-8
+            buffer.write('\ufeff')
+            escritor.writerow(columnas)
+            yield buffer.getvalue().encode('utf-8')
+
+            for filas in result.partitions(FILAS_POR_TROZO):
+                buffer.seek(0)
+                buffer.truncate()
+                escritor.writerows(
+                    ['' if valor is None else valor_exportable(valor) for valor in fila]
+                    for fila in filas
+                )
+                yield buffer.getvalue().encode('utf-8')
+        else:
+            for filas in result.partitions(FILAS_POR_TROZO):
+                trozo = ''.join(
+                    json.dumps(dict(zip(columnas, map(valor_exportable, fila))), ensure_ascii=False) + '\n'
+                    for fila in filas
+                )
+                yield trozo.encode('utf-8')
@@ -0,0 +1,240 @@
+import csv
+import io
+import itertools
+import json
+
+from sqlalchemy import text
+
+from app.lotes import MAX_PARAMETROS
+from app.registros import (CAMPOS_DB, campos_con_valor, completar_obligatorios,
+                           convertir_campos, validar_catalogos)
+
+# SQL Server acepta como máximo 1000 filas en un constructor VALUES
+MAX_FILAS_VALUES = 1000
+
+# Caracteres que se leen por vez del arreglo JSON, y tamaño máximo de uno de sus elementos
+BLOQUE_JSON = 64 * 1024
+MAX_CARACTERES_ELEMENTO_JSON = 1024 * 1024
+
+
+def normalizar_encabezado(nombre):
+    """'Peso', 'PESO' o ' peso ' se leen como 'peso'"""
+    return str(nombre or '').strip().lower().replace(' ', '_')
+
+
+def leer_filas(request):
+    """Elige el lector según el archivo o el Content-Type; cada lector entrega (numero_fila, dict)"""
+    archivo = request.files.get('archivo')
+    if archivo is not None:
+        nombre = (archivo.filename or '').lower()
+        if nombre.endswith('.xlsx'):
+            return leer_xlsx(archivo.stream)
+        if nombre.endswith('.csv') or nombre.endswith('.txt'):
+            return leer_csv(archivo.stream)
+        raise ValueError('Formato de archivo no soportado (use .csv o .xlsx)')
+
+    if request.mimetype == 'text/csv':
+        return leer_csv(request.stream)
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        return leer_ndjson(request.stream)
+    if request.mimetype == 'application/json':
+        return leer_arreglo_json(request.stream)
+
+    raise ValueError('Envíe un archivo en el campo "archivo", text/csv, application/x-ndjson o un arreglo JSON')
+
+
+def leer_csv(stream):
+    """Lee un CSV línea a línea; el número de fila es la línea del archivo"""
+    if not hasattr(stream, 'read1'):
+        stream = io.BufferedReader(stream)
+    texto = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    try:
+        primera = texto.readline()
+        if not primera:
+            return
+        # Excel en español exporta con ';' como separador
+        separador = ';' if primera.count(';') > primera.count(',') else ','
+        lector = csv.reader(itertools.chain([primera], texto), delimiter=separador)
+        encabezados = [normalizar_encabezado(c) for c in next(lector)]
+        for valores in lector:
+            if not any(v.strip() for v in valores):
+                continue
+            yield lector.line_num, dict(zip(encabezados, valores))
+    finally:
+        # No cerrar el stream de la petición al descartar el wrapper
+        texto.detach()
+
+
+def leer_xlsx(stream):
+    """Lee la hoja activa en modo solo lectura, que no carga el libro completo en memoria"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError('Se requiere el paquete openpyxl para importar archivos .xlsx')
+
+    libro = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        encabezados = [normalizar_encabezado(c) for c in next(filas, ())]
+        for numero, valores in enumerate(filas, start=2):
+            if all(v is None or str(v).strip() == '' for v in valores):
+                continue
+            yield numero, dict(zip(encabezados, valores))
+    finally:
+        libro.close()
+
+
+def leer_arreglo_json(stream):
+    """Lee un arreglo JSON elemento a elemento: en memoria queda solo el bloque que se está leyendo.
+    El número de fila es la posición del elemento en el arreglo, desde 1."""
+    if not hasattr(stream, 'read1'):
+        stream = io.BufferedReader(stream)
+    texto = io.TextIOWrapper(stream, encoding='utf-8-sig')
+    decodificador = json.JSONDecoder()
+    try:
+        buffer = ''
+        posicion = 0
+        completo = False
+
+        def leer_mas():
+            nonlocal buffer, posicion, completo
+            bloque = texto.read(BLOQUE_JSON)
+            buffer = buffer[posicion:] + bloque
+            posicion = 0
+            completo = not bloque
+
+        def siguiente_caracter():
+            # Primer carácter que no es espacio, sin consumirlo; '' al final del cuerpo
+            nonlocal posicion
+            while True:
+                while posicion < len(buffer) and buffer[posicion].isspace():
+                    posicion += 1
+                if posicion < len(buffer) or completo:
+                    return buffer[posicion:posicion + 1]
+                leer_mas()
+
+        if siguiente_caracter() != '[':
+            raise ValueError('Se esperaba un arreglo JSON de registros')
+        posicion += 1
+        if siguiente_caracter() == ']':
+            return
+
+        numero = 0
+        while True:
+            numero += 1
+            siguiente_caracter()
+            try:
+                elemento, fin = decodificador.raw_decode(buffer, posicion)
+                # Un número al final del bloque puede seguir en el próximo
+                incompleto = fin == len(buffer) and not completo
+            except ValueError:
+                elemento, fin, incompleto = None, None, not completo
+            if incompleto:
+                if len(buffer) - posicion > MAX_CARACTERES_ELEMENTO_JSON:
+                    raise ValueError(f'Fila {numero}: el elemento del arreglo JSON es demasiado grande')
+                leer_mas()
+                numero -= 1
+                continue
+            if fin is None:
+                raise ValueError(f'Fila {numero}: JSON inválido')
+            posicion = fin
+            yield numero, elemento
+
+            separador = siguiente_caracter()
+            posicion += 1
+            if separador == ']':
+                return
+            if separador != ',':
+                raise ValueError(f'Fila {numero}: se esperaba "," o "]" después del elemento')
+    finally:
+        # No cerrar el stream de la petición al descartar el wrapper
+        texto.detach()
+
+
+def leer_ndjson(stream):
+    """Un objeto JSON por línea"""
+    for numero, linea in enumerate(stream, start=1):
+        if not linea.strip():
+            continue
+        try:
+            yield numero, json.loads(linea)
+        except ValueError:
+            yield numero, None
+
+
+class ImportadorRegistros:
+    """Valida filas de REGISTROS y las inserta por lotes dentro de la transacción de la sesión"""
+
+    def __init__(self, session, catalogos, valores_por_defecto=None):
+        self.session = session
+        self.catalogos = catalogos
+        self.valores_por_defecto = valores_por_defecto or {}
+        self.procesadas = 0
+        self.ids = []
+        self.errores = []
+        # Filas válidas agrupadas por el conjunto de columnas que traen valor
+        self._pendientes = {}
+        self._ids_catalogo = {}
+
+    def agregar(self, numero, fila):
+        self.procesadas += 1
+        if not isinstance(fila, dict):
+            self.errores.append({'fila': numero, 'error': 'La fila no es un objeto válido'})
+            return
+
+        try:
+            datos = dict(self.valores_por_defecto)
+            datos.update(campos_con_valor({normalizar_encabezado(k): v for k, v in fila.items()}))
+            datos = convertir_campos(datos)
+            # Los obligatorios se completan después de convertir para que una celda
+            # vacía reciba el valor por defecto igual que en crear_registro
+            datos = convertir_campos(completar_obligatorios(datos))
+            validar_catalogos(datos, self.catalogos, self._ids_catalogo)
+        except ValueError as e:
+            self.errores.append({'fila': numero, 'error': str(e)})
+            return
+
+        clave = tuple(campo for campo in CAMPOS_DB if campo in datos)
+        pendientes = self._pendientes.setdefault(clave, [])
+        pendientes.append((numero, datos))
+        if len(pendientes) >= self._tamano_lote(clave):
+            self._insertar(clave)
+
+    def finalizar(self):
+        for clave in list(self._pendientes):
+            self._insertar(clave)
+        self.ids.sort(key=lambda item: item['fila'])
+
+    def _tamano_lote(self, clave):
+        # Un parámetro por columna más el número de fila
+        return min(MAX_FILAS_VALUES, MAX_PARAMETROS // (len(clave) + 1))
+
+    def _insertar(self, clave):
+        filas = self._pendientes.pop(clave, None)
+        if not filas:
+            return
+
+        columnas = [CAMPOS_DB[campo] for campo in clave]
+        valores = []
+        params = {}
+        for i, (numero, datos) in enumerate(filas):
+            params[f'f{i}'] = numero
+            marcadores = [f':f{i}']
+            for j, campo in enumerate(clave):
+                params[f'v{i}_{j}'] = datos[campo]
+                marcadores.append(f':v{i}_{j}')
+            valores.append(f"({', '.join(marcadores)})")
+
+        # MERGE con ON 1 = 0 inserta todas las filas y, a diferencia de INSERT ... OUTPUT,
+        # permite devolver el número de fila de origen junto a cada ID generado
+        query = f"""
+        MERGE INTO REGISTROS AS destino
+        USING (VALUES {', '.join(valores)}) AS origen (FILA, {', '.join(columnas)})
+        ON 1 = 0
+        WHEN NOT MATCHED THEN
+            INSERT ({', '.join(columnas)})
+            VALUES ({', '.join('origen.' + columna for columna in columnas)})
+        OUTPUT origen.FILA, INSERTED.ID_REGISTRO;
+        """
+        for numero, id_registro in self.session.execute(text(query), params):
+            self.ids.append({'fila': numero, 'id_registro': id_registro})
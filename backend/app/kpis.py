@@ -0,0 +1,100 @@
+import threading
+import time
+
+from sqlalchemy import text
+
+# Un solo recorrido de REGISTROS agrupado por (estado, tipo de bobina); todos los indicadores
+# de inventario se derivan de esas celdas en Python. Los pedidos pendientes viajan en la
+# misma consulta para no sumar otro viaje a la BD.
+CONSULTA_KPIS = """
+SELECT 'R' AS ORIGEN, ESTADO_ID_ESTADO, BOBINA_ID_BOBI,
+       COUNT(*) AS CANTIDAD, SUM(PESO) AS PESO_TOTAL, COUNT(PESO) AS CANTIDAD_CON_PESO
+FROM REGISTROS
+GROUP BY ESTADO_ID_ESTADO, BOBINA_ID_BOBI
+UNION ALL
+SELECT 'P', NULL, NULL, COUNT(*), NULL, NULL
+FROM PEDIDO_CAB
+WHERE ESTADO_PEDIDO_ID = 2
+"""
+
+ESTADO_DISPONIBLE = 1
+ESTADO_DESPACHADA = 2
+
+
+class ServicioKPIs:
+    """Indicadores de inventario compartidos por los endpoints de estadísticas, con TTL e invalidación"""
+
+    def __init__(self, db, catalogos, ttl=30):
+        self.db = db
+        self.catalogos = catalogos
+        self.ttl = ttl
+        self._actual = None  # (kpis, momento del cálculo)
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def obtener(self):
+        actual = self._actual
+        if actual is not None and time.monotonic() - actual[1] <= self.ttl:
+            return actual[0]
+        with self._lock:
+            actual = self._actual
+            if actual is not None and time.monotonic() - actual[1] <= self.ttl:
+                return actual[0]
+            version = self._version
+            kpis = self._calcular()
+            # Si hubo una escritura mientras se calculaba, el resultado se usa pero no se guarda
+            if version == self._version:
+                self._actual = (kpis, time.monotonic())
+            return kpis
+
+    def invalidar(self):
+        self._version += 1
+        self._actual = None
+
+    def _calcular(self):
+        por_estado = {}
+        por_bobina = {}
+        total = 0
+        peso_total = 0.0
+        con_peso = 0
+        pedidos_pendientes = 0
+
+        for origen, estado, bobina, cantidad, peso, cantidad_con_peso in self.db.session.execute(text(CONSULTA_KPIS)):
+            if origen == 'P':
+                pedidos_pendientes = cantidad
+                continue
+            total += cantidad
+            peso_total += float(peso or 0)
+            con_peso += cantidad_con_peso
+            por_estado[estado] = por_estado.get(estado, 0) + cantidad
+            if bobina is not None:
+                por_bobina[bobina] = por_bobina.get(bobina, 0) + cantidad
+
+        estados = {fila['ID_ESTADO']: fila['DESC_ESTADO'] for fila in self.catalogos.filas('ESTADO')}
+        bobinas = {fila['ID_BOBI']: fila['DESC_BOBI'] for fila in self.catalogos.filas('BOBINA')}
+
+        # Como los JOIN originales: solo estados y bobinas que existen en su catálogo,
+        # agrupando por descripción
+        cantidad_por_estado = {}
+        for id_estado, cantidad in por_estado.items():
+            if id_estado in estados:
+                cantidad_por_estado[estados[id_estado]] = cantidad_por_estado.get(estados[id_estado], 0) + cantidad
+        cantidad_por_bobina = {}
+        for id_bobina, cantidad in por_bobina.items():
+            if id_bobina in bobinas:
+                cantidad_por_bobina[bobinas[id_bobina]] = cantidad_por_bobina.get(bobinas[id_bobina], 0) + cantidad
+
+        return {
+            'total_registros': total,
+            'disponibles': por_estado.get(ESTADO_DISPONIBLE, 0),
+            'despachadas': por_estado.get(ESTADO_DESPACHADA, 0),
+            'peso_total': peso_total,
+            # AVG(PESO) ignora los NULL
+            'peso_promedio': peso_total / con_peso if con_peso else 0,
+            'pedidos_pendientes': pedidos_pendientes,
+            'por_estado': [{'estado': estado, 'cantidad': cantidad} for estado, cantidad in cantidad_por_estado.items()],
+            'bobinas_mas_usadas': [
+                {'bobina': bobina, 'cantidad': cantidad}
+                for bobina, cantidad in sorted(cantidad_por_bobina.items(), key=lambda item: (-item[1], item[0]))
+            ]
+        }
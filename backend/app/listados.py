@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from flask import current_app, stream_with_context
+from sqlalchemy import text
+
+from app.database import db
+from app.exportacion import FORMATOS_EXPORTACION, exportar_resultado
+from app.servicios import indice_busqueda
+
+
+def filtros_busqueda(search):
+    """Restringe la búsqueda a los candidatos del índice; el LIKE posterior solo revisa esas filas"""
+    condicion = indice_busqueda.condicion(db.session, search)
+    if condicion is None:
+        return "", {}
+    return " AND " + condicion[0], condicion[1]
+
+
+def respuesta_exportacion(query, params, formato, nombre):
+    """Respuesta en streaming: el primer trozo sale sin esperar a leer todo el resultado"""
+    generador = exportar_resultado(db.engine, text(query), params, formato)
+    # Se lee el primer trozo aquí para que un error de la consulta todavía pueda devolver 500.
+    # NDJSON no tiene encabezado: sin filas no hay primer trozo y el cuerpo queda vacío
+    primero = next(generador, b'')
+
+    def continuar():
+        yield primero
+        yield from generador
+
+    return current_app.response_class(
+        stream_with_context(continuar()),
+        content_type=FORMATOS_EXPORTACION[formato],
+        headers={'Content-Disposition': f"attachment; filename={nombre}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{formato}"}
+    )
@@ -0,0 +1,9 @@
+# SQL Server admite como máximo 2100 parámetros por sentencia;
+# se deja margen para los parámetros fijos de cada consulta
+MAX_PARAMETROS = 2000
+
+
+def en_lotes(valores, tamano=MAX_PARAMETROS):
+    """Parte una lista en trozos de como mucho `tamano` elementos"""
+    for inicio in range(0, len(valores), tamano):
+        yield valores[inicio:inicio + tamano]
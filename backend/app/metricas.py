@@ -0,0 +1,337 @@
+import contextvars
+import math
+import os
+import threading
+import time
+from collections import deque
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.pool import TRAMOS_ESPERA, estadisticas_pool
+
+# Tramos (límites superiores) de cada histograma, en las unidades de la métrica
+TRAMOS_DURACION = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+TRAMOS_TAMANO = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+TRAMOS_SENTENCIAS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+TRAMOS_FILAS = (0, 1, 10, 100, 1000, 10000, 100000)
+TRAMOS_SQL = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+
+CUANTILES = (0.5, 0.95, 0.99)
+VENTANA_CUANTILES = 1024  # últimas duraciones por ruta usadas para p50/p95/p99
+
+TIPO_CONTENIDO = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Consultas de la petición en curso; el ContextVar llega a los hilos de ConsultasParalelas
+# porque las tareas se lanzan dentro de una copia del contexto
+_peticion = contextvars.ContextVar('metricas_peticion', default=None)
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquetas(nombres, valores, extra=None):
+    # Con gunicorn cada worker tiene sus propias cifras y un scrape llega a uno solo de ellos:
+    # la etiqueta worker (PID) separa las series para sumarlas con sum without (worker)
+    pares = [('worker', os.getpid())] + list(zip(nombres, valores))
+    if extra is not None:
+        pares.append(extra)
+    return '{' + ','.join(f'{nombre}="{_escapar(valor)}"' for nombre, valor in pares) + '}'
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Contador:
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def reiniciar(self):
+        with self._lock:
+            self._valores.clear()
+
+    def sumar(self, valores, cantidad=1):
+        with self._lock:
+            self._valores[valores] = self._valores.get(valores, 0) + cantidad
+
+    def texto(self):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} counter']
+        with self._lock:
+            for valores, total in sorted(self._valores.items()):
+                lineas.append(f'{self.nombre}{_etiquetas(self.etiquetas, valores)} {_numero(total)}')
+        return lineas
+
+
+class Histograma:
+    def __init__(self, nombre, ayuda, tramos, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.tramos = tramos
+        self.etiquetas = etiquetas
+        self._series = {}  # etiquetas -> [conteo por tramo (no acumulado), suma, total]
+        self._lock = threading.Lock()
+
+    def reiniciar(self):
+        with self._lock:
+            self._series.clear()
+
+    def observar(self, valores, valor):
+        with self._lock:
+            serie = self._series.get(valores)
+            if serie is None:
+                serie = self._series[valores] = [[0] * (len(self.tramos) + 1), 0.0, 0]
+            for i, limite in enumerate(self.tramos):
+                if valor <= limite:
+                    break
+            else:
+                i = len(self.tramos)
+            serie[0][i] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def texto(self):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} histogram']
+        with self._lock:
+            for valores, (conteos, suma, total) in sorted(self._series.items()):
+                acumulado = 0
+                for limite, cantidad in zip(list(self.tramos) + ['+Inf'], conteos):
+                    acumulado += cantidad
+                    le = ('le', limite if limite == '+Inf' else _numero(float(limite)))
+                    lineas.append(f'{self.nombre}_bucket{_etiquetas(self.etiquetas, valores, le)} {acumulado}')
+                lineas.append(f'{self.nombre}_sum{_etiquetas(self.etiquetas, valores)} {_numero(suma)}')
+                lineas.append(f'{self.nombre}_count{_etiquetas(self.etiquetas, valores)} {total}')
+        return lineas
+
+
+class Resumen:
+    """Cuantiles exactos sobre una ventana de las últimas observaciones de cada serie"""
+
+    def __init__(self, nombre, ayuda, etiquetas=(), cuantiles=CUANTILES, ventana=VENTANA_CUANTILES):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self.cuantiles = cuantiles
+        self.ventana = ventana
+        self._series = {}  # etiquetas -> [ventana, suma, total]
+        self._lock = threading.Lock()
+
+    def reiniciar(self):
+        with self._lock:
+            self._series.clear()
+
+    def observar(self, valores, valor):
+        with self._lock:
+            serie = self._series.get(valores)
+            if serie is None:
+                serie = self._series[valores] = [deque(maxlen=self.ventana), 0.0, 0]
+            serie[0].append(valor)
+            serie[1] += valor
+            serie[2] += 1
+
+    def texto(self):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} summary']
+        with self._lock:
+            series = [(valores, sorted(ventana), suma, total) for valores, (ventana, suma, total) in self._series.items()]
+        for valores, ordenadas, suma, total in sorted(series, key=lambda serie: serie[0]):
+            for cuantil in self.cuantiles:
+                # Rango más cercano: el menor valor con al menos el cuantil de observaciones por debajo
+                valor = ordenadas[max(math.ceil(cuantil * len(ordenadas)) - 1, 0)]
+                lineas.append(f'{self.nombre}{_etiquetas(self.etiquetas, valores, ("quantile", cuantil))} {_numero(valor)}')
+            lineas.append(f'{self.nombre}_sum{_etiquetas(self.etiquetas, valores)} {_numero(suma)}')
+            lineas.append(f'{self.nombre}_count{_etiquetas(self.etiquetas, valores)} {total}')
+        return lineas
+
+
+class _ConsultasPeticion:
+    """Totales de SQL de una petición; pueden sumarse desde varios hilos a la vez"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.sentencias = 0
+        self.filas = 0
+        self.tiempo = 0.0
+        self._lock = threading.Lock()
+
+    def sumar(self, sentencias=0, filas=0, tiempo=0.0):
+        with self._lock:
+            self.sentencias += sentencias
+            self.filas += filas
+            self.tiempo += tiempo
+
+
+class _CursorContado:
+    """Envuelve el cursor DBAPI para contar las filas leídas (rowcount no sirve para SELECT en pyodbc)"""
+
+    def __init__(self, cursor, consultas):
+        self._cursor = cursor
+        self._consultas = consultas
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+    def fetchone(self):
+        fila = self._cursor.fetchone()
+        if fila is not None:
+            self._consultas.sumar(filas=1)
+        return fila
+
+    def fetchmany(self, *args):
+        filas = self._cursor.fetchmany(*args)
+        self._consultas.sumar(filas=len(filas))
+        return filas
+
+    def fetchall(self):
+        filas = self._cursor.fetchall()
+        self._consultas.sumar(filas=len(filas))
+        return filas
+
+
+def _operacion(sentencia):
+    palabras = sentencia.lstrip(' \t\r\n(').split(None, 1)
+    operacion = palabras[0].upper() if palabras else ''
+    return operacion if operacion in ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'MERGE', 'WITH') else 'OTRA'
+
+
+class Metricas:
+    """Métricas HTTP y SQL del proceso en formato de exposición de Prometheus.
+    Las consultas se miden con eventos del motor, así que cubren cualquier text() sin tocar los endpoints.
+    Cada serie lleva la etiqueta worker con el PID: bajo gunicorn /api/metrics devuelve solo las
+    cifras del worker que atendió el scrape, y se agregan en Prometheus con sum without (worker)."""
+
+    def __init__(self, app=None):
+        self.peticiones = Contador('bobis_http_requests_total', 'Peticiones atendidas', ('metodo', 'ruta', 'estado'))
+        self.duracion = Histograma('bobis_http_request_duration_seconds', 'Duración de la petición hasta generar la respuesta',
+                                   TRAMOS_DURACION, ('metodo', 'ruta'))
+        self.latencia = Resumen('bobis_http_request_latency_seconds', 'p50/p95/p99 de las últimas peticiones por ruta',
+                                ('metodo', 'ruta'))
+        self.tamano = Histograma('bobis_http_response_size_bytes', 'Tamaño del cuerpo de la respuesta (sin streaming)',
+                                 TRAMOS_TAMANO, ('metodo', 'ruta'))
+        self.sentencias = Histograma('bobis_db_statements_per_request', 'Sentencias SQL ejecutadas por petición',
+                                     TRAMOS_SENTENCIAS, ('ruta',))
+        self.filas = Histograma('bobis_db_rows_per_request', 'Filas leídas de la BD por petición', TRAMOS_FILAS, ('ruta',))
+        self.tiempo_bd = Histograma('bobis_db_time_per_request_seconds', 'Tiempo total en la BD por petición',
+                                    TRAMOS_DURACION, ('ruta',))
+        self.sql = Histograma('bobis_db_statement_duration_seconds', 'Duración de cada sentencia SQL',
+                              TRAMOS_SQL, ('ruta', 'operacion'))
+        self.errores_sql = Contador('bobis_db_statement_errors_total', 'Sentencias SQL que fallaron', ('ruta', 'operacion'))
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self._antes)
+        app.after_request(self._despues)
+        app.teardown_request(self._terminar)
+        # Sobre la clase Engine: vale para el motor de Flask-SQLAlchemy aunque se cree después
+        if not event.contains(Engine, 'before_cursor_execute', self._antes_sql):
+            event.listen(Engine, 'before_cursor_execute', self._antes_sql)
+            event.listen(Engine, 'after_cursor_execute', self._despues_sql)
+            event.listen(Engine, 'handle_error', self._error_sql)
+
+    # --- HTTP ---
+
+    def _antes(self):
+        g.metricas_inicio = time.perf_counter()
+        _peticion.set(_ConsultasPeticion(self._ruta()))
+
+    def _despues(self, response):
+        inicio = g.get('metricas_inicio')
+        consultas = _peticion.get()
+        if inicio is None or consultas is None:
+            return response
+        duracion = time.perf_counter() - inicio
+        metodo, ruta = request.method, consultas.ruta
+
+        self.peticiones.sumar((metodo, ruta, str(response.status_code)))
+        self.duracion.observar((metodo, ruta), duracion)
+        self.latencia.observar((metodo, ruta), duracion)
+        if not response.is_streamed:
+            self.tamano.observar((metodo, ruta), response.calculate_content_length() or 0)
+        return response
+
+    def _terminar(self, error=None):
+        # Con stream_with_context se llega aquí al terminar de enviar el cuerpo, así que
+        # las filas que lee una exportación mientras se envía entran en su petición
+        consultas = _peticion.get()
+        if consultas is None:
+            return
+        self.sentencias.observar((consultas.ruta,), consultas.sentencias)
+        self.filas.observar((consultas.ruta,), consultas.filas)
+        self.tiempo_bd.observar((consultas.ruta,), consultas.tiempo)
+        _peticion.set(None)
+
+    def _ruta(self):
+        # La plantilla de la regla (/api/registros/<int:id_registro>) y no la URL, para acotar las series
+        return request.url_rule.rule if request.url_rule is not None else 'sin_ruta'
+
+    # --- SQL ---
+
+    def _antes_sql(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metricas_inicio = time.perf_counter()
+
+    def _despues_sql(self, conn, cursor, statement, parameters, context, executemany):
+        inicio = getattr(context, '_metricas_inicio', None)
+        if inicio is None:
+            return
+        duracion = time.perf_counter() - inicio
+        consultas = _peticion.get()
+        ruta = consultas.ruta if consultas is not None else 'fuera_de_peticion'
+        self.sql.observar((ruta, _operacion(statement)), duracion)
+        if consultas is not None:
+            consultas.sumar(sentencias=1, tiempo=duracion)
+            if cursor.description is not None:
+                # El resultado se arma a partir de context.cursor justo después de este evento
+                context.cursor = _CursorContado(cursor, consultas)
+
+    def _error_sql(self, contexto_error):
+        consultas = _peticion.get()
+        ruta = consultas.ruta if consultas is not None else 'fuera_de_peticion'
+        self.errores_sql.sumar((ruta, _operacion(contexto_error.statement or '')))
+
+    # --- Exposición ---
+
+    def _metricas(self):
+        return (self.peticiones, self.duracion, self.latencia, self.tamano, self.sentencias,
+                self.filas, self.tiempo_bd, self.sql, self.errores_sql)
+
+    def reiniciar(self):
+        """Descarta lo acumulado; un worker bifurcado del maestro no hereda sus cifras"""
+        for metrica in self._metricas():
+            metrica.reiniciar()
+
+    def texto(self, engine=None):
+        lineas = []
+        for metrica in self._metricas():
+            lineas += metrica.texto()
+        lineas += texto_pool(engine)
+        return '\n'.join(lineas) + '\n'
+
+
+def texto_pool(engine=None):
+    """Estadísticas acumuladas de PoolMedido y, si se pasa el motor, la ocupación actual"""
+    resumen = estadisticas_pool.resumen()
+    nombre = 'bobis_db_pool_wait_seconds'
+    lineas = [f'# HELP {nombre} Espera para obtener una conexión del pool', f'# TYPE {nombre} histogram']
+    proceso = _etiquetas((), ())
+    for limite in list(TRAMOS_ESPERA) + ['+Inf']:
+        le = ('le', limite if limite == '+Inf' else _numero(float(limite)))
+        lineas.append(f'{nombre}_bucket{_etiquetas((), (), le)} {resumen["espera_tramos"][str(limite)]}')
+    lineas.append(f'{nombre}_sum{proceso} {_numero(resumen["espera_total_s"])}')
+    lineas.append(f'{nombre}_count{proceso} {resumen["espera_tramos"]["+Inf"]}')
+
+    for clave, metrica, ayuda in (('desbordes', 'bobis_db_pool_overflow_total', 'Checkouts que abrieron una conexión de desborde'),
+                                  ('timeouts', 'bobis_db_pool_timeouts_total', 'Checkouts que agotaron pool_timeout')):
+        lineas += [f'# HELP {metrica} {ayuda}', f'# TYPE {metrica} counter', f'{metrica}{proceso} {resumen[clave]}']
+
+    if engine is not None and hasattr(engine.pool, 'checkedout'):
+        for metrica, valor, ayuda in (('bobis_db_pool_checked_out', engine.pool.checkedout(), 'Conexiones en uso'),
+                                      ('bobis_db_pool_checked_in', engine.pool.checkedin(), 'Conexiones libres en el pool')):
+            lineas += [f'# HELP {metrica} {ayuda}', f'# TYPE {metrica} gauge', f'{metrica}{proceso} {valor}']
+    return lineas
@@ -0,0 +1,49 @@
+import base64
+import json
+from datetime import date, datetime
+
+
+class CursorInvalido(ValueError):
+    """El token de paginación no se pudo decodificar"""
+
+
+def codificar_cursor(*valores):
+    """Convierte la clave de orden de la última fila en un token opaco"""
+    clave = []
+    for valor in valores:
+        if isinstance(valor, datetime):
+            clave.append({'dt': valor.isoformat()})
+        elif isinstance(valor, date):
+            clave.append({'d': valor.isoformat()})
+        else:
+            clave.append(valor)
+
+    crudo = json.dumps(clave, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(crudo).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(token, cantidad):
+    """Recupera los valores de la clave de orden desde el token"""
+    try:
+        relleno = '=' * (-len(token) % 4)
+        clave = json.loads(base64.urlsafe_b64decode(token + relleno))
+    except (ValueError, TypeError) as e:
+        raise CursorInvalido('Cursor inválido') from e
+
+    if not isinstance(clave, list) or len(clave) != cantidad:
+        raise CursorInvalido('Cursor inválido: clave incompleta')
+
+    valores = []
+    for valor in clave:
+        try:
+            if isinstance(valor, dict) and len(valor) == 1 and 'dt' in valor:
+                valor = datetime.fromisoformat(valor['dt'])
+            elif isinstance(valor, dict) and len(valor) == 1 and 'd' in valor:
+                valor = date.fromisoformat(valor['d'])
+        except (ValueError, TypeError) as e:
+            raise CursorInvalido('Cursor inválido') from e
+        # Solo escalares llegan a la consulta; listas u objetos no son una clave de orden
+        if valor is not None and not isinstance(valor, (str, int, float, date)):
+            raise CursorInvalido('Cursor inválido: valor de clave no admitido')
+        valores.append(valor)
+    return valores
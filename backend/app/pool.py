@@ -0,0 +1,115 @@
+import os
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+# Límites (segundos) de los tramos del histograma de espera al pedir una conexión
+TRAMOS_ESPERA = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+
+
+class EstadisticasPool:
+    """Acumula la espera de checkout, los desbordes y los timeouts del pool del proceso"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self.checkouts = 0
+            self.espera_total = 0.0
+            self.espera_maxima = 0.0
+            self.tramos = [0] * (len(TRAMOS_ESPERA) + 1)
+            self.desbordes = 0
+            self.timeouts = 0
+
+    def registrar(self, espera, desborde):
+        with self._lock:
+            self.checkouts += 1
+            self.espera_total += espera
+            self.espera_maxima = max(self.espera_maxima, espera)
+            self.tramos[self._tramo(espera)] += 1
+            if desborde:
+                self.desbordes += 1
+
+    def registrar_timeout(self, espera):
+        with self._lock:
+            self.timeouts += 1
+            self.tramos[self._tramo(espera)] += 1
+
+    def _tramo(self, espera):
+        for i, limite in enumerate(TRAMOS_ESPERA):
+            if espera <= limite:
+                return i
+        return len(TRAMOS_ESPERA)
+
+    def resumen(self):
+        with self._lock:
+            acumulado = 0
+            tramos = {}
+            for limite, cantidad in zip(list(TRAMOS_ESPERA) + ['+Inf'], self.tramos):
+                acumulado += cantidad
+                tramos[str(limite)] = acumulado
+            return {
+                'checkouts': self.checkouts,
+                'espera_promedio_ms': round(self.espera_total / self.checkouts * 1000, 3) if self.checkouts else 0,
+                'espera_maxima_ms': round(self.espera_maxima * 1000, 3),
+                'espera_total_s': round(self.espera_total, 6),
+                'espera_tramos': tramos,
+                'desbordes': self.desbordes,
+                'timeouts': self.timeouts
+            }
+
+
+# Un solo motor por proceso; el pool se recrea en dispose() pero las cifras se conservan
+estadisticas_pool = EstadisticasPool()
+
+
+_hilo = threading.local()
+
+
+class PoolMedido(QueuePool):
+    """QueuePool que mide cuánto espera cada checkout y cuándo se abre una conexión de desborde"""
+
+    def _do_get(self):
+        # QueuePool._do_get se llama a sí mismo al reintentar; solo se mide la llamada externa
+        if getattr(_hilo, 'midiendo', False):
+            return super()._do_get()
+        _hilo.midiendo = True
+        _hilo.desborde = False
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except exc.TimeoutError:
+            estadisticas_pool.registrar_timeout(time.perf_counter() - inicio)
+            raise
+        finally:
+            _hilo.midiendo = False
+        estadisticas_pool.registrar(time.perf_counter() - inicio, _hilo.desborde)
+        return conexion
+
+    def _inc_overflow(self):
+        abierta = super()._inc_overflow()
+        # _overflow es negativo mientras el pool no alcanza pool_size
+        if abierta and self._overflow > 0:
+            _hilo.desborde = True
+        return abierta
+
+
+def estado_pool(engine):
+    """Ocupación actual del pool más las estadísticas acumuladas, del proceso que atiende (worker)"""
+    pool = engine.pool
+    estado = {'worker': os.getpid(), 'clase': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        estado.update({
+            'tamano': pool.size(),
+            'en_uso': pool.checkedout(),
+            'disponibles': pool.checkedin(),
+            'desborde_actual': max(pool.overflow(), 0),
+            'desborde_maximo': pool._max_overflow,
+            'timeout_s': pool.timeout()
+        })
+    estado.update(estadisticas_pool.resumen())
+    return estado
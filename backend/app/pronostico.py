@@ -0,0 +1,192 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+# Pronóstico mensual de muchas series a la vez (una fila de la matriz por BOBINA o PROVEEDOR).
+# Todas las series comparten los mismos meses, así que comparten la matriz de diseño y cada
+# modelo se ajusta con una sola llamada de NumPy en vez de un bucle de Python por serie.
+# NumPy se importa dentro de las funciones que lo usan: los helpers de meses y el memo no lo
+# necesitan y así no suma a la importación de la aplicación.
+
+MODELOS = ('auto', 'lineal', 'estacional', 'holt')
+PERIODO = 12
+ARMONICOS = 2
+
+# Valor z de los intervalos según el nivel de confianza pedido
+Z_NIVEL = {0.8: 1.2816, 0.9: 1.6449, 0.95: 1.96, 0.99: 2.5758}
+
+# Grilla de parámetros de Holt; se evalúan todas las combinaciones para todas las series juntas
+ALFAS = (0.1, 0.2, 0.3, 0.5, 0.7, 0.9)
+BETAS = (0.01, 0.05, 0.1, 0.2, 0.3)
+
+
+def indice_mes(anio, mes):
+    """Meses desde el año 0; permite sumar meses de calendario sin aproximar a 30 días"""
+    return int(anio) * 12 + int(mes) - 1
+
+
+def texto_mes(indice):
+    return f'{indice // 12:04d}-{indice % 12 + 1:02d}'
+
+
+def fecha_mes(indice):
+    """Índice de mes -> datetime del primer día de ese mes"""
+    return datetime(indice // 12, indice % 12 + 1, 1)
+
+
+def indice_de_texto(mes):
+    """'2025-03' (o una fecha ISO) -> índice de mes"""
+    anio, mes = str(mes).split('-')[:2]
+    return indice_mes(anio, mes)
+
+
+def matriz_series(filas, desde, hasta):
+    """filas (clave, indice_mes, valor) -> (claves, Y) con Y[serie, mes] para los meses desde..hasta-1.
+    Los meses sin pedidos quedan en 0."""
+    import numpy as np
+
+    # Orden fijo de las series para que el mismo resultado de la BD dé siempre la misma salida
+    claves = sorted(set(fila[0] for fila in filas), key=lambda clave: (clave is None, clave))
+    posicion = {clave: i for i, clave in enumerate(claves)}
+    Y = np.zeros((len(claves), max(hasta - desde, 0)))
+    if filas:
+        series = np.array([posicion[fila[0]] for fila in filas])
+        meses = np.array([fila[1] for fila in filas]) - desde
+        valores = np.array([float(fila[2] or 0) for fila in filas])
+        dentro = (meses >= 0) & (meses < Y.shape[1])
+        np.add.at(Y, (series[dentro], meses[dentro]), valores[dentro])
+    return claves, Y
+
+
+def _diseno_lineal(t):
+    import numpy as np
+
+    return np.column_stack([np.ones_like(t), t])
+
+
+def _diseno_estacional(t):
+    import numpy as np
+
+    columnas = [np.ones_like(t), t]
+    for k in range(1, ARMONICOS + 1):
+        angulo = 2 * np.pi * k * t / PERIODO
+        columnas += [np.sin(angulo), np.cos(angulo)]
+    return np.column_stack(columnas)
+
+
+def _regresion(Y, diseno, horizonte, z):
+    """Mínimos cuadrados de todas las series con la misma matriz de diseño (Y.T como varios lados derechos)"""
+    import numpy as np
+
+    T = Y.shape[1]
+    X = diseno(np.arange(T, dtype=float))
+    X_futuro = diseno(np.arange(T, T + horizonte, dtype=float))
+
+    coeficientes, *_ = np.linalg.lstsq(X, Y.T, rcond=None)
+    residuos = Y - (X @ coeficientes).T
+    sigma2 = (residuos ** 2).sum(axis=1) / max(T - X.shape[1], 1)
+
+    # Varianza de predicción: sigma² (1 + x0' (X'X)^-1 x0); la palanca es común a todas las series
+    palanca = np.einsum('hp,pq,hq->h', X_futuro, np.linalg.pinv(X.T @ X), X_futuro)
+    media = (X_futuro @ coeficientes).T
+    error = z * np.sqrt(sigma2[:, None] * (1 + palanca[None, :]))
+    return media, error
+
+
+def _holt(Y, horizonte, z):
+    """Suavizado exponencial de Holt (tendencia aditiva) con α y β elegidos por serie en una grilla"""
+    import numpy as np
+
+    S, T = Y.shape
+    alfa = np.repeat(ALFAS, len(BETAS))[:, None]
+    beta = np.tile(BETAS, len(ALFAS))[:, None] * alfa  # β de la forma de corrección de error
+    G = alfa.shape[0]
+
+    # Matrices (combinación de parámetros × serie); el bucle recorre meses, no series
+    nivel = np.tile(Y[:, 0], (G, 1))
+    tendencia = np.tile(Y[:, 1] - Y[:, 0], (G, 1))
+    sse = np.zeros((G, S))
+    for t in range(1, T):
+        error = Y[:, t] - (nivel + tendencia)
+        if t > 1:
+            # El primer paso solo reproduce la tendencia inicial
+            sse += error ** 2
+        nivel = nivel + tendencia + alfa * error
+        tendencia = tendencia + beta * error
+
+    mejor = sse.argmin(axis=0)
+    columnas = np.arange(S)
+    nivel, tendencia, sse = nivel[mejor, columnas], tendencia[mejor, columnas], sse[mejor, columnas]
+    a, b = alfa[mejor, 0], beta[mejor, 0]
+    sigma2 = sse / max(T - 4, 1)
+
+    h = np.arange(1, horizonte + 1, dtype=float)
+    media = nivel[:, None] + h[None, :] * tendencia[:, None]
+    # Varianza de ETS(A,A,N) a h pasos: sigma² [1 + (h-1)(α² + αβh + β²h(2h-1)/6)]
+    factor = 1 + (h[None, :] - 1) * (
+        a[:, None] ** 2 + a[:, None] * b[:, None] * h[None, :] + b[:, None] ** 2 * h[None, :] * (2 * h[None, :] - 1) / 6
+    )
+    error = z * np.sqrt(sigma2[:, None] * factor)
+    return media, error
+
+
+def elegir_modelo(modelo, meses):
+    """Con 'auto' se usa el modelo más rico que la cantidad de meses permite ajustar"""
+    minimo = {'estacional': PERIODO + 2 + 2 * ARMONICOS, 'holt': 4, 'lineal': 2}
+    if modelo == 'auto':
+        modelo = 'estacional' if meses >= 2 * PERIODO else 'holt'
+    for candidato in (modelo, 'holt', 'lineal'):
+        if meses >= minimo[candidato]:
+            return candidato
+    return 'promedio'
+
+
+def pronosticar(Y, horizonte, modelo='auto', nivel=0.95):
+    """Pronostica 'horizonte' meses de cada fila de Y.
+    Devuelve (modelo usado, media, inferior, superior), cada matriz de series × horizonte."""
+    import numpy as np
+
+    Y = np.asarray(Y, dtype=float)
+    if Y.ndim == 1:
+        Y = Y[None, :]
+    z = Z_NIVEL.get(nivel, 1.96)
+    modelo = elegir_modelo(modelo, Y.shape[1])
+
+    if modelo == 'estacional':
+        media, error = _regresion(Y, _diseno_estacional, horizonte, z)
+    elif modelo == 'lineal':
+        media, error = _regresion(Y, _diseno_lineal, horizonte, z)
+    elif modelo == 'holt':
+        media, error = _holt(Y, horizonte, z)
+    else:
+        # Menos de dos meses: se repite el promedio, sin tendencia ni intervalo
+        promedio = Y.mean(axis=1) if Y.shape[1] else np.zeros(Y.shape[0])
+        media = np.repeat(promedio[:, None], horizonte, axis=1)
+        error = np.zeros_like(media)
+
+    # La demanda no puede ser negativa
+    return modelo, np.maximum(media, 0), np.maximum(media - error, 0), np.maximum(media + error, 0)
+
+
+class MemoPronosticos:
+    """Pronósticos ya calculados. La clave incluye la marca de agua de los datos de origen,
+    así que una entrada nunca queda vieja: deja de pedirse cuando llegan pedidos nuevos."""
+
+    def __init__(self, max_claves=64):
+        self.max_claves = max_claves
+        self._valores = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave, calcular):
+        with self._lock:
+            if clave in self._valores:
+                self._valores.move_to_end(clave)
+                return self._valores[clave]
+
+        valor = calcular()
+        with self._lock:
+            self._valores[clave] = valor
+            self._valores.move_to_end(clave)
+            while len(self._valores) > self.max_claves:
+                self._valores.popitem(last=False)
+        return valor
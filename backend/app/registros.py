@@ -0,0 +1,133 @@
+from datetime import date, datetime
+
+# Mapeo de campos del frontend a la base de datos
+CAMPOS_DB = {
+    'fecha_llegada': 'FECHA_LLEGADA',
+    'pedido_compra': 'PEDIDO_COMPRA',
+    'colada': 'COLADA',
+    'peso': 'PESO',
+    'cantidad': 'CANTIDAD',
+    'lote': 'LOTE',
+    'fecha_inventario': 'FECHA_INVENTARIO',
+    'observaciones': 'OBSERVACIONES',
+    'ton_pedido_compra': 'TON_PEDIDO_COMPRA',
+    'fecha_ingreso_planta': 'FECHA_INGRESO_PLANTA',  # Campo requerido
+    'bobina_id_bobi': 'BOBINA_ID_BOBI',
+    'proveedor_id_prov': 'PROVEEDOR_ID_PROV',
+    'barco_id_barco': 'BARCO_ID_BARCO',
+    'ubicacion_id_ubi': 'UBICACION_ID_UBI',
+    'estado_id_estado': 'ESTADO_ID_ESTADO',
+    'molino_id_molino': 'MOLINO_ID_MOLINO',
+    'n_bobi_proveedor': 'N_BOBI_PROVEEDOR',
+    'bobi_correlativo': 'BOBI_CORRELATIVO',
+    'cod_bobin2': 'COD_BOBIN2'
+}
+
+# Campos que se pueden modificar en un registro existente (PUT y PATCH de /api/registros)
+CAMPOS_EDITABLES = [
+    'pedido_compra', 'colada', 'peso', 'cantidad', 'lote',
+    'fecha_inventario', 'observaciones', 'ton_pedido_compra',
+    'fecha_ingreso_planta', 'bobina_id_bobi', 'proveedor_id_prov',
+    'barco_id_barco', 'ubicacion_id_ubi', 'estado_id_estado',
+    'molino_id_molino', 'n_bobi_proveedor', 'bobi_correlativo',
+    'cod_bobin2'
+]
+
+# Campos obligatorios que deben tener valor
+CAMPOS_OBLIGATORIOS = ['fecha_ingreso_planta', 'estado_id_estado']
+
+# Tipos esperados para validar filas que no vienen del formulario (importaciones)
+CAMPOS_DECIMALES = ['peso', 'ton_pedido_compra']
+CAMPOS_ENTEROS = ['cantidad', 'bobina_id_bobi', 'proveedor_id_prov', 'barco_id_barco',
+                  'ubicacion_id_ubi', 'estado_id_estado', 'molino_id_molino']
+CAMPOS_FECHA = ['fecha_llegada', 'fecha_inventario', 'fecha_ingreso_planta']
+
+# Columnas que referencian una tabla de catálogo
+CAMPOS_CATALOGO = {
+    'bobina_id_bobi': ('BOBINA', 'ID_BOBI'),
+    'proveedor_id_prov': ('PROVEEDOR', 'ID_PROV'),
+    'barco_id_barco': ('BARCO', 'ID_BARCO'),
+    'ubicacion_id_ubi': ('UBICACION', 'ID_UBI'),
+    'estado_id_estado': ('ESTADO', 'ID_ESTADO'),
+    'molino_id_molino': ('MOLINO', 'ID_MOLINO')
+}
+
+FORMATOS_FECHA = ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S']
+
+
+def completar_obligatorios(data):
+    """Asigna valores por defecto a los campos obligatorios ausentes"""
+    for campo_obligatorio in CAMPOS_OBLIGATORIOS:
+        if campo_obligatorio not in data or data[campo_obligatorio] is None:
+            if campo_obligatorio == 'fecha_ingreso_planta':
+                data[campo_obligatorio] = datetime.now().strftime('%Y-%m-%d')
+            elif campo_obligatorio == 'estado_id_estado':
+                data[campo_obligatorio] = 1  # Estado por defecto
+    return data
+
+
+def campos_con_valor(data):
+    """Campos del frontend presentes y no vacíos, en el orden de CAMPOS_DB"""
+    return {
+        campo: data[campo]
+        for campo in CAMPOS_DB
+        if campo in data and data[campo] is not None and data[campo] != ''
+    }
+
+
+def convertir_fecha(valor):
+    # datetime es subclase de date, así que cubre ambos (celdas de Excel, JSON ya parseado)
+    if isinstance(valor, date):
+        return valor
+    texto = str(valor).strip()
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(texto, formato)
+        except ValueError:
+            continue
+    raise ValueError(texto)
+
+
+def convertir_campos(data):
+    """Convierte los valores de una fila al tipo de su columna; lanza ValueError con el campo culpable"""
+    convertidos = {}
+    for campo, valor in data.items():
+        if isinstance(valor, str):
+            valor = valor.strip()
+            if valor == '':
+                continue
+        if campo in CAMPOS_DECIMALES:
+            try:
+                valor = float(str(valor).replace(',', '.')) if isinstance(valor, str) else float(valor)
+            except (ValueError, TypeError):
+                raise ValueError(f'{campo}: se esperaba un número ({valor})')
+        elif campo in CAMPOS_ENTEROS:
+            # Excel entrega los enteros como float (3.0); se aceptan solo si no tienen decimales
+            try:
+                numero = float(valor)
+            except (ValueError, TypeError):
+                numero = None
+            if numero is None or not numero.is_integer():
+                raise ValueError(f'{campo}: se esperaba un entero ({valor})')
+            valor = int(numero)
+        elif campo in CAMPOS_FECHA:
+            try:
+                valor = convertir_fecha(valor)
+            except ValueError:
+                raise ValueError(f'{campo}: fecha no válida ({valor})')
+        else:
+            valor = str(valor)
+        convertidos[campo] = valor
+    return convertidos
+
+
+def validar_catalogos(datos, catalogos, ids_catalogo):
+    """Lanza ValueError si un campo de catálogo apunta a un ID inexistente.
+    'ids_catalogo' guarda los IDs de cada tabla consultada entre llamadas."""
+    for campo, (tabla, columna) in CAMPOS_CATALOGO.items():
+        if campo not in datos:
+            continue
+        if tabla not in ids_catalogo:
+            ids_catalogo[tabla] = {fila[columna] for fila in catalogos.filas(tabla)}
+        if datos[campo] not in ids_catalogo[tabla]:
+            raise ValueError(f'{campo}: no existe en {tabla} ({datos[campo]})')
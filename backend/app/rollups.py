@@ -0,0 +1,166 @@
+from sqlalchemy import bindparam, text
+
+from app.lotes import en_lotes
+from app.pronostico import fecha_mes, indice_mes
+
+MEDIDAS = ('PEDIDOS', 'BOBINAS', 'PESO_TOTAL', 'BOBINAS_CON_PESO')
+CLAVES_MES = ('ANIO', 'MES', 'BOBINA_ID_BOBI')
+
+# Columnas de REGISTROS que entran en el rollup: editarlas en una bobina ya pedida cambia sus meses
+CAMPOS_ROLLUP = {'PESO', 'BOBINA_ID_BOBI'}
+
+# Primer y último mes (índice de app.pronostico.indice_mes) de los pedidos que incluyen los registros
+CONSULTA_MESES_REGISTROS = text("""
+SELECT MIN(YEAR(PC.FECHA_PEDIDO) * 12 + MONTH(PC.FECHA_PEDIDO) - 1),
+       MAX(YEAR(PC.FECHA_PEDIDO) * 12 + MONTH(PC.FECHA_PEDIDO) - 1)
+FROM PEDIDO_CAB PC
+JOIN PEDIDO_DET PD ON PD.ID_PEDIDO = PC.ID_PEDIDO
+WHERE PD.ID_REGISTRO IN :ids_registros
+""").bindparams(bindparam('ids_registros', expanding=True))
+
+# Medidas de los pedidos que cumplen {filtro}, agrupadas según {grupo}. Las bobinas sin tipo
+# van a BOBINA_ID_BOBI = 0 porque la clave primaria no admite NULL.
+_ORIGEN = """
+SELECT {grupo},
+       COALESCE(R.BOBINA_ID_BOBI, 0) AS BOBINA_ID_BOBI,
+       COUNT(DISTINCT PC.ID_PEDIDO) AS PEDIDOS,
+       COUNT(*) AS BOBINAS,
+       COALESCE(SUM(R.PESO), 0) AS PESO_TOTAL,
+       COUNT(R.PESO) AS BOBINAS_CON_PESO
+FROM PEDIDO_CAB PC
+JOIN PEDIDO_DET PD ON PD.ID_PEDIDO = PC.ID_PEDIDO
+JOIN REGISTROS R ON R.ID_REGISTRO = PD.ID_REGISTRO
+{filtro}
+GROUP BY {agrupar}, COALESCE(R.BOBINA_ID_BOBI, 0)
+"""
+
+
+def origen_mes(filtro=''):
+    return _ORIGEN.format(grupo='YEAR(PC.FECHA_PEDIDO) AS ANIO, MONTH(PC.FECHA_PEDIDO) AS MES',
+                          agrupar='YEAR(PC.FECHA_PEDIDO), MONTH(PC.FECHA_PEDIDO)', filtro=filtro)
+
+
+def acumular(dialecto, tabla, claves, origen):
+    """Sentencia que suma las filas de 'origen' a 'tabla', insertando las claves que falten"""
+    columnas = claves + MEDIDAS
+    if dialecto == 'mssql':
+        # HOLDLOCK: dos pedidos simultáneos del mismo día y tipo no pueden insertar la misma clave
+        return f"""
+        MERGE {tabla} WITH (HOLDLOCK) AS destino
+        USING ({origen}) AS origen
+        ON {' AND '.join(f'destino.{c} = origen.{c}' for c in claves)}
+        WHEN MATCHED THEN
+            UPDATE SET {', '.join(f'{m} = destino.{m} + origen.{m}' for m in MEDIDAS)}
+        WHEN NOT MATCHED THEN
+            INSERT ({', '.join(columnas)}) VALUES ({', '.join('origen.' + c for c in columnas)});
+        """
+    # SQLite (benchmarks) y PostgreSQL no tienen MERGE con esta forma, pero sí INSERT ... ON CONFLICT
+    return f"""
+    INSERT INTO {tabla} ({', '.join(columnas)})
+    SELECT {', '.join(columnas)} FROM ({origen}) AS origen WHERE 1 = 1
+    ON CONFLICT ({', '.join(claves)}) DO UPDATE SET {', '.join(f'{m} = {tabla}.{m} + excluded.{m}' for m in MEDIDAS)}
+    """
+
+
+class RollupPedidos:
+    """Pedidos, bobinas y peso por mes y tipo de bobina (ver sql/03_rollup_pedidos.sql). Sin la
+    tabla, las lecturas se calculan sobre los pedidos con el mismo resultado."""
+
+    def __init__(self):
+        self._disponible = None
+
+    def disponible(self, conexion):
+        if self._disponible is None:
+            existe = conexion.execute(text("SELECT OBJECT_ID('ROLLUP_PEDIDOS_MES')")).scalar()
+            self._disponible = existe is not None
+            if not self._disponible:
+                print('⚠️  ROLLUP_PEDIDOS_MES no existe, la tendencia se calcula sobre los pedidos')
+        return self._disponible
+
+    def registrar_pedido(self, session, id_pedido):
+        """Suma un pedido recién insertado; va en la misma transacción que el pedido"""
+        if not self.disponible(session):
+            return
+        dialecto = session.get_bind().dialect.name
+        session.execute(text(acumular(dialecto, 'ROLLUP_PEDIDOS_MES', CLAVES_MES,
+                                      origen_mes('WHERE PC.ID_PEDIDO = :id_pedido'))),
+                        {'id_pedido': id_pedido})
+
+    def registros_modificados(self, session, ids_registros):
+        """Recalcula los meses de los pedidos que incluyen estos registros, tras editar su peso o su
+        tipo de bobina; va en la misma transacción que la edición. Las bobinas sin pedido no cuentan."""
+        if not ids_registros or not self.disponible(session):
+            return
+        meses = []
+        for lote in en_lotes(list(ids_registros)):
+            primero, ultimo = session.execute(CONSULTA_MESES_REGISTROS, {'ids_registros': lote}).one()
+            if primero is not None:
+                meses += [int(primero), int(ultimo)]
+        if meses:
+            # PEDIDOS cuenta pedidos distintos por tipo: no se puede restar una bobina, se rehacen los
+            # meses. Una sola pasada por el rango, aunque incluya meses que no cambiaron
+            self._recalcular_meses(session, min(meses), max(meses) + 1)
+
+    def reconstruir(self, session):
+        """Vacía y recalcula el agregado desde los pedidos; devuelve las filas mensuales"""
+        self._disponible = None
+        if not self.disponible(session):
+            return 0
+        session.execute(text("DELETE FROM ROLLUP_PEDIDOS_MES"))
+        session.execute(text(f"INSERT INTO ROLLUP_PEDIDOS_MES ({', '.join(CLAVES_MES + MEDIDAS)}) {origen_mes()}"))
+        return session.execute(text("SELECT COUNT(*) FROM ROLLUP_PEDIDOS_MES")).scalar()
+
+    def _recalcular_meses(self, session, desde, hasta):
+        """Rehace los meses [desde, hasta) desde los pedidos"""
+        params = {'anio_desde': desde // 12, 'mes_desde': desde % 12 + 1,
+                  'anio_hasta': hasta // 12, 'mes_hasta': hasta % 12 + 1,
+                  'desde': fecha_mes(desde), 'hasta': fecha_mes(hasta)}
+        session.execute(text("""
+            DELETE FROM ROLLUP_PEDIDOS_MES
+            WHERE (ANIO > :anio_desde OR (ANIO = :anio_desde AND MES >= :mes_desde))
+              AND (ANIO < :anio_hasta OR (ANIO = :anio_hasta AND MES < :mes_hasta))
+        """), params)
+        session.execute(text(
+            f"INSERT INTO ROLLUP_PEDIDOS_MES ({', '.join(CLAVES_MES + MEDIDAS)}) "
+            + origen_mes('WHERE PC.FECHA_PEDIDO >= :desde AND PC.FECHA_PEDIDO < :hasta')
+        ), params)
+
+    def _por_mes(self, conexion, desde, hasta, por_bobina):
+        """Filas (bobina o None, índice de mes, bobinas, peso total) de los meses [desde, hasta)"""
+        if self.disponible(conexion):
+            tipo = 'BOBINA_ID_BOBI' if por_bobina else 'NULL'
+            query = f"""
+            SELECT {tipo}, ANIO, MES, SUM(BOBINAS), SUM(PESO_TOTAL)
+            FROM ROLLUP_PEDIDOS_MES
+            WHERE (ANIO > :anio_desde OR (ANIO = :anio_desde AND MES >= :mes_desde))
+              AND (ANIO < :anio_hasta OR (ANIO = :anio_hasta AND MES < :mes_hasta))
+              {'AND BOBINA_ID_BOBI <> 0' if por_bobina else ''}
+            GROUP BY {'BOBINA_ID_BOBI, ' if por_bobina else ''}ANIO, MES
+            """
+            params = {'anio_desde': desde // 12, 'mes_desde': desde % 12 + 1,
+                      'anio_hasta': hasta // 12, 'mes_hasta': hasta % 12 + 1}
+        else:
+            tipo = 'R.BOBINA_ID_BOBI' if por_bobina else 'NULL'
+            query = f"""
+            SELECT {tipo}, YEAR(PC.FECHA_PEDIDO), MONTH(PC.FECHA_PEDIDO), COUNT(PD.ID_PEDIDO_DET), SUM(R.PESO)
+            FROM PEDIDO_CAB PC
+            JOIN PEDIDO_DET PD ON PC.ID_PEDIDO = PD.ID_PEDIDO
+            JOIN REGISTROS R ON PD.ID_REGISTRO = R.ID_REGISTRO
+            WHERE PC.FECHA_PEDIDO >= :desde AND PC.FECHA_PEDIDO < :hasta
+              {'AND R.BOBINA_ID_BOBI IS NOT NULL' if por_bobina else ''}
+            GROUP BY {'R.BOBINA_ID_BOBI, ' if por_bobina else ''}YEAR(PC.FECHA_PEDIDO), MONTH(PC.FECHA_PEDIDO)
+            """
+            params = {'desde': fecha_mes(desde), 'hasta': fecha_mes(hasta)}
+        return [
+            (fila[0], indice_mes(fila[1], fila[2]), fila[3], fila[4])
+            for fila in conexion.execute(text(query), params)
+        ]
+
+    def tendencia_mensual(self, conexion, desde, hasta):
+        """(índice de mes, bobinas pedidas, peso total) por mes, en orden"""
+        return sorted((mes, bobinas, peso) for _, mes, bobinas, peso in self._por_mes(conexion, desde, hasta, False))
+
+    def series_bobina(self, conexion, desde, hasta):
+        """(tipo de bobina, índice de mes, bobinas pedidas) para app.pronostico.matriz_series"""
+        return [(bobina, mes, bobinas) for bobina, mes, bobinas, _ in self._por_mes(conexion, desde, hasta, True)]
+
@@ -0,0 +1,9 @@
+from importlib import import_module
+
+# Un blueprint por dominio, en el orden en que se registran
+BLUEPRINTS = ('sistema', 'registros', 'pedidos', 'gestion', 'dashboard', 'usuarios', 'eventos')
+
+
+def registrar_blueprints(app):
+    for nombre in BLUEPRINTS:
+        app.register_blueprint(import_module(f'app.rutas.{nombre}').bp)
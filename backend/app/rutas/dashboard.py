@@ -0,0 +1,277 @@
+import hashlib
+from datetime import datetime
+
+from flask import Blueprint, current_app, jsonify, request
+from sqlalchemy import text
+
+from app.analitica import (bobinas_antiguas_a_dicts, leer_tendencia_mensual, marca_pedidos, memo_pronosticos,
+                           predecir_demanda, snapshot_analitica)
+from app.antiguedad import rangos_tramos
+from app.database import db
+from app.pronostico import MODELOS, Z_NIVEL, fecha_mes, indice_mes, matriz_series, pronosticar, texto_mes
+from app.serializacion import codificar_json, respuesta_json
+from app.servicios import cache_catalogos, indice_antiguedad, rollup_pedidos, servicio_kpis
+
+bp = Blueprint('dashboard', __name__)
+
+
+@bp.route('/api/dashboard/analitica-predictiva', methods=['GET'])
+def get_analitica_predictiva():
+    try:
+        # refresh=1 recalcula en línea; si no, se sirve el último snapshot sin tocar la BD
+        forzar = request.args.get('refresh', '').lower() in ('1', 'true', 'si')
+        data, generado = snapshot_analitica.obtener(forzar=forzar)
+
+        # ETag débil sobre los datos: un recálculo sin cambios no invalida la copia del navegador
+        etag = hashlib.sha1(codificar_json(data)).hexdigest()
+        if request.if_none_match.contains_weak(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = respuesta_json({
+                'success': True,
+                'data': data,
+                'generated_at': generado.isoformat()
+            })
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+        
+    except Exception as e:
+        print("Error en análisis predictivo:", str(e))
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+# Columna de REGISTROS y catálogo con el nombre de cada serie de /api/dashboard/pronostico
+
+
+SERIES_PRONOSTICO = {
+    'bobina': ('BOBINA_ID_BOBI', 'BOBINA', 'ID_BOBI', 'DESC_BOBI'),
+    'proveedor': ('PROVEEDOR_ID_PROV', 'PROVEEDOR', 'ID_PROV', 'NOMBRE_PROV')
+}
+
+
+@bp.route('/api/dashboard/pronostico', methods=['GET'])
+def get_pronostico():
+    try:
+        por = request.args.get('por', 'bobina')
+        modelo = request.args.get('modelo', 'auto')
+        meses = request.args.get('meses', 6, type=int)
+        historia = request.args.get('historia', 24, type=int)
+        nivel = request.args.get('nivel', 0.95, type=float)
+        limite = request.args.get('limite', 0, type=int)
+
+        if por not in SERIES_PRONOSTICO:
+            return jsonify({
+                'success': False,
+                'error': f"por debe ser uno de: {', '.join(SERIES_PRONOSTICO)}"
+            }), 400
+        if modelo not in MODELOS:
+            return jsonify({
+                'success': False,
+                'error': f"modelo debe ser uno de: {', '.join(MODELOS)}"
+            }), 400
+        if nivel not in Z_NIVEL:
+            return jsonify({
+                'success': False,
+                'error': f"nivel debe ser uno de: {', '.join(str(n) for n in Z_NIVEL)}"
+            }), 400
+        if not 1 <= meses <= 24 or not 2 <= historia <= 120:
+            return jsonify({
+                'success': False,
+                'error': 'meses debe estar entre 1 y 24 e historia entre 2 y 120'
+            }), 400
+
+        # Meses cerrados [desde, hasta); el mes en curso queda fuera por estar incompleto
+        hasta = indice_mes(datetime.now().year, datetime.now().month)
+
+        # El resultado solo cambia con pedidos nuevos, otro mes o nombres de catálogo distintos
+        tabla = SERIES_PRONOSTICO[por][1]
+        clave = ('series', por, modelo, meses, historia, nivel, limite, hasta,
+                 marca_pedidos(), cache_catalogos.etag(tabla))
+        etag = hashlib.sha1(repr(clave).encode('utf-8')).hexdigest()
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+        else:
+            data = memo_pronosticos.obtener(
+                clave, lambda: calcular_pronostico_series(por, modelo, meses, historia, nivel, limite, hasta)
+            )
+            response = respuesta_json({
+                'success': True,
+                'data': data
+            })
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    except Exception as e:
+        print('Error en pronóstico:', str(e))
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+def calcular_pronostico_series(por, modelo, meses, historia, nivel, limite, hasta):
+    """Historia y pronóstico de cada BOBINA o PROVEEDOR en los meses cerrados [hasta - historia, hasta)"""
+    columna, tabla, id_col, texto_col = SERIES_PRONOSTICO[por]
+    desde = hasta - historia
+
+    if por == 'bobina':
+        filas = rollup_pedidos.series_bobina(db.session, desde, hasta)
+    else:
+        # YEAR/MONTH en vez de FORMAT: se agrupa sin convertir cada fecha a texto
+        query = f"""
+        SELECT
+            R.{columna} AS CLAVE,
+            YEAR(PC.FECHA_PEDIDO) AS ANIO,
+            MONTH(PC.FECHA_PEDIDO) AS MES,
+            COUNT(PD.ID_PEDIDO_DET) AS CANTIDAD
+        FROM PEDIDO_CAB PC
+        JOIN PEDIDO_DET PD ON PC.ID_PEDIDO = PD.ID_PEDIDO
+        JOIN REGISTROS R ON PD.ID_REGISTRO = R.ID_REGISTRO
+        WHERE PC.FECHA_PEDIDO >= :desde AND PC.FECHA_PEDIDO < :hasta
+          AND R.{columna} IS NOT NULL
+        GROUP BY R.{columna}, YEAR(PC.FECHA_PEDIDO), MONTH(PC.FECHA_PEDIDO)
+        """
+        filas = [
+            (fila[0], indice_mes(fila[1], fila[2]), fila[3])
+            for fila in db.session.execute(text(query), {'desde': fecha_mes(desde), 'hasta': fecha_mes(hasta)})
+        ]
+
+    claves, Y = matriz_series(filas, desde, hasta)
+    modelo_usado, media, inferior, superior = pronosticar(Y, meses, modelo, nivel)
+
+    # Series de mayor volumen primero; limite recorta la respuesta, no el cálculo
+    orden = (-Y.sum(axis=1)).argsort(kind='stable') if len(claves) else []
+    if limite > 0:
+        orden = orden[:limite]
+
+    nombres = {fila[id_col]: fila[texto_col] for fila in cache_catalogos.filas(tabla)}
+    meses_historia = [texto_mes(m) for m in range(desde, hasta)]
+    meses_pronostico = [texto_mes(hasta + i) for i in range(meses)]
+    series = [
+        {
+            'id': claves[i],
+            'nombre': nombres.get(claves[i]),
+            'historico': [int(v) for v in Y[i]],
+            'pronostico': [
+                {
+                    'mes': meses_pronostico[h],
+                    'demanda': round(float(media[i, h]), 2),
+                    'inferior': round(float(inferior[i, h]), 2),
+                    'superior': round(float(superior[i, h]), 2)
+                }
+                for h in range(meses)
+            ]
+        }
+        for i in orden
+    ]
+
+    return {
+        'por': por,
+        'modelo': modelo_usado,
+        'nivel': nivel,
+        'meses_historia': meses_historia,
+        'series': series
+    }
+
+
+NOMBRES_MES = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
+
+
+@bp.route('/api/dashboard/estadisticas', methods=['GET'])
+def get_estadisticas_dashboard():
+    try:
+        kpis = servicio_kpis.obtener()
+
+        # Próximos meses con el mismo pronóstico de la analítica, leyendo solo el rollup mensual:
+        # este endpoint no espera a que se calcule el snapshot completo
+        tendencia_mensual = leer_tendencia_mensual(db.session)
+        prediccion = predecir_demanda(tendencia_mensual, meses=12)
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'estadisticasGenerales': {
+                    'totalBobinas': kpis['disponibles'],
+                    'pedidosPendientes': kpis['pedidos_pendientes'],
+                    'promedioPeso': round(kpis['peso_promedio'], 2)
+                },
+                'bobinasMasUsadas': kpis['bobinas_mas_usadas'][:5],
+                'proximosPedidos': [
+                    {'fecha': f"{p['mes']}-01", 'cantidad': p['demanda_predicha']}
+                    for p in prediccion[:3]
+                ],
+                'prediccionYear': [
+                    {'mes': NOMBRES_MES[int(p['mes'][5:7]) - 1], 'pedidos': p['demanda_predicha']}
+                    for p in prediccion
+                ]
+            }
+        })
+        
+    except Exception as e:
+        print("Error obteniendo estadísticas del dashboard:", str(e))
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/api/dashboard/antiguedad', methods=['GET'])
+def get_antiguedad_inventario():
+    """Bobinas disponibles más antiguas e histograma por tramos de antigüedad, para la rotación FIFO.
+    bobina y ubicacion (IDs) acotan ambos resultados."""
+    try:
+        limite = request.args.get('limite', 20, type=int)
+        bobina = request.args.get('bobina', type=int)
+        ubicacion = request.args.get('ubicacion', type=int)
+        if not 1 <= limite <= 500:
+            return jsonify({
+                'success': False,
+                'error': 'limite debe estar entre 1 y 500'
+            }), 400
+
+        antiguas = indice_antiguedad.mas_antiguas(db.session, limite, bobina, ubicacion)
+        cantidades = indice_antiguedad.histograma(db.session, bobina, ubicacion)
+
+        return respuesta_json({
+            'success': True,
+            'data': {
+                'total': sum(cantidades),
+                'masAntiguas': bobinas_antiguas_a_dicts(antiguas),
+                'histograma': [
+                    {'rango': rango, 'desde_dias': desde, 'hasta_dias': hasta, 'cantidad': cantidad}
+                    for (rango, desde, hasta), cantidad in zip(rangos_tramos(), cantidades)
+                ]
+            }
+        })
+
+    except Exception as e:
+        print('Error obteniendo antigüedad del inventario:', str(e))
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/api/estadisticas')
+def get_estadisticas():
+    try:
+        kpis = servicio_kpis.obtener()
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'total_registros': kpis['total_registros'],
+                'total_peso': kpis['peso_total'],
+                'estados': kpis['por_estado']
+            }
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
@@ -0,0 +1,65 @@
+import os
+import time
+
+from flask import Blueprint, current_app, jsonify, request
+
+from app.eventos import formato_sse
+from app.servicios import bus_eventos
+
+bp = Blueprint('eventos', __name__)
+
+# Segundos que dura una conexión; al cerrarse, EventSource se reconecta solo con Last-Event-ID
+DURACION_EVENTOS = int(os.getenv('EVENTOS_DURACION', 300))
+# Comentario periódico para que proxies y balanceadores no corten una conexión sin eventos
+LATIDO_EVENTOS = 15
+REINTENTO_EVENTOS_MS = 3000
+
+
+@bp.route('/api/eventos')
+def get_eventos():
+    """Server-Sent Events de las escrituras confirmadas: pedido_creado, registros_creados,
+    registros_actualizados y tablas (cambios de otros procesos). Con Last-Event-ID se sigue desde
+    el último evento recibido; si ya no se puede llega 'reiniciar' y el cliente recarga sus datos."""
+    duracion = max(min(request.args.get('duracion', DURACION_EVENTOS, type=int), DURACION_EVENTOS), 0)
+    if bus_eventos.max_clientes <= 0:
+        return jsonify({
+            'success': False,
+            'error': 'Los eventos están desactivados en este servidor (EVENTOS_MAX_CLIENTES=0)'
+        }), 503
+    if not bus_eventos.entrar():
+        # Cada conexión ocupa un hilo del worker: se limita para no dejar sin hilos al resto de la API
+        response = jsonify({
+            'success': False,
+            'error': 'Demasiados clientes de eventos conectados, reintentar más tarde'
+        })
+        response.status_code = 503
+        response.headers['Retry-After'] = str(REINTENTO_EVENTOS_MS // 1000)
+        return response
+
+    inicial = request.headers.get('Last-Event-ID') or bus_eventos.ultimo()
+
+    def flujo():
+        yield f'retry: {REINTENTO_EVENTOS_MS}\n\n'
+        ultimo_id = inicial
+        fin = time.monotonic() + duracion
+        while True:
+            espera = max(min(LATIDO_EVENTOS, fin - time.monotonic()), 0)
+            eventos, completo = bus_eventos.esperar(ultimo_id, espera)
+            if not completo:
+                ultimo_id = bus_eventos.ultimo()
+                yield formato_sse(ultimo_id, 'reiniciar', '{}')
+            for ultimo_id, tipo, datos in eventos:
+                yield formato_sse(ultimo_id, tipo, datos)
+            if not eventos:
+                yield ': latido\n\n'
+            if time.monotonic() >= fin:
+                return
+
+    # Sin stream_with_context: el flujo no usa la BD y la sesión se libera al responder
+    response = current_app.response_class(flujo(), mimetype='text/event-stream')
+    # call_on_close corre aunque el cliente se desconecte antes de recibir el primer trozo
+    response.call_on_close(bus_eventos.salir)
+    response.headers['Cache-Control'] = 'no-cache'
+    # Evita que nginx acumule el flujo en su buffer
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,271 @@
+import unicodedata
+
+from flask import Blueprint, current_app, jsonify, request
+from sqlalchemy import text
+
+from app.database import db
+from app.serializacion import respuesta_json
+from app.servicios import cache_catalogos, versiones_tablas
+
+bp = Blueprint('gestion', __name__)
+
+
+@bp.route('/api/gestion/<tabla>', methods=['GET'])
+def get_tabla_gestion(tabla):
+    try:
+        # Validar tabla permitida
+        tablas_permitidas = ['UBICACION', 'BARCO', 'MOLINO', 'PROVEEDOR', 'ESTADO', 'PROCEDENCIA']
+        if tabla not in tablas_permitidas:
+            return jsonify({
+                'success': False,
+                'error': f'Tabla {tabla} no permitida'
+            }), 400
+
+        # MANTENER LOS NOMBRES DE CAMPOS EN MAYÚSCULAS
+        return respuesta_catalogo([tabla], lambda: [dict(fila) for fila in cache_catalogos.filas(tabla)])
+
+    except Exception as e:
+        print(f"Error obteniendo datos de {tabla}:", str(e))
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/api/gestion/<tabla>', methods=['POST'])
+def agregar_registro_gestion(tabla):
+    try:
+        data = request.get_json()
+        print(f"Agregando registro a {tabla}:", data)
+
+        tablas_permitidas = ['UBICACION', 'BARCO', 'MOLINO', 'PROVEEDOR', 'ESTADO', 'PROCEDENCIA']
+        if tabla not in tablas_permitidas:
+            return jsonify({
+                'success': False,
+                'error': f'Tabla {tabla} no permitida'
+            }), 400
+
+        # Construir query de inserción según tabla - USAR MAYÚSCULAS
+        if tabla == 'UBICACION':
+            query = "INSERT INTO UBICACION (DESC_UBI) VALUES (:DESC_UBI)"
+            params = {'DESC_UBI': data['DESC_UBI']}
+        elif tabla == 'BARCO':
+            query = "INSERT INTO BARCO (NOMBRE_BARCO) VALUES (:NOMBRE_BARCO)"
+            params = {'NOMBRE_BARCO': data['NOMBRE_BARCO']}
+        elif tabla == 'MOLINO':
+            query = "INSERT INTO MOLINO (NOMBRE_MOLINO, PROCEDENCIA_ID_PROCED) VALUES (:NOMBRE_MOLINO, :PROCEDENCIA_ID_PROCED)"
+            params = {
+                'NOMBRE_MOLINO': data['NOMBRE_MOLINO'],
+                'PROCEDENCIA_ID_PROCED': data['PROCEDENCIA_ID_PROCED']
+            }
+        elif tabla == 'PROVEEDOR':
+            query = "INSERT INTO PROVEEDOR (NOMBRE_PROV) VALUES (:NOMBRE_PROV)"
+            params = {'NOMBRE_PROV': data['NOMBRE_PROV']}
+        elif tabla == 'ESTADO':
+            query = "INSERT INTO ESTADO (DESC_ESTADO) VALUES (:DESC_ESTADO)"
+            params = {'DESC_ESTADO': data['DESC_ESTADO']}
+        elif tabla == 'PROCEDENCIA':
+            query = "INSERT INTO PROCEDENCIA (DESC_PROCED) VALUES (:DESC_PROCED)"
+            params = {'DESC_PROCED': data['DESC_PROCED']}
+
+        db.session.execute(text(query), params)
+        versiones_tablas.incrementar(db.session, tabla)
+        db.session.commit()
+        cache_catalogos.invalidar(tabla)
+
+        return jsonify({
+            'success': True,
+            'message': f'Registro agregado exitosamente a {tabla}'
+        })
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error agregando registro a {tabla}:", str(e))
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/api/gestion/<tabla>/<int:id>', methods=['DELETE'])
+def eliminar_registro_gestion(tabla, id):
+    try:
+        tablas_permitidas = ['UBICACION', 'BARCO', 'MOLINO', 'PROVEEDOR', 'ESTADO', 'PROCEDENCIA']
+        if tabla not in tablas_permitidas:
+            return jsonify({
+                'success': False,
+                'error': f'Tabla {tabla} no permitida'
+            }), 400
+
+        # Construir query de eliminación según tabla
+        if tabla == 'UBICACION':
+            query = "DELETE FROM UBICACION WHERE ID_UBI = :id"
+        elif tabla == 'BARCO':
+            query = "DELETE FROM BARCO WHERE ID_BARCO = :id"
+        elif tabla == 'MOLINO':
+            query = "DELETE FROM MOLINO WHERE ID_MOLINO = :id"
+        elif tabla == 'PROVEEDOR':
+            query = "DELETE FROM PROVEEDOR WHERE ID_PROV = :id"
+        elif tabla == 'ESTADO':
+            query = "DELETE FROM ESTADO WHERE ID_ESTADO = :id"
+        elif tabla == 'PROCEDENCIA':
+            query = "DELETE FROM PROCEDENCIA WHERE ID_PROCED = :id"
+
+        result = db.session.execute(text(query), {'id': id})
+        if result.rowcount > 0:
+            versiones_tablas.incrementar(db.session, tabla)
+        db.session.commit()
+
+        if result.rowcount > 0:
+            cache_catalogos.invalidar(tabla)
+            return jsonify({
+                'success': True,
+                'message': f'Registro eliminado exitosamente de {tabla}'
+            })
+        else:
+            return jsonify({
+                'success': False,
+                'error': 'Registro no encontrado'
+            }), 404
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error eliminando registro de {tabla}:", str(e))
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/api/tablas')
+def get_tablas():
+    try:
+        result = db.session.execute(text("""
+            SELECT TABLE_NAME, TABLE_TYPE 
+            FROM INFORMATION_SCHEMA.TABLES 
+            WHERE TABLE_TYPE = 'BASE TABLE'
+            ORDER BY TABLE_NAME
+        """))
+        tables = [{'nombre': row[0], 'tipo': row[1]} for row in result]
+        return jsonify({
+            'success': True,
+            'data': tables,
+            'total': len(tables)
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/api/opciones-combos')
+def get_opciones_combos():
+    try:
+        # Obtener todas las opciones para los combos
+        def construir():
+            return {
+                'bobinas': [{'id': f['ID_BOBI'], 'descripcion': f['DESC_BOBI']} for f in cache_catalogos.filas('BOBINA')],
+                'proveedores': [{'id': f['ID_PROV'], 'nombre': f['NOMBRE_PROV']} for f in cache_catalogos.filas('PROVEEDOR')],
+                'barcos': [{'id': f['ID_BARCO'], 'nombre': f['NOMBRE_BARCO']} for f in cache_catalogos.filas('BARCO')],
+                'ubicaciones': [{'id': f['ID_UBI'], 'descripcion': f['DESC_UBI']} for f in cache_catalogos.filas('UBICACION')],
+                'estados': [{'id': f['ID_ESTADO'], 'descripcion': f['DESC_ESTADO']} for f in cache_catalogos.filas('ESTADO')],
+                'molinos': [{'id': f['ID_MOLINO'], 'nombre': f['NOMBRE_MOLINO']} for f in cache_catalogos.filas('MOLINO')]
+            }
+
+        return respuesta_catalogo(['BOBINA', 'PROVEEDOR', 'BARCO', 'UBICACION', 'ESTADO', 'MOLINO'], construir)
+    except Exception as e:
+        print('Error obteniendo opciones combos:', str(e))
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+def respuesta_catalogo(tablas, construir):
+    """Responde datos de catálogo desde memoria, con revalidación por ETag"""
+    # El ETag se toma antes de leer los datos para no asociar datos viejos a una versión nueva
+    etag = cache_catalogos.etag(*tablas)
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = respuesta_json({
+            'success': True,
+            'data': construir()
+        })
+    response.set_etag(etag)
+    # Obliga al navegador a revalidar siempre; si nada cambió recibe un 304 sin cuerpo
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def clave_texto(texto):
+    """Clave de orden como la collation de la BD (CI_AS): sin mayúsculas, y cada letra acentuada
+    junto a su letra base ('Álamo' entre 'alamo' y 'b'); el texto original solo desempata"""
+    texto = (texto or '').casefold()
+    base = ''.join(c for c in unicodedata.normalize('NFKD', texto) if not unicodedata.combining(c))
+    return base, texto
+
+
+def ordenar_por(filas, columna):
+    """Ordena filas de catálogo por texto, en el orden que daba el ORDER BY de la BD"""
+    return sorted(filas, key=lambda f: clave_texto(f[columna]))
+
+
+@bp.route('/api/proveedores')
+def get_proveedores():
+    try:
+        def construir():
+            filas = ordenar_por(cache_catalogos.filas('PROVEEDOR'), 'NOMBRE_PROV')
+            return [{'id': f['ID_PROV'], 'nombre': f['NOMBRE_PROV']} for f in filas]
+
+        return respuesta_catalogo(['PROVEEDOR'], construir)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/api/bobinas')
+def get_bobinas():
+    try:
+        def construir():
+            filas = ordenar_por(cache_catalogos.filas('BOBINA'), 'DESC_BOBI')
+            return [{'id': f['ID_BOBI'], 'descripcion': f['DESC_BOBI'], 'laminacion': f['LAM_BOBI'], 'espesor': float(f['ESPESOR_BOBI']), 'ancho': f['ANCHO_BOBI']} for f in filas]
+
+        return respuesta_catalogo(['BOBINA'], construir)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/api/estados')
+def get_estados():
+    try:
+        def construir():
+            return [{'id': f['ID_ESTADO'], 'descripcion': f['DESC_ESTADO']} for f in cache_catalogos.filas('ESTADO')]
+
+        return respuesta_catalogo(['ESTADO'], construir)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/api/ubicaciones')
+def get_ubicaciones():
+    try:
+        def construir():
+            filas = ordenar_por(cache_catalogos.filas('UBICACION'), 'DESC_UBI')
+            return [{'id': f['ID_UBI'], 'descripcion': f['DESC_UBI']} for f in filas]
+
+        return respuesta_catalogo(['UBICACION'], construir)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
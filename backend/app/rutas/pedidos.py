@@ -0,0 +1,404 @@
+from flask import Blueprint, jsonify, request
+from sqlalchemy import bindparam, text
+
+from app.analitica import snapshot_analitica
+from app.busqueda import escapar_like
+from app.conteos import MODOS_CONTEO
+from app.database import db
+from app.eventos import ids_evento
+from app.exportacion import FORMATOS_EXPORTACION
+from app.listados import filtros_busqueda, respuesta_exportacion
+from app.lotes import en_lotes
+from app.paginacion import CursorInvalido, codificar_cursor, decodificar_cursor
+from app.serializacion import filas_a_dicts, respuesta_json
+from app.servicios import (bus_eventos, cache_conteos, indice_antiguedad, rollup_pedidos, servicio_kpis,
+                           versiones_tablas)
+
+bp = Blueprint('pedidos', __name__)
+
+
+COLUMNAS_DESPACHOS = """
+        SELECT
+            pd.ID_PEDIDO_DET,
+            pd.ID_PEDIDO,
+            pd.ID_REGISTRO,
+            pc.FECHA_PEDIDO,
+            u.NOMBRE_USUARIO + ' ' + u.APELLIDO_USUARIO AS SOLICITANTE,
+            ep.DESCRIPCION AS ESTADO_PEDIDO,
+            pd.PED_OBSERVACIONES,
+            pd.ESTADO_DESPACHO,
+            r.PEDIDO_COMPRA,
+            r.COLADA,
+            r.PESO,
+            b.DESC_BOBI AS BOBINA_DESC,
+            p.NOMBRE_PROV AS PROVEEDOR_NOMBRE,
+            CASE WHEN pd.ESTADO_DESPACHO = 1 THEN pc.FECHA_PEDIDO ELSE NULL END AS FECHA_DESPACHO"""
+
+
+ORIGEN_DESPACHOS = """
+        FROM PEDIDO_DET pd
+        JOIN PEDIDO_CAB pc ON pc.ID_PEDIDO = pd.ID_PEDIDO
+        JOIN USUARIOS u ON u.ID_USUARIO = pc.USUARIO_SOLICITA_ID
+        JOIN ESTADO_PEDIDO ep ON ep.ID_ESTADO_PED = pc.ESTADO_PEDIDO_ID
+        JOIN REGISTROS r ON r.ID_REGISTRO = pd.ID_REGISTRO
+        LEFT JOIN BOBINA b ON b.ID_BOBI = r.BOBINA_ID_BOBI
+        LEFT JOIN PROVEEDOR p ON p.ID_PROV = r.PROVEEDOR_ID_PROV
+        WHERE 1=1
+        """
+
+
+def filtros_despachos(search):
+    """Condiciones WHERE y parámetros de los filtros de /api/despachos/historial"""
+    filtros = ""
+    params = {}
+
+    if search:
+        filtros_indice, params_indice = filtros_busqueda(search)
+        filtros += filtros_indice
+        params.update(params_indice)
+        filtros += " AND (r.PEDIDO_COMPRA LIKE :search OR r.COLADA LIKE :search OR b.DESC_BOBI LIKE :search OR p.NOMBRE_PROV LIKE :search)"
+        params['search'] = f"%{escapar_like(search)}%"
+
+    return filtros, params
+
+
+@bp.route('/api/despachos/historial/exportar')
+def exportar_historial_despachos():
+    try:
+        formato = request.args.get('formato', 'csv')
+        if formato not in FORMATOS_EXPORTACION:
+            return jsonify({
+                'success': False,
+                'error': f"formato debe ser uno de: {', '.join(FORMATOS_EXPORTACION)}"
+            }), 400
+
+        # Mismos JOINs y filtros que /api/despachos/historial, sin paginar
+        filtros, params = filtros_despachos(request.args.get('search', ''))
+        query = COLUMNAS_DESPACHOS + ORIGEN_DESPACHOS + filtros + " ORDER BY pd.ID_PEDIDO DESC, pd.ID_PEDIDO_DET DESC"
+
+        return respuesta_exportacion(query, params, formato, 'despachos')
+
+    except Exception as e:
+        print('Error exportando historial de despachos:', str(e))
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/api/pedidos', methods=['POST'])
+def crear_pedido():
+    try:
+        data = request.get_json()
+
+        # Validar datos requeridos
+        if not data or 'usuario_solicita_id' not in data or 'registros' not in data:
+            return jsonify({
+                'success': False,
+                'error': 'Datos incompletos: se requiere usuario_solicita_id y registros'
+            }), 400
+
+        # 1. Crear cabecera del pedido - CORREGIDO
+        query_cab = """
+        INSERT INTO PEDIDO_CAB (FECHA_PEDIDO, USUARIO_SOLICITA_ID, ESTADO_PEDIDO_ID, OBSERVACIONES)
+        OUTPUT INSERTED.ID_PEDIDO
+        VALUES (SYSDATETIME(), :usuario_id, 2, :observaciones)
+        """
+        params_cab = {
+            'usuario_id': data['usuario_solicita_id'],
+            'observaciones': data.get('observaciones', '')
+        }
+
+        result = db.session.execute(text(query_cab), params_cab)
+        id_pedido = result.scalar()  # Usar scalar() en lugar de fetchone()
+
+        if not id_pedido:
+            raise Exception("No se pudo obtener el ID del pedido creado")
+
+        # 2. Crear detalle del pedido Y ACTUALIZAR ESTADO DE BOBINAS
+        # Sentencias por conjunto (INSERT ... SELECT / UPDATE ... IN) sobre lotes de IDs,
+        # así el número de viajes a la BD no crece con el tamaño del pedido
+        ids_registros = list(dict.fromkeys(data['registros']))
+        if ids_registros:
+            query_det = text("""
+            INSERT INTO PEDIDO_DET (ID_PEDIDO, ID_REGISTRO, ESTADO_DESPACHO, PED_OBSERVACIONES)
+            SELECT :id_pedido, r.ID_REGISTRO, 1, :observaciones
+            FROM REGISTROS r
+            WHERE r.ID_REGISTRO IN :ids_registros
+            """).bindparams(bindparam('ids_registros', expanding=True))
+            
+            query_update_estado = text("""
+            UPDATE REGISTROS 
+            SET ESTADO_ID_ESTADO = 2 -- 2 = 'Despachada'
+            WHERE ID_REGISTRO IN :ids_registros
+            """).bindparams(bindparam('ids_registros', expanding=True))
+
+            insertados = 0
+            for lote in en_lotes(ids_registros):
+                # Insertar en detalle de pedido
+                insertados += db.session.execute(query_det, {
+                    'id_pedido': id_pedido,
+                    'observaciones': data.get('observaciones', 'Despachado desde sistema'),
+                    'ids_registros': lote
+                }).rowcount
+
+                # Actualizar estado de las bobinas a "Despachada"
+                db.session.execute(query_update_estado, {'ids_registros': lote})
+
+            if insertados != len(ids_registros):
+                raise Exception(f"{len(ids_registros) - insertados} registros del pedido no existen")
+
+            # En la misma transacción: el pedido y sus totales diarios/mensuales se confirman juntos
+            rollup_pedidos.registrar_pedido(db.session, id_pedido)
+
+        versiones_tablas.incrementar(db.session, 'PEDIDO_CAB', 'PEDIDO_DET', 'REGISTROS')
+        db.session.commit()
+        indice_antiguedad.quitar(ids_registros)
+        servicio_kpis.invalidar()
+        cache_conteos.invalidar()
+        snapshot_analitica.marcar_desactualizado()
+        bus_eventos.publicar('pedido_creado', dict(ids_evento(ids_registros), id_pedido=id_pedido))
+
+        return jsonify({
+            'success': True,
+            'id_pedido': id_pedido,
+            'message': f'Pedido #{id_pedido} creado exitosamente con {len(ids_registros)} bobinas'
+        })
+
+    except Exception as e:
+        db.session.rollback()
+        print('Error al crear pedido:', str(e))
+        return jsonify({
+            'success': False,
+            'error': f'Error al crear pedido: {str(e)}'
+        }), 500
+
+
+@bp.route('/api/despachos/historial')
+@versiones_tablas.condicional('PEDIDO_DET', 'PEDIDO_CAB', 'USUARIOS', 'ESTADO_PEDIDO', 'REGISTROS', 'BOBINA', 'PROVEEDOR')
+def get_historial_despachos():
+    try:
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 10, type=int)
+        search = request.args.get('search', '')
+        # Si llega 'cursor' (aunque sea vacío) se pagina por clave en vez de por OFFSET
+        cursor = request.args.get('cursor')
+        # exact: total exacto, approx: total cacheado, none: sin total
+        count_mode = request.args.get('count', 'none' if cursor is not None else 'exact')
+
+        if count_mode not in MODOS_CONTEO:
+            return jsonify({
+                'success': False,
+                'error': f"count debe ser uno de: {', '.join(MODOS_CONTEO)}"
+            }), 400
+        if page < 1 or per_page < 1:
+            return jsonify({
+                'success': False,
+                'error': 'page y per_page deben ser mayores que 0'
+            }), 400
+
+        # Consulta para obtener todos los despachos (PEDIDO_DET)
+        query = COLUMNAS_DESPACHOS
+
+        # FROM/WHERE compartido por la consulta de datos y la de conteo
+        filtros, params = filtros_despachos(search)
+        origen = ORIGEN_DESPACHOS + filtros
+
+        count_query = "SELECT COUNT(*)" + origen
+
+        # En modo página el total exacto viaja en la misma consulta como función de ventana
+        contar_en_consulta = count_mode == 'exact' and cursor is None
+        if contar_en_consulta:
+            query += ",\n            COUNT(*) OVER() AS TOTAL_FILAS"
+        query += origen
+
+        total = None
+        if count_mode == 'approx':
+            total = cache_conteos.obtener(
+                ('despachos', search),
+                lambda p=dict(params): db.session.execute(text(count_query), p).scalar()
+            )
+        elif count_mode == 'exact' and cursor is not None:
+            # Con cursor la ventana solo vería las filas posteriores al cursor
+            total = db.session.execute(text(count_query), params).scalar()
+
+        if cursor is not None:
+            # Paginación por clave sobre (ID_PEDIDO, ID_PEDIDO_DET) descendente. No se usa
+            # FECHA_PEDIDO: datetime2(7) no vuelve igual desde Python y la igualdad del
+            # cursor dejaría de coincidir, saltando las líneas restantes del pedido
+            if cursor:
+                cursor_pedido, cursor_id = decodificar_cursor(cursor, 2)
+                if not all(isinstance(v, int) and not isinstance(v, bool) for v in (cursor_pedido, cursor_id)):
+                    raise CursorInvalido('Cursor inválido: valor de clave no admitido')
+                query += " AND (pd.ID_PEDIDO < :cursor_pedido OR (pd.ID_PEDIDO = :cursor_pedido AND pd.ID_PEDIDO_DET < :cursor_id))"
+                params['cursor_pedido'] = cursor_pedido
+                params['cursor_id'] = cursor_id
+            query += " ORDER BY pd.ID_PEDIDO DESC, pd.ID_PEDIDO_DET DESC OFFSET 0 ROWS FETCH NEXT :limit ROWS ONLY"
+            # Se pide una fila extra solo para saber si hay más páginas
+            params['limit'] = per_page + 1
+        else:
+            # Consulta principal con paginación
+            query += " ORDER BY pd.ID_PEDIDO DESC, pd.ID_PEDIDO_DET DESC OFFSET :offset ROWS FETCH NEXT :limit ROWS ONLY"
+            params['offset'] = (page - 1) * per_page
+            params['limit'] = per_page
+
+        rows = db.session.execute(text(query), params).fetchall()
+
+        if contar_en_consulta:
+            if rows:
+                total = rows[0][14]
+            elif page > 1:
+                # Página fuera de rango: no hay filas que traigan el total
+                total = db.session.execute(text(count_query), params).scalar()
+            else:
+                total = 0
+
+        next_cursor = None
+        if cursor is not None and len(rows) > per_page:
+            rows = rows[:per_page]
+            next_cursor = codificar_cursor(rows[-1][1], rows[-1][0])
+
+        despachos = []
+        for row in rows:
+            despacho = {
+                'id_pedido_det': row[0],
+                'id_pedido': row[1],
+                'id_registro': row[2],
+                'fecha_pedido': row[3].isoformat() if hasattr(row[3], 'isoformat') else str(row[3]),
+                'solicitante': row[4],
+                'estado_pedido': row[5],
+                'ped_observaciones': row[6] or '',
+                'estado_despacho': bool(row[7]),
+                'pedido_compra': row[8],
+                'colada': row[9],
+                'peso': float(row[10]) if row[10] else 0,
+                'bobina_desc': row[11] or 'Sin información',
+                'proveedor_nombre': row[12] or 'Sin proveedor',
+                'fecha_despacho': row[13].isoformat() if row[13] and hasattr(row[13], 'isoformat') else (str(row[13]) if row[13] else None)
+            }
+            despachos.append(despacho)
+
+        if cursor is not None:
+            pagination = {
+                'per_page': per_page,
+                'total': total,
+                'count': count_mode,
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
+            }
+        else:
+            pagination = {
+                'page': page,
+                'per_page': per_page,
+                'total': total,
+                'count': count_mode,
+                'pages': ((total + per_page - 1) // per_page if total > 0 else 1) if total is not None else None
+            }
+
+        return respuesta_json({
+            'success': True,
+            'data': despachos,
+            'pagination': pagination
+        })
+
+    except CursorInvalido as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        print('Error en historial despachos:', str(e))
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/api/pedidos/en-curso')
+@versiones_tablas.condicional('PEDIDO_CAB', 'PEDIDO_DET', 'USUARIOS', 'ESTADO_PEDIDO')
+def get_pedidos_en_curso():
+    try:
+        query = """
+        SELECT
+            pc.ID_PEDIDO,
+            pc.FECHA_PEDIDO,
+            u.NOMBRE_USUARIO + ' ' + u.APELLIDO_USUARIO AS SOLICITANTE,
+            ep.DESCRIPCION AS ESTADO_PEDIDO,
+            pc.OBSERVACIONES,
+            COUNT(pd.ID_PEDIDO_DET) AS CANT_BOBINAS
+        FROM PEDIDO_CAB pc
+        JOIN USUARIOS u ON u.ID_USUARIO = pc.USUARIO_SOLICITA_ID
+        JOIN ESTADO_PEDIDO ep ON ep.ID_ESTADO_PED = pc.ESTADO_PEDIDO_ID
+        LEFT JOIN PEDIDO_DET pd ON pd.ID_PEDIDO = pc.ID_PEDIDO
+        WHERE ep.DESCRIPCION IN ('Borrador', 'Enviado', 'Procesando')
+        GROUP BY 
+            pc.ID_PEDIDO, pc.FECHA_PEDIDO, u.NOMBRE_USUARIO, u.APELLIDO_USUARIO, 
+            ep.DESCRIPCION, pc.OBSERVACIONES
+        ORDER BY pc.FECHA_PEDIDO DESC
+        """
+        
+        result = db.session.execute(text(query))
+        pedidos = []
+        
+        for row in result:
+            pedido = {
+                'id_pedido': row[0],
+                'fecha_pedido': row[1].isoformat() if hasattr(row[1], 'isoformat') else str(row[1]),
+                'solicitante': row[2],
+                'estado_pedido': row[3],
+                'observaciones': row[4],
+                'cant_bobinas': row[5]
+            }
+            pedidos.append(pedido)
+
+        return respuesta_json({
+            'success': True,
+            'data': pedidos
+        })
+
+    except Exception as e:
+        print('Error en pedidos en curso:', str(e))
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/api/pedidos/<int:id_pedido>/detalle')
+@versiones_tablas.condicional('PEDIDO_DET', 'REGISTROS', 'BOBINA', 'PROVEEDOR')
+def get_detalle_pedido(id_pedido):
+    try:
+        query = """
+        SELECT 
+            r.ID_REGISTRO,
+            r.PEDIDO_COMPRA,
+            r.COLADA,
+            r.PESO,
+            r.CANTIDAD,
+            r.LOTE,
+            r.COD_BOBIN2,
+            b.DESC_BOBI,
+            p.NOMBRE_PROV,
+            r.FECHA_INGRESO_PLANTA
+        FROM PEDIDO_DET pd
+        JOIN REGISTROS r ON r.ID_REGISTRO = pd.ID_REGISTRO
+        LEFT JOIN BOBINA b ON b.ID_BOBI = r.BOBINA_ID_BOBI
+        LEFT JOIN PROVEEDOR p ON p.ID_PROV = r.PROVEEDOR_ID_PROV
+        WHERE pd.ID_PEDIDO = :id_pedido
+        ORDER BY r.ID_REGISTRO
+        """
+        
+        result = db.session.execute(text(query), {'id_pedido': id_pedido})
+        
+        detalles = filas_a_dicts(result)
+        
+        return respuesta_json({
+            'success': True,
+            'data': detalles
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
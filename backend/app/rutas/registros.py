@@ -0,0 +1,576 @@
+from flask import Blueprint, jsonify, request
+from sqlalchemy import bindparam, text
+
+from app.analitica import snapshot_analitica
+from app.antiguedad import CAMPOS_ANTIGUEDAD
+from app.busqueda import CAMPOS_INDEXADOS, escapar_like
+from app.cambios import MAX_CAMBIOS, codificar_token, decodificar_token
+from app.conteos import MODOS_CONTEO
+from app.database import db
+from app.edicion import MAX_EDICIONES, EditorRegistros
+from app.eventos import ids_evento
+from app.exportacion import FORMATOS_EXPORTACION
+from app.importacion import ImportadorRegistros, leer_filas
+from app.listados import filtros_busqueda, respuesta_exportacion
+from app.paginacion import CursorInvalido, codificar_cursor, decodificar_cursor
+from app.registros import CAMPOS_DB, CAMPOS_EDITABLES, campos_con_valor, completar_obligatorios
+from app.rollups import CAMPOS_ROLLUP
+from app.serializacion import filas_a_dicts, respuesta_json
+from app.servicios import (bus_eventos, cache_catalogos, cache_conteos, cambios_registros, indice_antiguedad,
+                           indice_busqueda, rollup_pedidos, servicio_kpis, versiones_tablas)
+
+bp = Blueprint('registros', __name__)
+
+
+@bp.route('/api/registros/<int:id_registro>', methods=['PUT', 'OPTIONS'])
+def actualizar_registro(id_registro):
+    if request.method == 'OPTIONS':
+        return jsonify({'success': True}), 200
+        
+    try:
+        data = request.get_json()
+
+        # Construir query dinámicamente basado en los campos proporcionados
+        update_fields = []
+        params = {'id_registro': id_registro}
+
+        for campo in CAMPOS_EDITABLES:
+            if campo in data and data[campo] is not None:
+                update_fields.append(f"{campo.upper()} = :{campo}")
+                params[campo] = data[campo]
+
+        if not update_fields:
+            return jsonify({
+                'success': False,
+                'error': 'No se proporcionaron campos para actualizar'
+            }), 400
+
+        query = f"UPDATE REGISTROS SET {', '.join(update_fields)} WHERE ID_REGISTRO = :id_registro"
+        result = db.session.execute(text(query), params)
+        if result.rowcount > 0:
+            if any(campo.upper() in CAMPOS_INDEXADOS for campo in params):
+                indice_busqueda.indexar(db.session, [id_registro])
+            if any(campo.upper() in CAMPOS_ROLLUP for campo in params):
+                rollup_pedidos.registros_modificados(db.session, [id_registro])
+            versiones_tablas.incrementar(db.session, 'REGISTROS')
+        db.session.commit()
+
+        if result.rowcount > 0:
+            if any(campo.upper() in CAMPOS_ANTIGUEDAD for campo in params):
+                indice_antiguedad.actualizar(db.session, [id_registro])
+            servicio_kpis.invalidar()
+            cache_conteos.invalidar()
+            snapshot_analitica.marcar_desactualizado()
+            bus_eventos.publicar('registros_actualizados', ids_evento([id_registro]))
+            return jsonify({
+                'success': True,
+                'message': f'Registro {id_registro} actualizado exitosamente'
+            })
+        else:
+            return jsonify({
+                'success': False,
+                'error': 'Registro no encontrado'
+            }), 404
+
+    except Exception as e:
+        db.session.rollback()
+        print('Error al actualizar registro:', str(e))
+        return jsonify({
+            'success': False,
+            'error': f'Error al actualizar registro: {str(e)}'
+        }), 500
+
+
+@bp.route('/api/registros', methods=['PATCH'])
+def actualizar_registros_lote():
+    """Edita varios registros en una transacción. Cuerpo: {"registros": [{"id": 1, "campos": {...}}, ...]}
+    con los mismos campos que el PUT de un registro; devuelve el resultado de cada edición."""
+    try:
+        data = request.get_json(silent=True) or {}
+        ediciones = data.get('registros')
+        if not isinstance(ediciones, list) or not ediciones:
+            return jsonify({
+                'success': False,
+                'error': 'Se requiere registros: una lista de {id, campos}'
+            }), 400
+        if len(ediciones) > MAX_EDICIONES:
+            return jsonify({
+                'success': False,
+                'error': f'Se aceptan como máximo {MAX_EDICIONES} registros por petición'
+            }), 400
+        # todo_o_nada=1 descarta todas las ediciones si alguna tiene errores
+        todo_o_nada = request.args.get('todo_o_nada', '').lower() in ('1', 'true', 'si')
+
+        editor = EditorRegistros(db.session, cache_catalogos)
+        for edicion in ediciones:
+            editor.agregar(edicion)
+        editor.finalizar()
+        if todo_o_nada and editor.errores:
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'error': 'Hay ediciones con errores; no se actualizó ningún registro',
+                'resultados': editor.resultados
+            }), 400
+
+        if editor.campos_modificados.intersection(CAMPOS_INDEXADOS):
+            indice_busqueda.indexar(db.session, editor.actualizados)
+        if editor.campos_modificados.intersection(CAMPOS_ROLLUP):
+            rollup_pedidos.registros_modificados(db.session, editor.actualizados)
+        if editor.actualizados:
+            versiones_tablas.incrementar(db.session, 'REGISTROS')
+        db.session.commit()
+
+        if editor.actualizados:
+            if editor.campos_modificados.intersection(CAMPOS_ANTIGUEDAD):
+                indice_antiguedad.actualizar(db.session, editor.actualizados)
+            servicio_kpis.invalidar()
+            cache_conteos.invalidar()
+            snapshot_analitica.marcar_desactualizado()
+            bus_eventos.publicar('registros_actualizados', ids_evento(editor.actualizados))
+
+        return jsonify({
+            'success': True,
+            'message': f'{len(editor.actualizados)} registros actualizados',
+            'resultados': editor.resultados
+        })
+
+    except Exception as e:
+        db.session.rollback()
+        print('Error al actualizar registros:', str(e))
+        return jsonify({
+            'success': False,
+            'error': f'Error al actualizar registros: {str(e)}'
+        }), 500
+
+
+@bp.route('/api/registros', methods=['POST'])
+def crear_registro():
+    try:
+        data = request.get_json()
+
+        campos = []
+        valores = []
+        params = {}
+
+        completar_obligatorios(data)
+
+        for campo_front, valor in campos_con_valor(data).items():
+            campos.append(CAMPOS_DB[campo_front])
+            valores.append(f':{campo_front}')
+            params[campo_front] = valor
+
+        if not campos:
+            return jsonify({
+                'success': False,
+                'error': 'No se proporcionaron datos para crear el registro'
+            }), 400
+
+        # OUTPUT devuelve el ID en la misma sentencia; SCOPE_IDENTITY() en otra
+        # ejecución posterior al commit no garantiza ver el insert
+        query = f"INSERT INTO REGISTROS ({', '.join(campos)}) OUTPUT INSERTED.ID_REGISTRO VALUES ({', '.join(valores)})"
+
+        id_registro = db.session.execute(text(query), params).scalar()
+        indice_busqueda.indexar(db.session, [id_registro])
+        versiones_tablas.incrementar(db.session, 'REGISTROS')
+        db.session.commit()
+        indice_antiguedad.actualizar(db.session, [id_registro])
+        servicio_kpis.invalidar()
+        cache_conteos.invalidar()
+        snapshot_analitica.marcar_desactualizado()
+        bus_eventos.publicar('registros_creados', ids_evento([id_registro]))
+        
+        return jsonify({
+            'success': True,
+            'message': 'Registro creado exitosamente',
+            'id_registro': id_registro
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        print('Error al crear registro:', str(e))
+        return jsonify({
+            'success': False,
+            'error': f'Error al crear registro: {str(e)}'
+        }), 500
+
+
+# Consultas compartidas por los listados paginados y las exportaciones
+
+
+COLUMNAS_REGISTROS = """
+        SELECT
+            r.ID_REGISTRO,
+            r.FECHA_LLEGADA,
+            r.PEDIDO_COMPRA,
+            r.COLADA,
+            r.PESO,
+            r.CANTIDAD,
+            r.LOTE,
+            r.FECHA_INVENTARIO,
+            r.OBSERVACIONES,
+            r.TON_PEDIDO_COMPRA,
+            r.FECHA_INGRESO_PLANTA,
+            r.BOBINA_ID_BOBI,
+            b.DESC_BOBI as BOBINA_DESC,
+            r.PROVEEDOR_ID_PROV,
+            p.NOMBRE_PROV as PROVEEDOR_NOMBRE,
+            r.BARCO_ID_BARCO,
+            bc.NOMBRE_BARCO as BARCO_NOMBRE,
+            r.UBICACION_ID_UBI,
+            u.DESC_UBI as UBICACION_DESC,
+            r.ESTADO_ID_ESTADO,
+            e.DESC_ESTADO as ESTADO_DESC,
+            r.MOLINO_ID_MOLINO,
+            m.NOMBRE_MOLINO as MOLINO_NOMBRE,
+            r.N_BOBI_PROVEEDOR,
+            r.BOBI_CORRELATIVO,
+            r.COD_BOBIN2"""
+
+
+# Catálogos con que ORIGEN_REGISTROS completa cada registro
+TABLAS_CATALOGO_REGISTROS = ('BOBINA', 'PROVEEDOR', 'BARCO', 'UBICACION', 'ESTADO', 'MOLINO')
+
+
+ORIGEN_REGISTROS = """
+        FROM REGISTROS r
+        LEFT JOIN BOBINA b ON r.BOBINA_ID_BOBI = b.ID_BOBI
+        LEFT JOIN PROVEEDOR p ON r.PROVEEDOR_ID_PROV = p.ID_PROV
+        LEFT JOIN BARCO bc ON r.BARCO_ID_BARCO = bc.ID_BARCO
+        LEFT JOIN UBICACION u ON r.UBICACION_ID_UBI = u.ID_UBI
+        LEFT JOIN ESTADO e ON r.ESTADO_ID_ESTADO = e.ID_ESTADO
+        LEFT JOIN MOLINO m ON r.MOLINO_ID_MOLINO = m.ID_MOLINO
+        WHERE 1=1
+        """
+
+
+def filtros_registros(search, estado):
+    """Condiciones WHERE y parámetros de los filtros de /api/registros"""
+    filtros = ""
+    params = {}
+
+    # Filtrar por estado si se proporciona
+    if estado:
+        filtros += " AND r.ESTADO_ID_ESTADO = :estado"
+        params['estado'] = estado
+
+    if search:
+        filtros_indice, params_indice = filtros_busqueda(search)
+        filtros += filtros_indice
+        params.update(params_indice)
+        filtros += " AND (r.PEDIDO_COMPRA LIKE :search OR r.COLADA LIKE :search OR r.OBSERVACIONES LIKE :search OR p.NOMBRE_PROV LIKE :search OR b.DESC_BOBI LIKE :search OR r.COD_BOBIN2 LIKE :search)"
+        params['search'] = f"%{escapar_like(search)}%"
+
+    return filtros, params
+
+
+@bp.route('/api/registros/exportar')
+def exportar_registros():
+    try:
+        formato = request.args.get('formato', 'csv')
+        if formato not in FORMATOS_EXPORTACION:
+            return jsonify({
+                'success': False,
+                'error': f"formato debe ser uno de: {', '.join(FORMATOS_EXPORTACION)}"
+            }), 400
+
+        # Mismos JOINs y filtros que /api/registros, sin paginar
+        filtros, params = filtros_registros(request.args.get('search', ''), request.args.get('estado', ''))
+        query = COLUMNAS_REGISTROS + ORIGEN_REGISTROS + filtros + " ORDER BY r.FECHA_INGRESO_PLANTA ASC, r.ID_REGISTRO ASC"
+
+        return respuesta_exportacion(query, params, formato, 'registros')
+
+    except Exception as e:
+        print('Error exportando registros:', str(e))
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/api/registros/importar', methods=['POST'])
+def importar_registros():
+    try:
+        # Valores comunes a todas las filas, p. ej. barco_id_barco de la descarga de un barco
+        valores_por_defecto = {
+            campo: valor
+            for origen in (request.args, request.form)
+            for campo, valor in origen.items()
+            if campo in CAMPOS_DB and valor != ''
+        }
+        # todo_o_nada=1 descarta la importación completa si alguna fila tiene errores
+        todo_o_nada = request.args.get('todo_o_nada', '').lower() in ('1', 'true', 'si')
+
+        importador = ImportadorRegistros(db.session, cache_catalogos, valores_por_defecto)
+        for numero, fila in leer_filas(request):
+            importador.agregar(numero, fila)
+        importador.finalizar()
+        indice_busqueda.indexar(db.session, [item['id_registro'] for item in importador.ids])
+        if importador.ids:
+            versiones_tablas.incrementar(db.session, 'REGISTROS')
+
+        if todo_o_nada and importador.errores:
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'error': 'Hay filas con errores; no se importó ningún registro',
+                'procesadas': importador.procesadas,
+                'errores': importador.errores
+            }), 400
+
+        db.session.commit()
+        if importador.ids:
+            indice_antiguedad.actualizar(db.session, [item['id_registro'] for item in importador.ids])
+            servicio_kpis.invalidar()
+            cache_conteos.invalidar()
+            snapshot_analitica.marcar_desactualizado()
+            bus_eventos.publicar('registros_creados', ids_evento(item['id_registro'] for item in importador.ids))
+
+        return jsonify({
+            'success': True,
+            'message': f'{len(importador.ids)} registros importados',
+            'procesadas': importador.procesadas,
+            'ids': importador.ids,
+            'errores': importador.errores
+        })
+
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        db.session.rollback()
+        print('Error al importar registros:', str(e))
+        return jsonify({
+            'success': False,
+            'error': f'Error al importar registros: {str(e)}'
+        }), 500
+
+
+@bp.route('/api/registros')
+@versiones_tablas.condicional('REGISTROS', *TABLAS_CATALOGO_REGISTROS)
+def get_registros():
+    try:
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 10, type=int)
+        search = request.args.get('search', '')
+        estado = request.args.get('estado', '')  # Nuevo filtro por estado
+        # Si llega 'cursor' (aunque sea vacío) se pagina por clave en vez de por OFFSET
+        cursor = request.args.get('cursor')
+        # exact: total exacto, approx: total cacheado, none: sin total
+        count_mode = request.args.get('count', 'none' if cursor is not None else 'exact')
+
+        if count_mode not in MODOS_CONTEO:
+            return jsonify({
+                'success': False,
+                'error': f"count debe ser uno de: {', '.join(MODOS_CONTEO)}"
+            }), 400
+        if page < 1 or per_page < 1:
+            return jsonify({
+                'success': False,
+                'error': 'page y per_page deben ser mayores que 0'
+            }), 400
+
+        # Filtros compartidos por la consulta de datos y la de conteo
+        filtros, params = filtros_registros(search, estado)
+
+        # Consulta base con JOINs para obtener información relacionada
+        query = COLUMNAS_REGISTROS
+
+        # En modo página el total exacto viaja en la misma consulta como función de ventana
+        contar_en_consulta = count_mode == 'exact' and cursor is None
+        if contar_en_consulta:
+            query += ",\n            COUNT(*) OVER() AS TOTAL_FILAS"
+
+        query += ORIGEN_REGISTROS + filtros
+
+        # El conteo solo necesita los JOINs que participan en la búsqueda
+        count_query = "SELECT COUNT(*) FROM REGISTROS r LEFT JOIN BOBINA b ON r.BOBINA_ID_BOBI = b.ID_BOBI LEFT JOIN PROVEEDOR p ON r.PROVEEDOR_ID_PROV = p.ID_PROV WHERE 1=1" + filtros
+
+        total = None
+        if count_mode == 'approx':
+            total = cache_conteos.obtener(
+                ('registros', search, estado),
+                lambda p=dict(params): db.session.execute(text(count_query), p).scalar()
+            )
+        elif count_mode == 'exact' and cursor is not None:
+            # Con cursor la ventana solo vería las filas posteriores al cursor
+            total = db.session.execute(text(count_query), params).scalar()
+
+        if cursor is not None:
+            # Paginación por clave: se continúa después de la última fila entregada,
+            # así cada página cuesta lo mismo sin importar su profundidad.
+            # FECHA_INGRESO_PLANTA es obligatoria, por eso no se contemplan NULL.
+            if cursor:
+                cursor_fecha, cursor_id = decodificar_cursor(cursor, 2)
+                query += " AND (r.FECHA_INGRESO_PLANTA > :cursor_fecha OR (r.FECHA_INGRESO_PLANTA = :cursor_fecha AND r.ID_REGISTRO > :cursor_id))"
+                params['cursor_fecha'] = cursor_fecha
+                params['cursor_id'] = cursor_id
+            query += " ORDER BY r.FECHA_INGRESO_PLANTA ASC, r.ID_REGISTRO ASC OFFSET 0 ROWS FETCH NEXT :limit ROWS ONLY"
+            # Se pide una fila extra solo para saber si hay más páginas
+            params['limit'] = per_page + 1
+        else:
+            # Consulta con paginacion
+            query += " ORDER BY r.FECHA_INGRESO_PLANTA ASC, r.ID_REGISTRO ASC OFFSET :offset ROWS FETCH NEXT :limit ROWS ONLY"
+            params['offset'] = (page - 1) * per_page
+            params['limit'] = per_page
+
+        result = db.session.execute(text(query), params)
+        rows = result.fetchall()
+
+        if contar_en_consulta:
+            if rows:
+                total = rows[0]._mapping['TOTAL_FILAS']
+            elif page > 1:
+                # Página fuera de rango: no hay filas que traigan el total
+                total = db.session.execute(text(count_query), params).scalar()
+            else:
+                total = 0
+
+        next_cursor = None
+        if cursor is not None and len(rows) > per_page:
+            rows = rows[:per_page]
+            ultima = rows[-1]._mapping
+            next_cursor = codificar_cursor(ultima['FECHA_INGRESO_PLANTA'], ultima['ID_REGISTRO'])
+
+        registros = filas_a_dicts(result, rows, omitir=('TOTAL_FILAS',))
+
+        if cursor is not None:
+            pagination = {
+                'per_page': per_page,
+                'total': total,
+                'count': count_mode,
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
+            }
+        else:
+            pagination = {
+                'page': page,
+                'per_page': per_page,
+                'total': total,
+                'count': count_mode,
+                'pages': ((total + per_page - 1) // per_page if total > 0 else 1) if total is not None else None
+            }
+
+        return respuesta_json({
+            'success': True,
+            'data': registros,
+            'pagination': pagination
+        })
+
+    except CursorInvalido as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/api/registros/changes')
+def get_cambios_registros():
+    """Registros insertados o modificados (también al despacharse) después del token 'since', con las
+    mismas columnas que /api/registros. Sin 'since' devuelve solo el token actual: se pide antes de
+    la carga completa y desde ahí el cliente se mantiene al día con next_token."""
+    try:
+        if not cambios_registros.disponible(db.session):
+            return jsonify({
+                'success': False,
+                'error': 'REGISTROS no tiene VERSION_FILA; ejecutar sql/05_version_fila_registros.sql'
+            }), 501
+
+        limite = request.args.get('limit', 500, type=int)
+        if not 1 <= limite <= MAX_CAMBIOS:
+            return jsonify({
+                'success': False,
+                'error': f'limit debe estar entre 1 y {MAX_CAMBIOS}'
+            }), 400
+
+        since = request.args.get('since', '')
+        desde = decodificar_token(since) if since else None
+        # Solo versiones ya confirmadas; el próximo token parte desde aquí si no quedan más filas
+        hasta = cambios_registros.hasta(db.session)
+
+        registros = []
+        siguiente = hasta - 1
+        hay_mas = False
+        if desde is not None:
+            query = (COLUMNAS_REGISTROS + ",\n            CONVERT(BIGINT, r.VERSION_FILA) AS VERSION_FILA" +
+                     ORIGEN_REGISTROS +
+                     " AND r.VERSION_FILA > CONVERT(BINARY(8), :desde) AND r.VERSION_FILA < CONVERT(BINARY(8), :hasta)"
+                     " ORDER BY r.VERSION_FILA OFFSET 0 ROWS FETCH NEXT :limit ROWS ONLY")
+            # Se pide una fila extra solo para saber si quedan más cambios
+            result = db.session.execute(text(query), {'desde': desde, 'hasta': hasta, 'limit': limite + 1})
+            rows = result.fetchall()
+            if len(rows) > limite:
+                rows = rows[:limite]
+                siguiente = rows[-1]._mapping['VERSION_FILA']
+                hay_mas = True
+            registros = filas_a_dicts(result, rows, omitir=('VERSION_FILA',))
+
+        return respuesta_json({
+            'success': True,
+            'data': registros,
+            'next_token': codificar_token(siguiente),
+            'has_more': hay_mas
+        })
+
+    except CursorInvalido as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/api/registros/actualizar-estado', methods=['PUT'])
+def actualizar_estado_registros():
+    try:
+        data = request.get_json()
+        ids_registros = data.get('ids_registros', [])
+        nuevo_estado_id = data.get('nuevo_estado_id')
+
+        if not ids_registros or nuevo_estado_id is None:
+            return jsonify({
+                'success': False,
+                'error': 'Datos incompletos'
+            }), 400
+
+        # Actualizar estado de los registros
+        query = text(
+            "UPDATE REGISTROS SET ESTADO_ID_ESTADO = :estado_id WHERE ID_REGISTRO IN :ids_registros"
+        ).bindparams(bindparam('ids_registros', expanding=True))
+        result = db.session.execute(query, {
+            'estado_id': nuevo_estado_id,
+            'ids_registros': list(ids_registros)
+        })
+        versiones_tablas.incrementar(db.session, 'REGISTROS')
+
+        db.session.commit()
+        indice_antiguedad.actualizar(db.session, ids_registros)
+        servicio_kpis.invalidar()
+        cache_conteos.invalidar()
+        snapshot_analitica.marcar_desactualizado()
+        bus_eventos.publicar('registros_actualizados', dict(ids_evento(ids_registros), estado_id=nuevo_estado_id))
+
+        return jsonify({
+            'success': True,
+            'message': f'{result.rowcount} registros actualizados exitosamente'
+        })
+
+    except Exception as e:
+        db.session.rollback()
+        print('Error actualizando estado registros:', str(e))
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
@@ -0,0 +1,60 @@
+import os
+
+from flask import Blueprint, current_app, jsonify
+from sqlalchemy import text
+
+from app.database import db
+from app.metricas import TIPO_CONTENIDO
+from app.pool import estado_pool
+from app.servicios import metricas
+
+bp = Blueprint('sistema', __name__)
+
+
+@bp.route('/')
+def hello():
+    return jsonify({
+        'message': 'API BOBIS - Sistema de Gestión de Bobinas',
+        'version': '2.0.0',
+        'database': 'bd_bobonas',
+        'status': 'Funcionando correctamente'
+    })
+
+
+@bp.route('/api/test-db')
+def test_db():
+    try:
+        db.session.execute(text('SELECT 1 as test'))
+        return jsonify({
+            'success': True,
+            'message': '✅ Conexión a la base de datos exitosa!',
+            'database': os.getenv('DB_DATABASE')
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/api/pool/estado')
+def get_estado_pool():
+    """Ocupación del pool de conexiones y espera acumulada de los checkouts de este proceso. Bajo
+    gunicorn responde el worker que atiende la petición; 'worker' indica su PID."""
+    try:
+        return jsonify({
+            'success': True,
+            'data': estado_pool(db.engine)
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/api/metrics')
+def get_metricas():
+    """Métricas del proceso en formato de texto de Prometheus. Bajo gunicorn cada scrape trae solo
+    las series del worker que lo atendió, con la etiqueta worker (PID)."""
+    return current_app.response_class(metricas.texto(db.engine), mimetype=TIPO_CONTENIDO)
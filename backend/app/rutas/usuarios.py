@@ -0,0 +1,189 @@
+from flask import Blueprint, jsonify, request
+from sqlalchemy import text
+
+from app.database import db
+from app.serializacion import filas_a_dicts, respuesta_json
+from app.servicios import versiones_tablas
+
+bp = Blueprint('usuarios', __name__)
+
+
+@bp.route('/api/usuarios')
+def get_usuarios():
+    try:
+        query = """
+        SELECT 
+            ID_USUARIO,
+            NOMBRE_USUARIO,
+            APELLIDO_USUARIO,
+            CORREO_USUARIO,
+            AZURE_OBJECT_ID,
+            ROL_USUARIO,
+            ESTADO,
+            FECHA_ULTIMO_ACCESO,
+            FECHA_CREACION
+        FROM USUARIOS
+        WHERE ESTADO = 'Activo'
+        ORDER BY NOMBRE_USUARIO, APELLIDO_USUARIO
+        """
+        result = db.session.execute(text(query))
+        
+        usuarios = filas_a_dicts(result)
+        
+        return respuesta_json({
+            'success': True,
+            'data': usuarios
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/api/usuarios/<int:id_usuario>')
+def get_usuario(id_usuario):
+    try:
+        query = """
+        SELECT 
+            ID_USUARIO,
+            NOMBRE_USUARIO,
+            APELLIDO_USUARIO,
+            CORREO_USUARIO,
+            AZURE_OBJECT_ID,
+            ROL_USUARIO,
+            ESTADO,
+            FECHA_ULTIMO_ACCESO,
+            FECHA_CREACION
+        FROM USUARIOS
+        WHERE ID_USUARIO = :id_usuario
+        """
+        result = db.session.execute(text(query), {'id_usuario': id_usuario})
+        row = result.fetchone()
+        
+        if not row:
+            return jsonify({
+                'success': False,
+                'error': 'Usuario no encontrado'
+            }), 404
+        
+        usuario = filas_a_dicts(result, [row])[0]
+        
+        return respuesta_json({
+            'success': True,
+            'data': usuario
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/api/usuarios/azure/<azure_object_id>')
+def get_usuario_azure(azure_object_id):
+    try:
+        query = """
+        SELECT 
+            ID_USUARIO,
+            NOMBRE_USUARIO,
+            APELLIDO_USUARIO,
+            CORREO_USUARIO,
+            AZURE_OBJECT_ID,
+            ROL_USUARIO,
+            ESTADO,
+            FECHA_ULTIMO_ACCESO,
+            FECHA_CREACION
+        FROM USUARIOS
+        WHERE AZURE_OBJECT_ID = :azure_object_id
+        """
+        result = db.session.execute(text(query), {'azure_object_id': azure_object_id})
+        row = result.fetchone()
+        
+        if not row:
+            return jsonify({
+                'success': False,
+                'error': 'Usuario no encontrado'
+            }), 404
+        
+        usuario = filas_a_dicts(result, [row])[0]
+        
+        return respuesta_json({
+            'success': True,
+            'data': usuario
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/api/usuarios/sincronizar', methods=['POST'])
+def sincronizar_usuario():
+    try:
+        data = request.get_json()
+        
+        # Verificar si el usuario ya existe
+        query_check = """
+        SELECT ID_USUARIO FROM USUARIOS 
+        WHERE AZURE_OBJECT_ID = :azure_object_id
+        """
+        result = db.session.execute(text(query_check), {
+            'azure_object_id': data['azure_object_id']
+        })
+        existing_user = result.fetchone()
+        
+        if existing_user:
+            # Actualizar último acceso
+            query_update = """
+            UPDATE USUARIOS 
+            SET FECHA_ULTIMO_ACCESO = SYSDATETIME()
+            WHERE ID_USUARIO = :id_usuario
+            """
+            db.session.execute(text(query_update), {
+                'id_usuario': existing_user[0]
+            })
+            user_id = existing_user[0]
+        else:
+            # Crear nuevo usuario
+            query_insert = """
+            INSERT INTO USUARIOS (
+                NOMBRE_USUARIO, 
+                APELLIDO_USUARIO, 
+                CORREO_USUARIO, 
+                AZURE_OBJECT_ID,
+                ROL_USUARIO
+            ) VALUES (
+                :nombre, :apellido, :correo, :azure_object_id, :rol
+            )
+            SELECT SCOPE_IDENTITY() as id_usuario
+            """
+            result = db.session.execute(text(query_insert), {
+                'nombre': data.get('nombre', ''),
+                'apellido': data.get('apellido', ''),
+                'correo': data.get('correo', ''),
+                'azure_object_id': data['azure_object_id'],
+                'rol': data.get('rol', 'Consulta')
+            })
+            user_id = result.fetchone()[0]
+            # Solo un alta cambia los nombres que muestran los pedidos; el último acceso no
+            versiones_tablas.incrementar(db.session, 'USUARIOS')
+        
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'id_usuario': user_id,
+            'message': 'Usuario sincronizado exitosamente'
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
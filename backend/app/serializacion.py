@@ -0,0 +1,83 @@
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from flask import current_app
+
+try:
+    import orjson
+except ImportError:  # sin orjson se usa el json de la biblioteca estándar
+    orjson = None
+
+
+def _decimal(valor):
+    # Igual que jsonify: los DECIMAL viajan como texto para no perder precisión
+    return str(valor)
+
+
+def _isoformat(valor):
+    return valor.isoformat()
+
+
+def _por_defecto(valor):
+    if isinstance(valor, Decimal):
+        return str(valor)
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat()
+    raise TypeError(f'Tipo no serializable: {type(valor).__name__}')
+
+
+# Conversión por tipo de columna; orjson ya escribe fechas en ISO 8601 sin ayuda
+CONVERSORES = {Decimal: _decimal}
+if orjson is None:
+    CONVERSORES.update({datetime: _isoformat, date: _isoformat, time: _isoformat})
+
+
+def compilar_filas(columnas, muestra=(), omitir=(), minusculas=True):
+    """Prepara una vez por consulta la función fila -> dict: claves finales, columnas omitidas
+    y el conversor de cada columna según el tipo de su primer valor no nulo en la muestra"""
+    indices = [i for i, columna in enumerate(columnas) if columna not in omitir]
+    claves = [columnas[i].lower() if minusculas else columnas[i] for i in indices]
+
+    conversores = {}
+    for posicion, i in enumerate(indices):
+        for fila in muestra:
+            if fila[i] is not None:
+                conversor = CONVERSORES.get(type(fila[i]))
+                if conversor is not None:
+                    conversores[posicion] = conversor
+                break
+
+    todas = len(indices) == len(columnas)
+    if not conversores:
+        if todas:
+            return lambda fila: dict(zip(claves, fila))
+        return lambda fila: dict(zip(claves, [fila[i] for i in indices]))
+
+    def convertir(fila):
+        valores = [fila[i] for i in indices]
+        for posicion, conversor in conversores.items():
+            if valores[posicion] is not None:
+                valores[posicion] = conversor(valores[posicion])
+        return dict(zip(claves, valores))
+
+    return convertir
+
+
+def filas_a_dicts(result, filas=None, omitir=(), minusculas=True):
+    """Lista de dicts de un resultado; 'filas' permite pasar las filas ya leídas (o recortadas)"""
+    if filas is None:
+        filas = result.fetchall()
+    convertir = compilar_filas(list(result.keys()), filas, omitir, minusculas)
+    return [convertir(fila) for fila in filas]
+
+
+def codificar_json(payload):
+    if orjson is not None:
+        return orjson.dumps(payload, default=_por_defecto)
+    return json.dumps(payload, default=_por_defecto, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def respuesta_json(payload, status=200):
+    """Como jsonify, pero codificando directamente a bytes con orjson cuando está disponible"""
+    return current_app.response_class(codificar_json(payload), status=status, mimetype='application/json')
@@ -0,0 +1,40 @@
+import os
+
+from app.antiguedad import IndiceAntiguedad
+from app.busqueda import crear_indice_busqueda
+from app.cambios import CambiosRegistros
+from app.catalogos import CacheCatalogos
+from app.conteos import CacheConteos
+from app.eventos import BusEventos
+from app.database import db
+from app.kpis import ServicioKPIs
+from app.metricas import Metricas
+from app.rollups import RollupPedidos
+from app.versiones import VersionesTablas
+
+# Servicios compartidos por los blueprints. Se crean sin aplicación y sin conectarse a la BD:
+# create_app() los asocia (metricas.init_app) y cada uno consulta la BD recién en su primer uso.
+
+# Latencia por ruta y SQL por petición, expuestas en /api/metrics
+metricas = Metricas()
+# Versión por tabla para los GET condicionales de los listados (0: se leen de la BD en cada petición)
+versiones_tablas = VersionesTablas(db, ttl=int(os.getenv('VERSIONES_TTL', 0)))
+# Tablas de referencia (BOBINA, PROVEEDOR, ...) servidas desde memoria; se recargan cuando cambia
+# su versión, también si la cambió otro worker
+cache_catalogos = CacheCatalogos(db, versiones_tablas, intervalo=int(os.getenv('CATALOGOS_INTERVALO', 5)))
+# Totales aproximados para count=approx en los listados paginados
+cache_conteos = CacheConteos(ttl=int(os.getenv('CONTEO_APROX_TTL', 60)))
+# Indicadores de inventario de los endpoints de estadísticas, de un solo recorrido de REGISTROS
+servicio_kpis = ServicioKPIs(db, cache_catalogos, ttl=int(os.getenv('KPI_TTL', 30)))
+# Búsqueda de los listados: sql (tabla REGISTROS_BUSQUEDA), memoria (sustituto local) o like
+indice_busqueda = crear_indice_busqueda(os.getenv('BUSQUEDA_INDICE', 'sql'), cache_catalogos)
+# Pedidos por mes y tipo de bobina (ROLLUP_PEDIDOS_MES): tendencia y series de pronóstico
+rollup_pedidos = RollupPedidos()
+# Bobinas disponibles por antigüedad (rotación FIFO), en memoria y recargadas cada ANTIGUEDAD_TTL segundos
+indice_antiguedad = IndiceAntiguedad(ttl=int(os.getenv('ANTIGUEDAD_TTL', 300)))
+# Registros modificados desde un token, para /api/registros/changes
+cambios_registros = CambiosRegistros()
+# Escrituras confirmadas para /api/eventos; las de otros procesos se detectan por las versiones de tabla.
+# Cada cliente ocupa un hilo del worker: serve.py no arranca si EVENTOS_MAX_CLIENTES no es menor que --hilos
+bus_eventos = BusEventos(versiones_tablas.actuales, intervalo=int(os.getenv('EVENTOS_INTERVALO', 5)),
+                         max_clientes=int(os.getenv('EVENTOS_MAX_CLIENTES', 2)))
@@ -0,0 +1,64 @@
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app
+
+
+class Snapshot:
+    """Resultado precalculado de una consulta costosa, recalculado en segundo plano"""
+
+    def __init__(self, calcular, intervalo=300, espera=5, nombre='snapshot'):
+        self.calcular = calcular
+        self.intervalo = intervalo  # recálculo periódico, en segundos
+        self.espera = espera  # agrupa varias escrituras seguidas en un solo recálculo
+        self.nombre = nombre
+        self._actual = None  # (payload, generated_at)
+        self._pendiente = threading.Event()
+        self._lock_calculo = threading.Lock()
+        self._lock_hilo = threading.Lock()
+        self._hilo = None
+
+    def obtener(self, forzar=False):
+        """Devuelve (payload, generated_at) sin tocar la BD salvo en el primer uso o si se fuerza"""
+        self._iniciar()
+        if forzar or self._actual is None:
+            self._recalcular()
+        return self._actual
+
+    def calentar(self):
+        """Calcula el primer snapshot sin arrancar el hilo (por ejemplo, en el maestro antes del fork)"""
+        if self._actual is None:
+            self._recalcular()
+
+    def marcar_desactualizado(self):
+        """Pide un recálculo en segundo plano (por ejemplo tras una escritura)"""
+        self._pendiente.set()
+
+    def _recalcular(self):
+        with self._lock_calculo:
+            self._actual = (self.calcular(), datetime.now())
+
+    def _iniciar(self):
+        # El hilo se arranca con la primera petición y no al importar,
+        # así no queda atrapado en el proceso padre de un servidor con fork
+        if self._hilo is not None:
+            return
+        with self._lock_hilo:
+            if self._hilo is None:
+                # El hilo recalcula con la aplicación de la petición que lo arrancó
+                app = current_app._get_current_object()
+                self._hilo = threading.Thread(target=self._bucle, args=(app,), name=self.nombre, daemon=True)
+                self._hilo.start()
+
+    def _bucle(self, app):
+        while True:
+            if self._pendiente.wait(timeout=self.intervalo):
+                time.sleep(self.espera)
+            self._pendiente.clear()
+            try:
+                with app.app_context():
+                    self._recalcular()
+            except Exception as e:
+                # Se sigue sirviendo el último snapshot válido
+                print(f'Error recalculando {self.nombre}:', str(e))
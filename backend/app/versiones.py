@@ -0,0 +1,106 @@
+import functools
+import threading
+import time
+
+from flask import current_app, make_response, request
+from sqlalchemy import bindparam, text
+
+CONSULTA_VERSIONES = text("SELECT TABLA, VERSION FROM VERSIONES_TABLA")
+
+CONSULTA_VERSIONES_DE = text("SELECT TABLA, VERSION FROM VERSIONES_TABLA WHERE TABLA IN :tablas").bindparams(
+    bindparam('tablas', expanding=True)
+)
+
+CONSULTA_INCREMENTAR = text("UPDATE VERSIONES_TABLA SET VERSION = VERSION + 1 WHERE TABLA IN :tablas").bindparams(
+    bindparam('tablas', expanding=True)
+)
+
+
+class VersionesTablas:
+    """Versión de cada tabla (ver sql/04_versiones_tabla.sql) para responder los GET condicionales
+    con 304 sin ejecutar la consulta de la ruta. Las versiones se leen de la BD en cada petición
+    condicional, o cada 'ttl' segundos si ttl > 0: entonces un 304 se resuelve en memoria, pero
+    las escrituras de otros procesos tardan hasta 'ttl' en verse. Sin la tabla, las rutas
+    responden siempre completas."""
+
+    def __init__(self, db, ttl=0):
+        self.db = db
+        self.ttl = ttl
+        self._versiones = None
+        self._leidas_en = None
+        self._disponible = None
+        self._lock = threading.Lock()
+
+    def disponible(self, conexion):
+        if self._disponible is None:
+            existe = conexion.execute(text("SELECT OBJECT_ID('VERSIONES_TABLA')")).scalar()
+            self._disponible = existe is not None
+            if not self._disponible:
+                print('⚠️  VERSIONES_TABLA no existe, los listados se responden sin ETag')
+        return self._disponible
+
+    def incrementar(self, session, *tablas):
+        """Suma 1 a la versión de las tablas modificadas; va en la misma transacción que el cambio"""
+        if not self.disponible(session):
+            return
+        session.execute(CONSULTA_INCREMENTAR, {'tablas': list(tablas)})
+        # Las escrituras de este proceso se ven en la próxima petición aunque ttl > 0
+        self._leidas_en = None
+
+    def etag(self, tablas):
+        """ETag con la versión de cada una de las tablas, o None si no hay VERSIONES_TABLA"""
+        versiones = self.actuales()
+        if versiones is None:
+            return None
+        return 'v-' + '.'.join(str(versiones.get(tabla, 0)) for tabla in tablas)
+
+    def condicional(self, *tablas):
+        """Decorador de rutas GET: ETag según las versiones de 'tablas' y 304 si el cliente ya lo tiene"""
+        def decorador(vista):
+            @functools.wraps(vista)
+            def envoltura(*args, **kwargs):
+                # El ETag se toma antes de leer los datos para no asociar datos viejos a una versión nueva
+                try:
+                    etag = self.etag(tablas)
+                except Exception as e:
+                    print('Error leyendo versiones de tablas:', str(e))
+                    self.db.session.rollback()
+                    etag = None
+
+                if etag is not None and request.if_none_match.contains(etag):
+                    response = current_app.response_class(status=304)
+                else:
+                    response = make_response(vista(*args, **kwargs))
+                    if etag is None or response.status_code != 200:
+                        return response
+                response.set_etag(etag)
+                # Obliga al navegador a revalidar siempre; si nada cambió recibe un 304 sin cuerpo
+                response.headers['Cache-Control'] = 'no-cache'
+                return response
+            return envoltura
+        return decorador
+
+    def actuales(self):
+        """{tabla: versión}, o None si no hay VERSIONES_TABLA"""
+        session = self.db.session
+        if not self.disponible(session):
+            return None
+        if self.ttl <= 0:
+            return dict(session.execute(CONSULTA_VERSIONES).fetchall())
+
+        leidas_en = self._leidas_en
+        if leidas_en is not None and time.monotonic() - leidas_en <= self.ttl:
+            return self._versiones
+        with self._lock:
+            if self._leidas_en is None or time.monotonic() - self._leidas_en > self.ttl:
+                self._versiones = dict(session.execute(CONSULTA_VERSIONES).fetchall())
+                self._leidas_en = time.monotonic()
+            return self._versiones
+
+    def de(self, tablas):
+        """{tabla: versión} solo de 'tablas', leído de la BD, o None si no hay VERSIONES_TABLA. Puede
+        ir dentro de una transacción de escritura: no toca las filas que bloquean otras escrituras."""
+        session = self.db.session
+        if not self.disponible(session):
+            return None
+        return dict(session.execute(CONSULTA_VERSIONES_DE, {'tablas': list(tablas)}).fetchall())
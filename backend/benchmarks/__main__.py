@@ -0,0 +1,225 @@
+"""Benchmark de todos los endpoints de la aplicación sobre una copia SQLite de bd_bobinas.
+
+    cd backend
+    python -m benchmarks --registros 10000
+    python -m benchmarks --registros 1000000 --repeticiones 5
+    python -m benchmarks --registros 10000 --actualizar-linea-base
+
+Mide latencia (p50/p95), sentencias SQL y pico de memoria de cada caso de benchmarks/casos.py.
+La primera corrida de cada tamaño guarda la línea base; las siguientes terminan con código 1
+si algún caso empeora más allá de la tolerancia o si hay rutas sin caso."""
+import argparse
+import io
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime
+
+from sqlalchemy import event
+
+from benchmarks.casos import CASOS
+from benchmarks.generador import generar
+from benchmarks.sqlite import instalar_traductor
+
+LINEA_BASE = os.path.join(os.path.dirname(__file__), 'linea_base.json')
+
+
+def argumentos():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.splitlines()[0])
+    parser.add_argument('--registros', type=int, default=10000, help='bobinas en REGISTROS (10k a 1M)')
+    parser.add_argument('--repeticiones', type=int, default=20)
+    parser.add_argument('--calentamiento', type=int, default=2)
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--casos', default='', help='nombres de casos separados por coma (por defecto, todos)')
+    parser.add_argument('--busqueda', default='sql', choices=('sql', 'memoria', 'like'), help='BUSQUEDA_INDICE')
+    parser.add_argument('--db', default=None, help='archivo SQLite (por defecto, uno temporal por tamaño)')
+    parser.add_argument('--linea-base', default=LINEA_BASE)
+    parser.add_argument('--actualizar-linea-base', action='store_true')
+    parser.add_argument('--tolerancia', type=float, default=0.25, help='aumento relativo permitido del p50')
+    parser.add_argument('--margen-ms', type=float, default=2.0, help='aumento absoluto permitido del p50')
+    parser.add_argument('--tolerancia-memoria', type=float, default=0.25)
+    return parser.parse_args()
+
+
+def preparar_bd(args):
+    ruta = args.db or os.path.join(tempfile.gettempdir(), f'bobis_benchmark_{args.registros}.db')
+    if os.path.exists(ruta):
+        os.remove(ruta)
+    inicio = time.perf_counter()
+    generar(f'sqlite:///{ruta}', args.registros, semilla=args.semilla, crear_esquema=True)
+    print(f'📦 {args.registros} registros cargados en {ruta} ({time.perf_counter() - inicio:.1f} s)')
+    return ruta
+
+
+def cargar_aplicacion(ruta, busqueda):
+    # La configuración y los servicios (app.servicios) leen el entorno al importarse
+    os.environ['DATABASE_URL'] = f'sqlite:///{ruta}'
+    os.environ['BUSQUEDA_INDICE'] = busqueda
+    import run
+    from app.servicios import indice_busqueda, rollup_pedidos
+
+    with run.app.app_context():
+        instalar_traductor(run.db.engine)
+        with redirect_stdout(io.StringIO()):
+            indice_busqueda.reconstruir(run.db.session)
+            rollup_pedidos.reconstruir(run.db.session)
+        run.db.session.commit()
+    return run
+
+
+def rutas_sin_caso(app):
+    cubiertas = {(caso.regla, caso.metodo) for caso in CASOS}
+    faltantes = []
+    for regla in app.url_map.iter_rules():
+        if regla.endpoint == 'static':
+            continue
+        for metodo in sorted(regla.methods - {'HEAD', 'OPTIONS'}):
+            if (regla.rule, metodo) not in cubiertas:
+                faltantes.append(f'{metodo} {regla.rule}')
+    return faltantes
+
+
+class ContadorSentencias:
+    def __init__(self, engine):
+        self.total = 0
+        event.listen(engine, 'before_cursor_execute', self._contar)
+
+    def _contar(self, *args):
+        self.total += 1
+
+
+def percentil(valores, cuantil):
+    ordenados = sorted(valores)
+    return ordenados[max(math.ceil(cuantil * len(ordenados)) - 1, 0)]
+
+
+def ejecutar(run, cliente, contador, caso):
+    """Una petición; devuelve (segundos, código de estado, sentencias SQL).
+    El cuerpo se consume entero para incluir lo que las exportaciones leen al enviar."""
+    with run.app.app_context():
+        url, cuerpo, cabeceras = caso.peticion(run)
+    antes = contador.total
+    inicio = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        respuesta = cliente.open(url, method=caso.metodo, json=cuerpo, headers=cabeceras)
+        respuesta.get_data()
+        respuesta.close()
+    return time.perf_counter() - inicio, respuesta.status_code, contador.total - antes
+
+
+def medir(run, cliente, contador, caso, args):
+    for _ in range(args.calentamiento):
+        ejecutar(run, cliente, contador, caso)
+
+    tiempos = []
+    sentencias = 0
+    for _ in range(args.repeticiones):
+        segundos, estado, cantidad = ejecutar(run, cliente, contador, caso)
+        tiempos.append(segundos)
+        sentencias = max(sentencias, cantidad)
+
+    # Pico de memoria en una corrida aparte: tracemalloc distorsiona los tiempos
+    tracemalloc.start()
+    ejecutar(run, cliente, contador, caso)
+    memoria = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'p50_ms': round(percentil(tiempos, 0.5) * 1000, 3),
+        'p95_ms': round(percentil(tiempos, 0.95) * 1000, 3),
+        'media_ms': round(sum(tiempos) / len(tiempos) * 1000, 3),
+        'consultas': sentencias,
+        'memoria_kb': round(memoria / 1024, 1),
+        'estado': estado
+    }
+
+
+def regresiones(resultados, base, args):
+    encontradas = []
+    for nombre, actual in resultados.items():
+        anterior = base.get(nombre)
+        if anterior is None or 'omitido' in actual or 'omitido' in anterior:
+            continue
+        if actual['estado'] != anterior['estado']:
+            encontradas.append(f"{nombre}: estado {anterior['estado']} -> {actual['estado']}")
+        limite = anterior['p50_ms'] * (1 + args.tolerancia) + args.margen_ms
+        if actual['p50_ms'] > limite:
+            encontradas.append(f"{nombre}: p50 {anterior['p50_ms']} -> {actual['p50_ms']} ms")
+        if actual['consultas'] > anterior['consultas']:
+            encontradas.append(f"{nombre}: consultas {anterior['consultas']} -> {actual['consultas']}")
+        # 64 KB de margen para que los casos pequeños no fallen por ruido del asignador
+        if actual['memoria_kb'] > anterior['memoria_kb'] * (1 + args.tolerancia_memoria) + 64:
+            encontradas.append(f"{nombre}: memoria {anterior['memoria_kb']} -> {actual['memoria_kb']} KB")
+    return encontradas
+
+
+def imprimir(resultados):
+    print(f"{'caso':34} {'estado':>6} {'p50 ms':>10} {'p95 ms':>10} {'consultas':>9} {'memoria KB':>11}")
+    for nombre, r in resultados.items():
+        if 'omitido' in r:
+            print(f"{nombre:34} omitido: {r['omitido']}")
+        else:
+            print(f"{nombre:34} {r['estado']:>6} {r['p50_ms']:>10.3f} {r['p95_ms']:>10.3f} "
+                  f"{r['consultas']:>9} {r['memoria_kb']:>11.1f}")
+
+
+def main():
+    args = argumentos()
+    nombres = {nombre.strip() for nombre in args.casos.split(',') if nombre.strip()}
+    casos = [caso for caso in CASOS if not nombres or caso.nombre in nombres]
+
+    run = cargar_aplicacion(preparar_bd(args), args.busqueda)
+    faltantes = rutas_sin_caso(run.app)
+    cliente = run.app.test_client()
+    with run.app.app_context():
+        contador = ContadorSentencias(run.db.engine)
+
+    resultados = {}
+    for caso in casos:
+        if caso.omitir_en_sqlite:
+            resultados[caso.nombre] = {'omitido': caso.omitir_en_sqlite}
+        else:
+            resultados[caso.nombre] = medir(run, cliente, contador, caso, args)
+    imprimir(resultados)
+
+    # Una línea base por tamaño de datos: los tiempos solo son comparables con el mismo volumen
+    lineas_base = {}
+    if os.path.exists(args.linea_base):
+        with open(args.linea_base, encoding='utf-8') as archivo:
+            lineas_base = json.load(archivo)
+    clave = str(args.registros)
+    fallas = [f'ruta sin caso de benchmark: {ruta}' for ruta in faltantes]
+
+    if clave in lineas_base and not args.actualizar_linea_base:
+        fallas += regresiones(resultados, lineas_base[clave]['casos'], args)
+    else:
+        anteriores = lineas_base.get(clave, {}).get('casos', {})
+        lineas_base[clave] = {
+            'generada': datetime.now().isoformat(timespec='seconds'),
+            'repeticiones': args.repeticiones,
+            # Con --casos solo se reemplazan los casos medidos
+            'casos': {**anteriores, **resultados}
+        }
+        with open(args.linea_base, 'w', encoding='utf-8') as archivo:
+            json.dump(lineas_base, archivo, indent=2, ensure_ascii=False)
+        print(f'💾 Línea base de {clave} registros guardada en {args.linea_base}')
+
+    no_exitosos = [nombre for nombre, r in resultados.items() if r.get('estado', 200) >= 400]
+    if no_exitosos:
+        print(f"⚠️  Casos que no respondieron 2xx/3xx: {', '.join(no_exitosos)}")
+    if fallas:
+        print('❌ Regresiones:')
+        for falla in fallas:
+            print(f'  - {falla}')
+        return 1
+    print('✅ Sin regresiones')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
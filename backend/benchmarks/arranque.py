@@ -0,0 +1,128 @@
+"""Tiempo de arranque de la aplicación: importar run.py (create_app), la primera petición y la
+primera petición de un worker recién bifurcado del maestro (gunicorn --preload).
+Flask, SQLAlchemy y dotenv se importan antes y se informan aparte: son comunes a toda versión.
+
+    cd backend
+    python -m benchmarks.arranque
+    python -m benchmarks.arranque --corridas 15 --referencia HEAD~1
+
+Cada corrida es un proceso nuevo, así que mide un arranque en frío. Con --referencia se mide
+también el árbol de esa revisión (extraído con git archive) para comparar."""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+# Se ejecuta con python -c en el directorio del árbol a medir; imprime una línea JSON
+MEDIDOR = r'''
+import json, os, resource, sys, time
+
+inicio = time.perf_counter()
+# Dependencias comunes a cualquier versión de la aplicación, medidas aparte
+import dotenv, flask, flask_cors, flask_sqlalchemy, sqlalchemy
+dependencias = time.perf_counter()
+import run
+importado = time.perf_counter()
+
+lectura, escritura = os.pipe()
+antes_fork = time.perf_counter()
+pid = os.fork()
+if pid == 0:
+    os.close(lectura)
+    respuesta = run.app.test_client().get(sys.argv[1])
+    respuesta.get_data()
+    os.write(escritura, f'{time.perf_counter() - antes_fork} {respuesta.status_code}'.encode())
+    os._exit(0)
+os.close(escritura)
+fork, estado_fork = os.read(lectura, 64).decode().split()
+os.waitpid(pid, 0)
+
+antes = time.perf_counter()
+respuesta = run.app.test_client().get(sys.argv[1])
+respuesta.get_data()
+primera = time.perf_counter() - antes
+
+print(json.dumps({
+    'dependencias_ms': (dependencias - inicio) * 1000,
+    'importar_ms': (importado - dependencias) * 1000,
+    'primera_peticion_ms': primera * 1000,
+    'fork_primera_peticion_ms': float(fork) * 1000,
+    'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'modulos': len(sys.modules),
+    'numpy': 'numpy' in sys.modules,
+    'estado': [respuesta.status_code, int(estado_fork)]
+}))
+'''
+
+METRICAS = (
+    ('dependencias_ms', 'Flask y SQLAlchemy (ms)'),
+    ('importar_ms', 'importar run.py (ms)'),
+    ('primera_peticion_ms', 'primera petición (ms)'),
+    ('fork_primera_peticion_ms', 'fork -> primera petición (ms)'),
+    ('rss_mb', 'memoria residente (MB)'),
+    ('modulos', 'módulos cargados')
+)
+
+
+def argumentos():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.arranque', description=__doc__.splitlines()[0])
+    parser.add_argument('--corridas', type=int, default=9, help='procesos por árbol; se informa la mediana')
+    parser.add_argument('--url', default='/api/test-db', help='ruta de la primera petición')
+    parser.add_argument('--referencia', help='revisión de git con la que comparar (por ejemplo HEAD~1)')
+    return parser.parse_args()
+
+
+def extraer_revision(revision, destino):
+    """Copia backend/ de 'revision' en 'destino' y devuelve la ruta del backend extraído"""
+    raiz = subprocess.run(['git', 'rev-parse', '--show-toplevel'], capture_output=True, text=True,
+                          check=True).stdout.strip()
+    archivo = os.path.join(destino, 'arbol.tar')
+    subprocess.run(['git', 'archive', '--format=tar', '-o', archivo, revision, 'backend'], cwd=raiz, check=True)
+    with tarfile.open(archivo) as tar:
+        tar.extractall(destino, filter='data')
+    return os.path.join(destino, 'backend')
+
+
+def medir(directorio, args, entorno):
+    corridas = []
+    # La primera corrida se descarta: compila los .pyc del árbol extraído
+    for _ in range(args.corridas + 1):
+        salida = subprocess.run([sys.executable, '-c', MEDIDOR, args.url], cwd=directorio, env=entorno,
+                                capture_output=True, text=True, check=True).stdout
+        corridas.append(json.loads(salida.strip().splitlines()[-1]))
+    corridas = corridas[1:]
+    resultado = {clave: statistics.median(c[clave] for c in corridas) for clave, _ in METRICAS}
+    resultado['numpy'] = corridas[0]['numpy']
+    resultado['estado'] = corridas[0]['estado']
+    return resultado
+
+
+def main():
+    args = argumentos()
+    temporal = tempfile.mkdtemp(prefix='bobis_arranque_')
+    try:
+        # Una BD SQLite vacía: basta para SELECT 1 y evita depender del servidor
+        entorno = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(temporal, 'arranque.db')}")
+        arboles = {'actual': os.path.dirname(os.path.dirname(os.path.abspath(__file__)))}
+        if args.referencia:
+            arboles[args.referencia] = extraer_revision(args.referencia, temporal)
+
+        resultados = {nombre: medir(directorio, args, entorno) for nombre, directorio in arboles.items()}
+
+        print(f"mediana de {args.corridas} procesos, primera petición: {args.url}")
+        print(f"{'':32}" + ''.join(f'{nombre:>14}' for nombre in resultados))
+        for clave, titulo in METRICAS:
+            print(f'{titulo:32}' + ''.join(f'{r[clave]:>14.1f}' for r in resultados.values()))
+        print(f"{'NumPy importado al arrancar':32}" + ''.join(f"{'sí' if r['numpy'] else 'no':>14}"
+                                                          for r in resultados.values()))
+    finally:
+        shutil.rmtree(temporal, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
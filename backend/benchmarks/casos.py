@@ -0,0 +1,179 @@
+from sqlalchemy import text
+
+
+class Caso:
+    """Una petición a medir. 'preparar(run)' se ejecuta antes de cada repetición, fuera de la medición,
+    y devuelve los valores con que se completan la URL y el cuerpo."""
+
+    def __init__(self, nombre, metodo, regla, url=None, cuerpo=None, preparar=None, omitir_en_sqlite=None,
+                 cabeceras=None):
+        self.nombre = nombre
+        self.metodo = metodo
+        self.regla = regla
+        self.url = url or regla
+        self.cuerpo = cuerpo
+        self.preparar = preparar
+        self.cabeceras = cabeceras
+        # Motivo por el que el caso no puede correr sobre SQLite (se informa como omitido)
+        self.omitir_en_sqlite = omitir_en_sqlite
+
+    def peticion(self, run):
+        valores = self.preparar(run) if self.preparar is not None else {}
+        cuerpo = self.cuerpo(valores) if callable(self.cuerpo) else self.cuerpo
+        cabeceras = self.cabeceras(valores) if callable(self.cabeceras) else self.cabeceras
+        return self.url.format(**valores), cuerpo, cabeceras
+
+
+def _valor(run, sql):
+    return run.db.session.execute(text(sql)).scalar()
+
+
+def _primer_registro(run):
+    return {'id': _valor(run, "SELECT MIN(ID_REGISTRO) FROM REGISTROS")}
+
+
+def _ultimo_pedido(run):
+    return {'id': _valor(run, "SELECT MAX(ID_PEDIDO) FROM PEDIDO_CAB")}
+
+
+def _disponibles(run):
+    ids = run.db.session.execute(text("""
+        SELECT ID_REGISTRO FROM REGISTROS WHERE ESTADO_ID_ESTADO = 1
+        ORDER BY ID_REGISTRO DESC OFFSET 0 ROWS FETCH NEXT 5 ROWS ONLY
+    """)).scalars().all()
+    return {'ids': ids}
+
+
+def _lote_registros(run):
+    ids = run.db.session.execute(text("""
+        SELECT ID_REGISTRO FROM REGISTROS ORDER BY ID_REGISTRO OFFSET 0 ROWS FETCH NEXT 200 ROWS ONLY
+    """)).scalars().all()
+    return {'ids': ids}
+
+
+def _filas_importacion():
+    # Un arreglo JSON con una fila de cada 10 inválida: cubre el MERGE por lotes, el número de fila
+    # de cada ID y los errores por fila
+    filas = []
+    for i in range(500):
+        fila = {'pedido_compra': f'PCIMP{i:04d}', 'colada': f'CIMP{i:04d}', 'peso': 12.5, 'bobina_id_bobi': 1 + i % 40,
+                'fecha_ingreso_planta': '2024-06-01'}
+        if i % 10 == 3:
+            fila['peso'] = 'sin peso'
+        elif i % 10 == 7:
+            fila['bobina_id_bobi'] = 99999
+        elif i % 2:
+            # Otro conjunto de columnas: otro lote del MERGE
+            fila['observaciones'] = 'Importación benchmark'
+        filas.append(fila)
+    return filas
+
+
+def _ediciones(valores):
+    # Dos conjuntos de campos: dos executemany
+    return {'registros': [
+        {'id': id_registro, 'campos': {'observaciones': 'Conteo físico', 'peso': 10.5} if i % 2 else
+         {'observaciones': 'Conteo físico'}}
+        for i, id_registro in enumerate(valores['ids'])
+    ]}
+
+
+def _token_reciente(run):
+    # Token de un cliente al que le faltan las últimas 100 versiones de fila
+    from app.cambios import codificar_token
+    return {'since': codificar_token(_valor(run, "SELECT CONVERT(BIGINT, MAX(VERSION_FILA)) FROM REGISTROS") - 100)}
+
+
+def _etag(url):
+    """preparar de un sondeo repetido: el ETag que el cliente ya tiene de 'url'"""
+    def preparar(run):
+        valores = _ultimo_pedido(run) if '{id}' in url else {}
+        respuesta = run.app.test_client().get(url.format(**valores))
+        return {**valores, 'etag': respuesta.headers.get('ETag', '')}
+    return preparar
+
+
+def _si_no_coincide(valores):
+    return {'If-None-Match': valores['etag']}
+
+
+def _ubicacion_nueva(run):
+    id_ubi = _valor(run, "INSERT INTO UBICACION (DESC_UBI) OUTPUT INSERTED.ID_UBI VALUES ('Benchmark')")
+    run.db.session.commit()
+    return {'id': id_ubi}
+
+
+# Primero las lecturas y al final las escrituras, para que las lecturas midan siempre los mismos datos
+CASOS = [
+    Caso('inicio', 'GET', '/'),
+    Caso('test_db', 'GET', '/api/test-db'),
+    Caso('pool_estado', 'GET', '/api/pool/estado'),
+    Caso('metricas', 'GET', '/api/metrics'),
+    Caso('registros_pagina', 'GET', '/api/registros', '/api/registros?page=1&per_page=50'),
+    Caso('registros_pagina_100', 'GET', '/api/registros', '/api/registros?page=100&per_page=50'),
+    Caso('registros_conteo_aprox', 'GET', '/api/registros', '/api/registros?page=1&per_page=50&count=approx'),
+    Caso('registros_estado', 'GET', '/api/registros', '/api/registros?estado=2&per_page=50'),
+    Caso('registros_busqueda', 'GET', '/api/registros', '/api/registros?search=C0000012&per_page=50'),
+    Caso('registros_exportar_csv', 'GET', '/api/registros/exportar', '/api/registros/exportar?formato=csv&estado=2'),
+    Caso('registros_exportar_ndjson', 'GET', '/api/registros/exportar',
+         '/api/registros/exportar?formato=ndjson&search=Revisar'),
+    # Sin filas: NDJSON no tiene encabezado y el cuerpo queda vacío
+    Caso('registros_exportar_vacio', 'GET', '/api/registros/exportar',
+         '/api/registros/exportar?formato=ndjson&search=zzzzqqq'),
+    Caso('registros_cambios_token', 'GET', '/api/registros/changes'),
+    Caso('registros_cambios', 'GET', '/api/registros/changes', '/api/registros/changes?since={since}',
+         preparar=_token_reciente),
+    Caso('despachos_historial', 'GET', '/api/despachos/historial', '/api/despachos/historial?page=1&per_page=50'),
+    Caso('despachos_busqueda', 'GET', '/api/despachos/historial', '/api/despachos/historial?search=C0000012&per_page=50'),
+    Caso('despachos_exportar', 'GET', '/api/despachos/historial/exportar', '/api/despachos/historial/exportar?formato=csv'),
+    Caso('tablas', 'GET', '/api/tablas'),
+    Caso('opciones_combos', 'GET', '/api/opciones-combos'),
+    Caso('proveedores', 'GET', '/api/proveedores'),
+    Caso('bobinas', 'GET', '/api/bobinas'),
+    Caso('estados', 'GET', '/api/estados'),
+    Caso('ubicaciones', 'GET', '/api/ubicaciones'),
+    Caso('gestion_tabla', 'GET', '/api/gestion/<tabla>', '/api/gestion/BARCO'),
+    Caso('estadisticas', 'GET', '/api/estadisticas'),
+    Caso('dashboard_estadisticas', 'GET', '/api/dashboard/estadisticas'),
+    Caso('analitica_predictiva', 'GET', '/api/dashboard/analitica-predictiva'),
+    Caso('analitica_predictiva_recalculo', 'GET', '/api/dashboard/analitica-predictiva',
+         '/api/dashboard/analitica-predictiva?refresh=1'),
+    Caso('pronostico_bobina', 'GET', '/api/dashboard/pronostico', '/api/dashboard/pronostico?por=bobina&meses=6'),
+    Caso('pronostico_proveedor', 'GET', '/api/dashboard/pronostico',
+         '/api/dashboard/pronostico?por=proveedor&modelo=holt&meses=12'),
+    Caso('antiguedad', 'GET', '/api/dashboard/antiguedad'),
+    Caso('antiguedad_filtrada', 'GET', '/api/dashboard/antiguedad', '/api/dashboard/antiguedad?bobina=1&limite=100'),
+    Caso('pedidos_en_curso', 'GET', '/api/pedidos/en-curso'),
+    Caso('pedido_detalle', 'GET', '/api/pedidos/<int:id_pedido>/detalle', '/api/pedidos/{id}/detalle',
+         preparar=_ultimo_pedido),
+    Caso('registros_sin_cambios', 'GET', '/api/registros', '/api/registros?page=1&per_page=50',
+         preparar=_etag('/api/registros?page=1&per_page=50'), cabeceras=_si_no_coincide),
+    Caso('despachos_sin_cambios', 'GET', '/api/despachos/historial', '/api/despachos/historial?page=1&per_page=50',
+         preparar=_etag('/api/despachos/historial?page=1&per_page=50'), cabeceras=_si_no_coincide),
+    Caso('pedidos_en_curso_sin_cambios', 'GET', '/api/pedidos/en-curso',
+         preparar=_etag('/api/pedidos/en-curso'), cabeceras=_si_no_coincide),
+    Caso('pedido_detalle_sin_cambios', 'GET', '/api/pedidos/<int:id_pedido>/detalle', '/api/pedidos/{id}/detalle',
+         preparar=_etag('/api/pedidos/{id}/detalle'), cabeceras=_si_no_coincide),
+    # duracion=0: abre el flujo, envía un latido y lo cierra; mide el costo de conectarse
+    Caso('eventos', 'GET', '/api/eventos', '/api/eventos?duracion=0'),
+    Caso('usuarios', 'GET', '/api/usuarios'),
+    Caso('usuario', 'GET', '/api/usuarios/<int:id_usuario>', '/api/usuarios/1'),
+    Caso('usuario_azure', 'GET', '/api/usuarios/azure/<azure_object_id>', '/api/usuarios/azure/azure-1'),
+
+    Caso('usuarios_sincronizar', 'POST', '/api/usuarios/sincronizar',
+         cuerpo={'azure_object_id': 'azure-1', 'nombre': 'Usuario1', 'apellido': 'Apellido1', 'correo': 'usuario1@bobis.cl'}),
+    Caso('registro_crear', 'POST', '/api/registros',
+         cuerpo={'pedido_compra': 'PCBENCH', 'colada': 'COLBENCH', 'peso': 12.5, 'observaciones': 'Benchmark'}),
+    Caso('registro_actualizar', 'PUT', '/api/registros/<int:id_registro>', '/api/registros/{id}',
+         cuerpo={'observaciones': 'Benchmark actualizado'}, preparar=_primer_registro),
+    Caso('registros_editar_lote', 'PATCH', '/api/registros', cuerpo=_ediciones, preparar=_lote_registros),
+    Caso('registros_actualizar_estado', 'PUT', '/api/registros/actualizar-estado',
+         cuerpo=lambda valores: {'ids_registros': valores['ids'], 'nuevo_estado_id': 1}, preparar=_disponibles),
+    Caso('pedido_crear', 'POST', '/api/pedidos',
+         cuerpo=lambda valores: {'usuario_solicita_id': 1, 'registros': valores['ids'], 'observaciones': 'Benchmark'},
+         preparar=_disponibles),
+    Caso('gestion_agregar', 'POST', '/api/gestion/<tabla>', '/api/gestion/UBICACION', cuerpo={'DESC_UBI': 'Benchmark'}),
+    Caso('gestion_eliminar', 'DELETE', '/api/gestion/<tabla>/<int:id>', '/api/gestion/UBICACION/{id}',
+         preparar=_ubicacion_nueva),
+    Caso('registros_importar', 'POST', '/api/registros/importar', cuerpo=_filas_importacion()),
+]
@@ -0,0 +1,124 @@
+import re
+from functools import lru_cache
+
+from sqlalchemy import event, text
+from sqlalchemy.sql.elements import TextClause
+
+# Esquema de bd_bobinas en SQLite: mismas tablas y columnas que usan las rutas, con los
+# índices de sql/01_indices_paginacion.sql y las tablas de sql/02_registros_busqueda.sql,
+# sql/03_rollup_pedidos.sql y sql/04_versiones_tabla.sql. El ROWVERSION de
+# sql/05_version_fila_registros.sql se emula con triggers que asignan MAX(VERSION_FILA) + 1
+ESQUEMA = """
+CREATE TABLE BOBINA (ID_BOBI INTEGER PRIMARY KEY, DESC_BOBI TEXT, LAM_BOBI TEXT, ESPESOR_BOBI REAL, ANCHO_BOBI INTEGER);
+CREATE TABLE PROVEEDOR (ID_PROV INTEGER PRIMARY KEY, NOMBRE_PROV TEXT);
+CREATE TABLE BARCO (ID_BARCO INTEGER PRIMARY KEY, NOMBRE_BARCO TEXT);
+CREATE TABLE UBICACION (ID_UBI INTEGER PRIMARY KEY, DESC_UBI TEXT);
+CREATE TABLE ESTADO (ID_ESTADO INTEGER PRIMARY KEY, DESC_ESTADO TEXT);
+CREATE TABLE PROCEDENCIA (ID_PROCED INTEGER PRIMARY KEY, DESC_PROCED TEXT);
+CREATE TABLE MOLINO (ID_MOLINO INTEGER PRIMARY KEY, NOMBRE_MOLINO TEXT, PROCEDENCIA_ID_PROCED INTEGER);
+CREATE TABLE ESTADO_PEDIDO (ID_ESTADO_PED INTEGER PRIMARY KEY, DESCRIPCION TEXT);
+CREATE TABLE USUARIOS (
+    ID_USUARIO INTEGER PRIMARY KEY, NOMBRE_USUARIO TEXT, APELLIDO_USUARIO TEXT, CORREO_USUARIO TEXT,
+    AZURE_OBJECT_ID TEXT, ROL_USUARIO TEXT, ESTADO TEXT DEFAULT 'Activo', FECHA_ULTIMO_ACCESO TEXT, FECHA_CREACION TEXT
+);
+CREATE TABLE REGISTROS (
+    ID_REGISTRO INTEGER PRIMARY KEY AUTOINCREMENT, FECHA_LLEGADA TEXT, PEDIDO_COMPRA TEXT, COLADA TEXT,
+    PESO REAL, CANTIDAD INTEGER, LOTE TEXT, FECHA_INVENTARIO TEXT, OBSERVACIONES TEXT, TON_PEDIDO_COMPRA REAL,
+    FECHA_INGRESO_PLANTA TEXT NOT NULL, BOBINA_ID_BOBI INTEGER, PROVEEDOR_ID_PROV INTEGER, BARCO_ID_BARCO INTEGER,
+    UBICACION_ID_UBI INTEGER, ESTADO_ID_ESTADO INTEGER NOT NULL, MOLINO_ID_MOLINO INTEGER,
+    N_BOBI_PROVEEDOR TEXT, BOBI_CORRELATIVO TEXT, COD_BOBIN2 TEXT, VERSION_FILA INTEGER
+);
+CREATE TABLE PEDIDO_CAB (
+    ID_PEDIDO INTEGER PRIMARY KEY AUTOINCREMENT, FECHA_PEDIDO TEXT, USUARIO_SOLICITA_ID INTEGER,
+    ESTADO_PEDIDO_ID INTEGER, OBSERVACIONES TEXT
+);
+CREATE TABLE PEDIDO_DET (
+    ID_PEDIDO_DET INTEGER PRIMARY KEY AUTOINCREMENT, ID_PEDIDO INTEGER, ID_REGISTRO INTEGER,
+    ESTADO_DESPACHO INTEGER, PED_OBSERVACIONES TEXT
+);
+CREATE TABLE REGISTROS_BUSQUEDA (GRAMA TEXT NOT NULL, ID_REGISTRO INTEGER NOT NULL, PRIMARY KEY (GRAMA, ID_REGISTRO));
+CREATE INDEX IX_REGISTROS_BUSQUEDA_REGISTRO ON REGISTROS_BUSQUEDA (ID_REGISTRO);
+CREATE TABLE ROLLUP_PEDIDOS_MES (
+    ANIO INTEGER NOT NULL, MES INTEGER NOT NULL, BOBINA_ID_BOBI INTEGER NOT NULL, PEDIDOS INTEGER NOT NULL,
+    BOBINAS INTEGER NOT NULL, PESO_TOTAL REAL NOT NULL, BOBINAS_CON_PESO INTEGER NOT NULL,
+    PRIMARY KEY (ANIO, MES, BOBINA_ID_BOBI)
+);
+CREATE TABLE VERSIONES_TABLA (TABLA TEXT PRIMARY KEY, VERSION INTEGER NOT NULL DEFAULT 0);
+INSERT INTO VERSIONES_TABLA (TABLA) VALUES
+    ('REGISTROS'), ('PEDIDO_CAB'), ('PEDIDO_DET'), ('USUARIOS'), ('ESTADO_PEDIDO'),
+    ('BOBINA'), ('PROVEEDOR'), ('BARCO'), ('UBICACION'), ('ESTADO'), ('MOLINO'), ('PROCEDENCIA');
+CREATE INDEX IX_REGISTROS_VERSION_FILA ON REGISTROS (VERSION_FILA);
+CREATE TRIGGER TR_REGISTROS_VERSION_INSERT AFTER INSERT ON REGISTROS BEGIN
+    UPDATE REGISTROS SET VERSION_FILA = (SELECT COALESCE(MAX(VERSION_FILA), 0) + 1 FROM REGISTROS)
+    WHERE ID_REGISTRO = NEW.ID_REGISTRO;
+END;
+CREATE TRIGGER TR_REGISTROS_VERSION_UPDATE AFTER UPDATE ON REGISTROS WHEN NEW.VERSION_FILA IS OLD.VERSION_FILA BEGIN
+    UPDATE REGISTROS SET VERSION_FILA = (SELECT COALESCE(MAX(VERSION_FILA), 0) + 1 FROM REGISTROS)
+    WHERE ID_REGISTRO = NEW.ID_REGISTRO;
+END;
+CREATE INDEX IX_REGISTROS_FECHA_INGRESO ON REGISTROS (FECHA_INGRESO_PLANTA, ID_REGISTRO);
+CREATE INDEX IX_PEDIDO_CAB_FECHA_PEDIDO ON PEDIDO_CAB (FECHA_PEDIDO, ID_PEDIDO);
+CREATE INDEX IX_PEDIDO_DET_PEDIDO ON PEDIDO_DET (ID_PEDIDO, ID_PEDIDO_DET);
+"""
+
+# Traducción textual de las construcciones de T-SQL que aparecen en app/.
+# No es un traductor general: cubre lo que las consultas del repo usan.
+REGLAS = [
+    (re.compile(r'SELECT\s+TOP\s+(\d+)(.*)$', re.S | re.I),
+     lambda m: f"SELECT {m.group(2).rstrip().rstrip(';')} LIMIT {m.group(1)}"),
+    (re.compile(r'OFFSET\s+(:\w+|\d+)\s+ROWS\s+FETCH\s+NEXT\s+(:\w+|\d+)\s+ROWS\s+ONLY', re.I), r'LIMIT \2 OFFSET \1'),
+    (re.compile(r'FETCH\s+NEXT\s+(:\w+|\d+)\s+ROWS\s+ONLY', re.I), r'LIMIT \1'),
+    (re.compile(r'DATEADD\(\s*MONTH\s*,\s*(-?\d+)\s*,\s*GETDATE\(\)\s*\)', re.I), r"datetime('now', '\1 months')"),
+    (re.compile(r'DATEDIFF\(\s*DAY\s*,\s*([\w\.]+)\s*,\s*GETDATE\(\)\s*\)', re.I),
+     r"CAST(julianday('now') - julianday(\1) AS INTEGER)"),
+    (re.compile(r"FORMAT\(([\w\.]+),\s*'yyyy-MM'\)", re.I), r"strftime('%Y-%m', \1)"),
+    (re.compile(r'CAST\(([\w\.]+)\s+AS\s+DATE\)', re.I), r'date(\1)'),
+    (re.compile(r'GETDATE\(\)|SYSDATETIME\(\)', re.I), "datetime('now')"),
+    (re.compile(r'SCOPE_IDENTITY\(\)', re.I), 'last_insert_rowid()'),
+    (re.compile(r"\+ ' ' \+"), "|| ' ' ||"),
+    (re.compile(r'\bYEAR\(([\w\.]+)\)', re.I), r"CAST(strftime('%Y', \1) AS INTEGER)"),
+    (re.compile(r'\bMONTH\(([\w\.]+)\)', re.I), r"CAST(strftime('%m', \1) AS INTEGER)"),
+    (re.compile(r"OBJECT_ID\('(\w+)'\)", re.I), r"(SELECT 1 FROM sqlite_master WHERE name = '\1')"),
+    (re.compile(r"COL_LENGTH\('(\w+)',\s*'(\w+)'\)", re.I), r"(SELECT 1 FROM pragma_table_info('\1') WHERE name = '\2')"),
+    (re.compile(r'CONVERT\(\s*(?:BIGINT|BINARY\(8\))\s*,\s*([\w\.:]+(?:\([\w\.]*\))?)\s*\)', re.I), r'\1'),
+    (re.compile(r'MIN_ACTIVE_ROWVERSION\(\)', re.I), '(SELECT COALESCE(MAX(VERSION_FILA), 0) + 1 FROM REGISTROS)'),
+    (re.compile(r'INFORMATION_SCHEMA\.TABLES', re.I),
+     "(SELECT name AS TABLE_NAME, 'BASE TABLE' AS TABLE_TYPE FROM sqlite_master WHERE type = 'table')"),
+]
+SALIDA_INSERTADA = re.compile(r'OUTPUT\s+INSERTED\.(\w+)\s*(VALUES\s*\(.*\))', re.S | re.I)
+# MERGE ... ON 1 = 0 de la importación -> INSERT ... RETURNING. RETURNING solo ve columnas de la
+# tabla, así que el número de fila de origen viaja en VERSION_FILA: RETURNING entrega el valor
+# insertado y el trigger de inserción lo reemplaza después por la versión que corresponde.
+MERGE_IMPORTACION = re.compile(
+    r'MERGE\s+INTO\s+REGISTROS\s+AS\s+destino\s+USING\s+\(VALUES\s+(.*)\)\s+AS\s+origen\s+\(FILA,\s*([^)]*)\)'
+    r'\s+ON\s+1\s*=\s*0\s+WHEN\s+NOT\s+MATCHED\s+THEN\s+INSERT\s+\([^)]*\)\s+VALUES\s+\([^)]*\)'
+    r'\s+OUTPUT\s+origen\.FILA,\s*INSERTED\.ID_REGISTRO\s*;',
+    re.S | re.I
+)
+COMENTARIO = re.compile(r'--[^\n]*')
+
+
+@lru_cache(maxsize=1024)
+def traducir(sql):
+    """T-SQL de la aplicación -> SQLite (en caché, para no sumar las regex al tiempo medido)"""
+    sql = MERGE_IMPORTACION.sub(r'INSERT INTO REGISTROS (VERSION_FILA, \2) VALUES \1 RETURNING VERSION_FILA, ID_REGISTRO',
+                                sql)
+    sql = SALIDA_INSERTADA.sub(r'\2 RETURNING \1', sql)
+    for patron, reemplazo in REGLAS:
+        sql = patron.sub(reemplazo, sql)
+    return COMENTARIO.sub('', sql)
+
+
+def instalar_traductor(engine):
+    """Traduce cada text() antes de ejecutarlo, conservando los bindparams (expanding incluidos)"""
+
+    @event.listens_for(engine, 'before_execute', retval=True)
+    def _traducir(conn, clause, multiparams, params, opciones):
+        if isinstance(clause, TextClause):
+            traducida = text(traducir(clause.text))
+            traducida._bindparams.update(
+                {nombre: parametro for nombre, parametro in clause._bindparams.items() if nombre in traducida._bindparams}
+            )
+            clause = traducida
+        return clause, multiparams, params
+
@@ -0,0 +1,174 @@
+"""Servidor de producción: la aplicación de create_app() bajo gunicorn, con varios procesos (prefork) y hilos por proceso.
+
+    cd backend
+    python serve.py
+    python serve.py --workers 4 --hilos 8 --max-peticiones 2000 --pid /run/bobis.pid
+
+Cada opción toma su valor por defecto de una variable SERVIDOR_* (ver argumentos()) y APP_CONFIG
+queda en 'production' si no se indica otra. Antes de aceptar tráfico se cargan los catálogos,
+los indicadores, el índice de antigüedad y la analítica, y cada worker abre su pool de conexiones.
+
+Señales al proceso maestro (con --pid se guarda su PID):
+    kill -HUP   recrea los workers de a uno sin cortar peticiones. Con --preload los workers
+                nuevos heredan el código ya cargado; para desplegar código nuevo usar
+                kill -USR2 (levanta un maestro nuevo) y luego kill -QUIT al anterior.
+    kill -TERM  cierre ordenado: espera hasta --timeout-cierre a las peticiones en curso.
+
+/api/metrics y /api/pool/estado son por proceso: cada scrape llega a un solo worker. Las series
+llevan la etiqueta worker (PID) para agregarlas en Prometheus con sum without (worker).
+
+Cada cliente de /api/eventos (Server-Sent Events) ocupa un hilo de su worker mientras está
+conectado: --eventos-max-clientes tiene que quedar por debajo de --hilos, o el servidor no
+arranca. Con --eventos-max-clientes 0, /api/eventos queda desactivado y basta un hilo.
+
+gunicorn no corre en Windows; ahí se sigue usando python run.py para desarrollo."""
+import argparse
+import io
+import multiprocessing
+import os
+import time
+from contextlib import redirect_stdout
+
+from gunicorn.app.base import BaseApplication
+
+from app.config import booleano_env, entero_env
+
+
+def argumentos():
+    parser = argparse.ArgumentParser(prog='python serve.py', description=__doc__.splitlines()[0])
+    parser.add_argument('--bind', default=os.getenv('SERVIDOR_BIND', '0.0.0.0:5000'))
+    parser.add_argument('--workers', type=int,
+                        default=entero_env('SERVIDOR_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+    parser.add_argument('--hilos', type=int, default=entero_env('SERVIDOR_HILOS', 4),
+                        help='hilos por worker (más de 1 usa el worker gthread)')
+    parser.add_argument('--preload', action=argparse.BooleanOptionalAction,
+                        default=booleano_env('SERVIDOR_PRELOAD', True),
+                        help='importa y calienta la aplicación una vez en el maestro, antes del fork')
+    parser.add_argument('--max-peticiones', type=int, default=entero_env('SERVIDOR_MAX_PETICIONES', 1000),
+                        help='recicla cada worker tras N peticiones (0 desactiva)')
+    parser.add_argument('--max-peticiones-variacion', type=int,
+                        default=entero_env('SERVIDOR_MAX_PETICIONES_VARIACION', 100),
+                        help='variación aleatoria para que los workers no se reciclen a la vez')
+    parser.add_argument('--timeout', type=int, default=entero_env('SERVIDOR_TIMEOUT', 60))
+    parser.add_argument('--timeout-cierre', type=int, default=entero_env('SERVIDOR_TIMEOUT_CIERRE', 30))
+    parser.add_argument('--keepalive', type=int, default=entero_env('SERVIDOR_KEEPALIVE', 5))
+    parser.add_argument('--pid', default=os.getenv('SERVIDOR_PID'), help='archivo con el PID del maestro')
+    parser.add_argument('--calentar', action=argparse.BooleanOptionalAction,
+                        default=booleano_env('SERVIDOR_CALENTAR', True))
+    parser.add_argument('--eventos-max-clientes', type=int, default=entero_env('EVENTOS_MAX_CLIENTES', 2),
+                        help='clientes de /api/eventos por worker (0 desactiva la ruta)')
+    args = parser.parse_args()
+    # Con el worker sync (un hilo) un cliente de eventos dejaría al worker sin atender nada más
+    if args.eventos_max_clientes > 0 and args.eventos_max_clientes >= args.hilos:
+        parser.error(f'cada cliente de /api/eventos ocupa un hilo del worker: --hilos ({args.hilos}) debe ser '
+                     f'mayor que --eventos-max-clientes ({args.eventos_max_clientes}); '
+                     f'use --eventos-max-clientes 0 para desactivar /api/eventos')
+    return args
+
+
+def calentar(app):
+    """Precarga lo que, si no, pagaría la primera petición de cada sección"""
+    from app.analitica import snapshot_analitica
+    from app.catalogos import CONSULTAS_CATALOGO
+    from app.database import db
+    from app.servicios import cache_catalogos, indice_antiguedad, servicio_kpis
+
+    pasos = [
+        ('catálogos', lambda: [cache_catalogos.filas(tabla) for tabla in CONSULTAS_CATALOGO]),
+        ('indicadores', servicio_kpis.obtener),
+        ('antigüedad', lambda: indice_antiguedad.reconstruir(db.session)),
+        ('analítica', snapshot_analitica.calentar)
+    ]
+    with app.app_context():
+        for nombre, paso in pasos:
+            inicio = time.perf_counter()
+            try:
+                with redirect_stdout(io.StringIO()):
+                    paso()
+                print(f'🔥 {nombre} en memoria ({time.perf_counter() - inicio:.2f} s)')
+            except Exception as e:
+                # Un paso fallido no impide arrancar: esa sección se calcula en la primera petición
+                print(f'⚠️  No se pudo precargar {nombre}:', str(e))
+        db.session.remove()
+
+
+def calentar_pool(app):
+    """Abre las pool_size conexiones del worker para que las primeras peticiones no esperen al login"""
+    from app.database import db
+
+    with app.app_context():
+        engine = db.engine
+        conexiones = []
+        try:
+            for _ in range(engine.pool.size()):
+                conexiones.append(engine.connect())
+        except Exception as e:
+            print('⚠️  No se pudo abrir el pool de conexiones:', str(e))
+        for conexion in conexiones:
+            conexion.close()
+
+
+class ServidorBobis(BaseApplication):
+    def __init__(self, args):
+        self.args = args
+        self.aplicacion = None
+        super().__init__()
+
+    def load_config(self):
+        args = self.args
+        opciones = {
+            'bind': args.bind,
+            'workers': args.workers,
+            'threads': args.hilos,
+            'worker_class': 'gthread' if args.hilos > 1 else 'sync',
+            'preload_app': args.preload,
+            'max_requests': args.max_peticiones,
+            'max_requests_jitter': args.max_peticiones_variacion,
+            'timeout': args.timeout,
+            'graceful_timeout': args.timeout_cierre,
+            'keepalive': args.keepalive,
+            'pidfile': args.pid,
+            'post_fork': self.post_fork,
+            'post_worker_init': self.post_worker_init
+        }
+        for clave, valor in opciones.items():
+            if valor is not None:
+                self.cfg.set(clave, valor)
+
+    def load(self):
+        # Con preload se ejecuta una vez en el maestro; sin preload, en cada worker antes de atender
+        from app import create_app
+        from app.database import db
+
+        self.aplicacion = create_app(os.getenv('APP_CONFIG', 'production'))
+        if self.args.calentar:
+            calentar(self.aplicacion)
+        if self.args.preload:
+            # El maestro no atiende peticiones: sus conexiones no deben pasar a los workers
+            with self.aplicacion.app_context():
+                db.engine.dispose()
+        return self.aplicacion
+
+    def post_fork(self, servidor, worker):
+        if self.args.preload:
+            from app.database import db
+            from app.pool import estadisticas_pool
+            from app.servicios import metricas
+            # Por si quedó alguna conexión heredada: el worker la descarta sin cerrarla en el servidor
+            with self.aplicacion.app_context():
+                db.engine.dispose(close=False)
+            # Las consultas del calentamiento en el maestro no cuentan como tráfico del worker
+            metricas.reiniciar()
+            estadisticas_pool.reiniciar()
+
+    def post_worker_init(self, worker):
+        if self.args.calentar:
+            calentar_pool(self.aplicacion)
+
+
+if __name__ == '__main__':
+    os.environ.setdefault('APP_CONFIG', 'production')
+    args = argumentos()
+    # app.servicios lo lee al importarse, en load()
+    os.environ['EVENTOS_MAX_CLIENTES'] = str(args.eventos_max_clientes)
+    ServidorBobis(args).run()
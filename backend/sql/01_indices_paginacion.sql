@@ -0,0 +1,9 @@
+-- Índices para la paginación por clave (cursor) de /api/registros y /api/despachos/historial.
+-- Cubren el orden completo (clave de orden + ID) para que cada página sea un seek.
+
+CREATE INDEX IX_REGISTROS_FECHA_INGRESO
+    ON REGISTROS (FECHA_INGRESO_PLANTA, ID_REGISTRO);
+
+-- /api/despachos/historial ordena por (ID_PEDIDO, ID_PEDIDO_DET) descendente: se recorre hacia atrás.
+CREATE INDEX IX_PEDIDO_DET_PEDIDO
+    ON PEDIDO_DET (ID_PEDIDO, ID_PEDIDO_DET);
@@ -0,0 +1,14 @@
+-- Índice de trigramas para la búsqueda de /api/registros y /api/despachos/historial
+-- (app/busqueda.py). Sustituye el recorrido completo de LIKE '%termino%' por un seek
+-- sobre los trigramas del término; el LIKE se mantiene solo sobre los candidatos.
+-- Después de crear la tabla se puebla con:  flask --app run reconstruir-busqueda
+
+CREATE TABLE REGISTROS_BUSQUEDA (
+    GRAMA NVARCHAR(3) NOT NULL,
+    ID_REGISTRO INT NOT NULL,
+    CONSTRAINT PK_REGISTROS_BUSQUEDA PRIMARY KEY (GRAMA, ID_REGISTRO)
+);
+
+-- Para borrar las entradas de un registro al reindexarlo
+CREATE INDEX IX_REGISTROS_BUSQUEDA_REGISTRO
+    ON REGISTROS_BUSQUEDA (ID_REGISTRO);
@@ -0,0 +1,26 @@
+-- Agregado mensual de los pedidos por tipo de bobina (app/rollups.py).
+-- La tendencia mensual del dashboard y el pronóstico por bobina leen de aquí en vez de
+-- reagrupar PEDIDO_CAB/PEDIDO_DET/REGISTROS en cada consulta. crear_pedido lo actualiza
+-- en la misma transacción del pedido, y editar el peso o el tipo de una bobina ya pedida
+-- recalcula los meses de sus pedidos. Después de crear la tabla se puebla con:
+--   flask --app run reconstruir-rollups
+-- BOBINA_ID_BOBI = 0 agrupa las bobinas sin tipo (la clave primaria no admite NULL).
+-- PEDIDOS cuenta los pedidos que incluyen ese tipo: se puede sumar entre meses, no entre tipos.
+-- Una versión anterior de este script creaba también ROLLUP_PEDIDOS_DIA, que nada lee:
+--   DROP TABLE IF EXISTS ROLLUP_PEDIDOS_DIA;
+
+CREATE TABLE ROLLUP_PEDIDOS_MES (
+    ANIO SMALLINT NOT NULL,
+    MES TINYINT NOT NULL,
+    BOBINA_ID_BOBI INT NOT NULL,
+    PEDIDOS INT NOT NULL,
+    BOBINAS INT NOT NULL,
+    PESO_TOTAL DECIMAL(18, 3) NOT NULL,
+    BOBINAS_CON_PESO INT NOT NULL,
+    CONSTRAINT PK_ROLLUP_PEDIDOS_MES PRIMARY KEY (ANIO, MES, BOBINA_ID_BOBI)
+);
+
+-- Los recálculos por rango de meses y la marca de frescura del pronóstico (MAX(FECHA_PEDIDO))
+-- filtran PEDIDO_CAB por fecha. Antes lo creaba 01_indices_paginacion.sql; si ya existe, omitir.
+CREATE INDEX IX_PEDIDO_CAB_FECHA_PEDIDO
+    ON PEDIDO_CAB (FECHA_PEDIDO, ID_PEDIDO);
@@ -0,0 +1,16 @@
+-- Versión de cada tabla que leen los listados (app/versiones.py). Las rutas que escriben suman 1
+-- a la versión de las tablas que modifican, en la misma transacción que el cambio, y los GET de
+-- /api/registros, /api/despachos/historial, /api/pedidos/en-curso y /api/pedidos/<id>/detalle
+-- responden 304 sin ejecutar su consulta si ninguna de sus tablas cambió desde el ETag recibido.
+-- Los cambios hechos fuera de la API deben sumar también su versión, por ejemplo:
+--   UPDATE VERSIONES_TABLA SET VERSION = VERSION + 1 WHERE TABLA = 'REGISTROS';
+
+CREATE TABLE VERSIONES_TABLA (
+    TABLA VARCHAR(64) NOT NULL,
+    VERSION BIGINT NOT NULL CONSTRAINT DF_VERSIONES_TABLA_VERSION DEFAULT 0,
+    CONSTRAINT PK_VERSIONES_TABLA PRIMARY KEY (TABLA)
+);
+
+INSERT INTO VERSIONES_TABLA (TABLA) VALUES
+    ('REGISTROS'), ('PEDIDO_CAB'), ('PEDIDO_DET'), ('USUARIOS'), ('ESTADO_PEDIDO'),
+    ('BOBINA'), ('PROVEEDOR'), ('BARCO'), ('UBICACION'), ('ESTADO'), ('MOLINO'), ('PROCEDENCIA');
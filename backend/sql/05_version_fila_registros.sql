@@ -0,0 +1,9 @@
+-- Versión de fila de REGISTROS para /api/registros/changes (app/cambios.py).
+-- SQL Server asigna un ROWVERSION nuevo en cada INSERT y UPDATE, también en los que se hacen
+-- fuera de la API (despachos, cambios de estado, cargas manuales), así que el cliente recibe
+-- todo lo que cambió desde su último token sin que las rutas tengan que marcar nada.
+-- Agregar la columna escribe todas las filas de REGISTROS: ejecutar fuera del horario de uso.
+
+ALTER TABLE REGISTROS ADD VERSION_FILA ROWVERSION;
+
+CREATE INDEX IX_REGISTROS_VERSION_FILA ON REGISTROS (VERSION_FILA);